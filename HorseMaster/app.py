@@ -14,6 +14,10 @@ import requests
 from bs4 import BeautifulSoup
 import re
 
+# وحدات مشتركة مع horse_ai (نسخ داخل HorseMaster لأنه يُنشر مستقلاً)
+from bots.form_features import form_score
+from bots.harville import DEFAULT_TEMPERATURE, race_probabilities
+
 app = Flask(__name__)
 CORS(app)
 
@@ -156,6 +160,8 @@ class PredictionModel:
             'distance': 0.10,
             'going': 0.05
         }
+        # درجة حرارة Softmax لتحويل نقاط القوة إلى احتمالات
+        self.temperature = DEFAULT_TEMPERATURE
     
     def calculate_power_score(self, horse, race_info):
         """حساب نقاط القوة للحصان"""
@@ -180,33 +186,13 @@ class PredictionModel:
         # تقييم البوابة
         draw = horse.get('draw', 1)
         draw_score = self._analyze_draw(draw, race_info.get('field_size', 10))
-        score += draw_score * self.weights['draw'] * 100
+        score += draw_score * self.weights['draw']
         
         return round(score, 1)
     
     def _analyze_form(self, form):
-        """تحليل فورم الحصان"""
-        if not form:
-            return 50
-        
-        score = 0
-        count = 0
-        for char in form[-6:]:
-            if char.isdigit():
-                pos = int(char)
-                if pos == 1:
-                    score += 100
-                elif pos == 2:
-                    score += 80
-                elif pos == 3:
-                    score += 60
-                elif pos <= 5:
-                    score += 40
-                else:
-                    score += 20
-                count += 1
-        
-        return score / count if count > 0 else 50
+        """تحليل فورم الحصان (من وحدة form_features المشتركة)"""
+        return form_score(form)
     
     def _analyze_draw(self, draw, field_size):
         """تحليل تأثير البوابة"""
@@ -219,10 +205,14 @@ class PredictionModel:
         """توليد الترشيحات"""
         predictions = []
         
-        for horse in horses:
-            power_score = self.calculate_power_score(horse, race_info)
-            win_prob = self._calculate_win_probability(power_score, horses)
-            place_prob = min(95, win_prob + 20)
+        # نقاط القوة مرة واحدة لكل حصان، ثم احتمالات الفوز والمراكز (Softmax + Harville)
+        power_scores = [self.calculate_power_score(horse, race_info) for horse in horses]
+        probs = race_probabilities(power_scores, self.temperature) if horses else None
+        
+        for i, horse in enumerate(horses):
+            power_score = power_scores[i]
+            win_prob = float(probs["win"][i]) * 100
+            place_prob = float(probs["place"][i]) * 100
             
             predictions.append({
                 **horse,
@@ -239,11 +229,6 @@ class PredictionModel:
         
         return predictions
     
-    def _calculate_win_probability(self, power_score, all_horses):
-        """حساب احتمالية الفوز"""
-        total_power = sum(self.calculate_power_score(h, {}) for h in all_horses)
-        return (power_score / total_power * 100) if total_power > 0 else 10
-    
     def _calculate_value(self, win_prob, odds):
         """حساب القيمة"""
         expected = win_prob / 100
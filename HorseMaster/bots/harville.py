@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Harville - احتمالات ترتيب الوصول
+1. احتمالات الفوز من نقاط القوة عبر Softmax مع درجة حرارة (temperature) قابلة للمعايرة
+2. توسيع Harville / Henery: احتمال أن يكون الترتيب (i, j, k, ...) من احتمالات الفوز
+   P(j ثانياً | i أولاً) = w_j / (1 - w_i)   حيث w احتمالات مخفضة (p^γ) للمراكز اللاحقة
+3. من الموترات (tensors): احتمالات كل مركز، المراكز الأولى (Place / Top-N)، Exacta، Trifecta
+
+كل الدوال تعمل على مصفوفات NumPy بأبعاد (..., عدد المتسابقين) لعدة أشواط معاً
+الأشواط الأقل متسابقين تُكمل بأصفار (احتمال 0 لا يظهر في أي ترتيب)
+
+نسخة HorseMaster من horse_ai/harville.py (HorseMaster يُنشر مستقلاً) - أي تعديل يُطبق على النسختين
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# درجة الحرارة الافتراضية (بوحدة نقاط القوة): أصغر = ثقة أعلى في المرشح الأول
+DEFAULT_TEMPERATURE = 8.0
+
+# معاملات التخفيض للمركز الثاني والثالث (Lo & Bacon-Shone) - 1.0 = Harville الأصلي
+HENERY_DISCOUNTS = (1.0, 0.81, 0.65)
+
+# أقصى عدد خلايا في موتر واحد (لتقسيم البطاقات الكبيرة إلى دفعات)
+MAX_TENSOR_CELLS = 4_000_000
+
+
+# ===============================
+# احتمالات الفوز
+# ===============================
+def softmax(scores, temperature: float = DEFAULT_TEMPERATURE, mask=None) -> np.ndarray:
+    """احتمالات الفوز من النقاط على المحور الأخير (mask=False للخانات الفارغة)"""
+    z = np.asarray(scores, dtype=np.float64) / temperature
+    if mask is not None:
+        z = np.where(mask, z, -np.inf)
+    if z.shape[-1] == 0:
+        return np.zeros_like(z)
+    z_max = z.max(axis=-1, keepdims=True)
+    z_max = np.where(np.isfinite(z_max), z_max, 0.0)
+    e = np.exp(z - z_max)
+    total = e.sum(axis=-1, keepdims=True)
+    return np.divide(e, total, out=np.zeros_like(e), where=total > 0)
+
+
+def calibrate_temperature(scores, winners, mask=None,
+                          grid: Optional[Sequence[float]] = None) -> float:
+    """معايرة درجة الحرارة بأعلى احتمال (Maximum Likelihood) للفائزين الفعليين
+
+    scores: (أشواط × متسابقين) | winners: عمود الفائز في كل شوط
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    winners = np.asarray(winners, dtype=np.int64)
+    if mask is None:
+        mask = np.ones(scores.shape, dtype=bool)
+    rows = np.arange(len(scores))
+
+    def log_likelihood(temperatures: np.ndarray) -> np.ndarray:
+        z = np.where(mask, scores[None] / temperatures[:, None, None], -np.inf)
+        z_max = z.max(axis=-1, keepdims=True)
+        lse = np.log(np.exp(z - z_max).sum(axis=-1)) + z_max[..., 0]
+        return (z[:, rows, winners] - lse).sum(axis=-1)
+
+    grid = np.geomspace(0.5, 200, 80) if grid is None else np.asarray(grid, dtype=np.float64)
+    best = int(np.argmax(log_likelihood(grid)))
+
+    # تدقيق حول أفضل قيمة
+    low, high = grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)]
+    fine = np.linspace(low, high, 41)
+    return float(fine[np.argmax(log_likelihood(fine))])
+
+
+# ===============================
+# توسيع Harville / Henery
+# ===============================
+def discounted(p: np.ndarray, gamma: float) -> np.ndarray:
+    """احتمالات مخفضة p^γ ثم إعادة التطبيع (Henery/Lo)"""
+    if gamma == 1.0:
+        return p
+    w = np.power(p, gamma)
+    total = w.sum(axis=-1, keepdims=True)
+    return np.divide(w, total, out=np.zeros_like(w), where=total > 0)
+
+
+def finishing_order_tensors(p, depth: int = 3,
+                            discounts: Sequence[float] = HENERY_DISCOUNTS) -> List[np.ndarray]:
+    """موترات احتمالات الترتيب: العنصر k بأبعاد (..., n × (k+1))
+
+    tensors[0][..., i]       = P(i أولاً)
+    tensors[1][..., i, j]    = P(i أولاً، j ثانياً)       (Exacta)
+    tensors[2][..., i, j, k] = P(i، j، k بالترتيب)       (Trifecta)
+    """
+    p = np.asarray(p, dtype=np.float64)
+    n = p.shape[-1]
+    batch = p.shape[:-1]
+    depth = max(1, min(depth, n))
+    not_same = ~np.eye(n, dtype=bool)
+
+    tensors = [p]
+    prefix = p
+    for level in range(1, depth):
+        w = discounted(p, discounts[min(level, len(discounts) - 1)])
+
+        # مجموع w للخيول التي سبقت في الترتيب (بنفس أبعاد prefix)
+        used = np.zeros(prefix.shape)
+        for axis in range(level):
+            used += w.reshape(batch + (1,) * axis + (n,) + (1,) * (level - 1 - axis))
+        remaining = 1.0 - used
+        ratio = np.divide(prefix, remaining, out=np.zeros_like(prefix), where=remaining > 1e-12)
+
+        nxt = ratio[..., None] * w.reshape(batch + (1,) * level + (n,))
+        # الحصان لا يحتل مركزين
+        for axis in range(level):
+            nxt *= not_same.reshape((1,) * len(batch) + (1,) * axis + (n,) + (1,) * (level - 1 - axis) + (n,))
+        tensors.append(nxt)
+        prefix = nxt
+    return tensors
+
+
+def position_probabilities(tensors: List[np.ndarray]) -> np.ndarray:
+    """مصفوفة (..., n, depth): احتمال أن يصل كل حصان في المركز k"""
+    p = tensors[0]
+    batch_dims = p.ndim - 1
+    columns = [p]
+    for level, tensor in enumerate(tensors[1:], 1):
+        columns.append(tensor.sum(axis=tuple(range(batch_dims, batch_dims + level))))
+    return np.stack(columns, axis=-1)
+
+
+def top_n_probabilities(positions: np.ndarray, n: int) -> np.ndarray:
+    """احتمال الوصول ضمن أول n مراكز"""
+    return positions[..., :n].sum(axis=-1)
+
+
+def place_terms(field_size) -> np.ndarray:
+    """عدد المراكز المدفوعة (Each Way) حسب عدد المتسابقين"""
+    field_size = np.asarray(field_size)
+    return np.select([field_size <= 4, field_size <= 7, field_size <= 15], [1, 2, 3], 4)
+
+
+def top_combinations(tensor: np.ndarray, order: int, k: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """أعلى k ترتيبات في موتر Exacta/Trifecta
+
+    تُعيد (combos بأبعاد (..., k, order)، probs بأبعاد (..., k)) مرتبة تنازلياً
+    """
+    n = tensor.shape[-1]
+    batch = tensor.shape[:tensor.ndim - order]
+    flat = tensor.reshape(batch + (-1,))
+    k = min(k, flat.shape[-1])
+    if k == 0:
+        return np.zeros(batch + (0, order), dtype=np.int64), np.zeros(batch + (0,))
+
+    idx = np.argpartition(-flat, k - 1, axis=-1)[..., :k]
+    probs = np.take_along_axis(flat, idx, axis=-1)
+    order_idx = np.argsort(-probs, axis=-1, kind="stable")
+    idx = np.take_along_axis(idx, order_idx, axis=-1)
+    probs = np.take_along_axis(probs, order_idx, axis=-1)
+    combos = np.stack(np.unravel_index(idx, (n,) * order), axis=-1)
+    return combos, probs
+
+
+def race_probabilities(scores, temperature: float = DEFAULT_TEMPERATURE, depth: int = 3,
+                       field_size=None, mask=None) -> dict:
+    """كل الاحتمالات لشوط واحد أو عدة أشواط (مصفوفة نقاط مع قناع اختياري)"""
+    scores = np.asarray(scores, dtype=np.float64)
+    if mask is None:
+        mask = np.ones(scores.shape, dtype=bool)
+    if field_size is None:
+        field_size = mask.sum(axis=-1)
+
+    win = softmax(scores, temperature, mask)
+    tensors = finishing_order_tensors(win, depth)
+    positions = position_probabilities(tensors)
+    terms = np.minimum(place_terms(field_size), positions.shape[-1])
+    cumulative = np.cumsum(positions, axis=-1)
+    place = np.take_along_axis(cumulative, np.broadcast_to(
+        (np.asarray(terms) - 1)[..., None, None], cumulative.shape[:-1] + (1,)), axis=-1)[..., 0]
+
+    return {"win": win, "place": place, "positions": positions, "tensors": tensors}
@@ -13,7 +13,8 @@ import os
 # إضافة مسار المشروع
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from race_bot import HorseAIPredictor, RACETRACKS
+# قوائم المضامير فقط - محرك التحليل (NumPy وما يتبعه) يُستورد عند أول تحليل
+from tracks import RACETRACKS
 
 # إعدادات الصفحة
 st.set_page_config(
@@ -60,6 +61,30 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def load_engine():
+    """محرك التحليل والموارد المشتركة بين كل الجلسات (تُستورد وتُحمّل مرة واحدة فقط)
+
+    الأوزان وفهرس القوة وإحصائيات المتسابقين تُقرأ فقط أثناء التقييم، ومخزن الترشيحات
+    يُفتح مرة واحدة (كتابته تحت قفل فهي آمنة بين الجلسات وسطر الأوامر)
+    """
+    import race_bot
+    race_bot.HorseAIPredictor.load_model()
+    race_bot.PowerRatingEngine.get_strength_index()
+    race_bot.PowerRatingEngine.get_runner_stats()
+    store = race_bot.PredictionStore(race_bot.CONFIG["store_dir"], race_bot.CONFIG["store_codec"])
+    return race_bot, store
+
+
+def get_predictor(refresh: bool = False):
+    """محلل جديد لكل تشغيل: DataEngine ومخزن النصوص والاجتماعات المحسوبة خاصة بالجلسة
+
+    (StringPool والاجتماعات في الذاكرة ليست آمنة للمشاركة بين خيوط جلسات Streamlit)
+    """
+    race_bot, store = load_engine()
+    return race_bot.HorseAIPredictor(refresh=refresh, store=store, load_model=False)
+
+
 def main():
     # العنوان الرئيسي
     st.markdown("""
@@ -107,14 +132,17 @@ def main():
         ["ترشيحات الفوز", "تحليل المراهنات", "تحليل شامل"]
     )
     
+    # تجاهل الذاكرة المحلية وإعادة جلب البطاقة
+    refresh = st.sidebar.checkbox("🔄 تحديث بيانات البطاقة", value=False)
+    
     # زر التحليل
     analyze_btn = st.sidebar.button("🔍 تحليل السباق", type="primary", use_container_width=True)
     
     # المحتوى الرئيسي
     if analyze_btn:
         with st.spinner("جاري تحليل السباق..."):
-            # إنشاء المحلل
-            predictor = HorseAIPredictor()
+            # محلل هذه الجلسة
+            predictor = get_predictor(refresh)
             
             # الحصول على الترشيحات
             date_str = date.strftime("%Y-%m-%d")
@@ -185,9 +213,17 @@ def display_predictions(predictions: dict, analysis_type: str):
                     {medal} <strong>{horse['name']}</strong> |
                     القوة: {horse['power_score']} |
                     الفوز: {horse['win_probability']}% |
+                    المراكز: {horse.get('place_probability', 0)}% |
                     الفارس: {horse.get('jockey', 'N/A')}
                 </div>
                 """, unsafe_allow_html=True)
+            
+            # أفضل ترتيبات Exacta / Trifecta
+            exotics = race.get("exotics", {})
+            for bet, label in (("exacta", "Exacta"), ("trifecta", "Trifecta")):
+                if exotics.get(bet):
+                    best = exotics[bet][0]
+                    st.caption(f"🎯 {label}: {' ← '.join(best['horses'])} ({best['probability']}%)")
     
     # توصيات المراهنات (إذا تم اختيارها)
     if analysis_type in ["تحليل المراهنات", "تحليل شامل"]:
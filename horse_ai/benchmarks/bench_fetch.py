@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fetch Benchmark - قياس زمن جلب البطاقات
+يشغّل خادم HTML محلي (بطاقة سباق ثابتة) ويقارن:
+  - طلب HTTP عادي + التحليل (HttpFetcher)
+  - تشغيل متصفح جديد لكل جلب (الطريقة القديمة)
+  - مجمع المتصفحات الدائمة BrowserPool
+
+python benchmarks/bench_fetch.py --fetches 10 --concurrency 2
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import race_bot
+from browser_pool import BrowserPool
+from http_fetch import parse_racecard_html
+from race_bot import CONFIG, DataEngine
+
+# بطاقة سباق ثابتة للاختبار
+FIXTURE_HTML = """<!DOCTYPE html>
+<html><head><title>Racecard Fixture</title></head>
+<body>
+<table class="racecard">
+  <tr><th>No</th><th>Horse</th><th>Draw</th><th>Jockey</th><th>Trainer</th><th>Rating</th><th>Form</th></tr>
+  <tr><td>1</td><td>Thunder Strike</td><td>3</td><td>W. Buick</td><td>C. Appleby</td><td>98</td><td>1-231</td></tr>
+  <tr><td>2</td><td>Golden Arrow</td><td>7</td><td>R. Moore</td><td>Doug Watson</td><td>92</td><td>4121</td></tr>
+  <tr><td>3</td><td>Desert Storm</td><td>1</td><td>T. O'Shea</td><td>S. bin Suroor</td><td>88</td><td>0/312</td></tr>
+</table>
+</body></html>
+"""
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """يعيد نفس البطاقة لأي مسار"""
+
+    def do_GET(self):
+        body = FIXTURE_HTML.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fixture_server():
+    """تشغيل الخادم المحلي على منفذ عشوائي"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def fetch_http(url: str) -> int:
+    """طلب HTTP عادي عبر الجلسة المشتركة ثم التحليل"""
+    data = parse_racecard_html(DataEngine.get_http_fetcher().fetch_page(url), "meydan", "2026-02-18")
+    return data["card"].num_runners + 1 if data["success"] else 0
+
+
+def fetch_launch_per_call(url: str) -> int:
+    """الطريقة القديمة: متصفح جديد لكل جلب"""
+    driver = DataEngine._create_driver(headless=True)
+    try:
+        driver.get(url)
+        DataEngine._wait_until_ready(driver)
+        return len(driver.find_elements(race_bot.By.CSS_SELECTOR, "table.racecard tr"))
+    finally:
+        driver.quit()
+
+
+def fetch_pooled(pool: BrowserPool, url: str) -> int:
+    """مجمع المتصفحات"""
+    with pool.session() as driver:
+        driver.get(url)
+        DataEngine._wait_until_ready(driver)
+        return len(driver.find_elements(race_bot.By.CSS_SELECTOR, "table.racecard tr"))
+
+
+def run(fn, urls, concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        rows = list(executor.map(fn, urls))
+    assert all(r == 4 for r in rows), rows
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس زمن جلب البطاقات")
+    parser.add_argument("--fetches", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=2)
+    args = parser.parse_args()
+
+    CONFIG["racecard_selector"] = "table.racecard"
+    server, base_url = start_fixture_server()
+    urls = [f"{base_url}/racecard/meydan/2026-02-18?i={i}" for i in range(args.fetches)]
+
+    print(f"🌐 {args.fetches} جلب | التوازي: {args.concurrency}")
+    try:
+        if DataEngine.get_http_fetcher().available:
+            http = run(fetch_http, urls, args.concurrency)
+            print(f"   HTTP + تحليل: {http / args.fetches * 1000:.1f} ms/جلب")
+        else:
+            print("   ⚠️ requests/bs4 غير مثبت - تم تخطي قياس HTTP")
+
+        if race_bot.SELENIUM_AVAILABLE:
+            launch = run(fetch_launch_per_call, urls, args.concurrency)
+            pool = BrowserPool(lambda: DataEngine._create_driver(headless=True), size=args.concurrency)
+            pool.warm()
+            pooled = run(lambda url: fetch_pooled(pool, url), urls, args.concurrency)
+            pool.close()
+            print(f"   متصفح لكل جلب: {launch / args.fetches * 1000:.0f} ms/جلب")
+            print(f"   مجمع المتصفحات: {pooled / args.fetches * 1000:.0f} ms/جلب")
+            print(f"   إحصائيات المجمع: {pool.stats}")
+        else:
+            print("   ⚠️ Selenium غير مثبت - تم تخطي قياس المتصفح")
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
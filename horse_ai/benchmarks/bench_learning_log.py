@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Learning Log Benchmark - كلفة تسجيل توقع/نتيجة مع نمو سجل التعلم
+إعادة كتابة ملف JSON كامل لكل حدث (الطريقة السابقة) مقابل سجل الأحداث بإضافة فقط
++ استعلام نطاق تواريخ، زمن التحميل (لقطة + ما بعدها) واستعادة سطر مبتور في النهاية
+
+python benchmarks/bench_learning_log.py --meetings 2000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "bots"))
+
+from learning_engine import LearningEngine
+
+
+def meeting(i: int, races: int = 8) -> tuple:
+    """توقع ونتيجة اجتماع محاكى"""
+    track, date = f"track_{i % 12}", f"2026-{1 + i // 300 % 12:02d}-{1 + i % 28:02d}"
+    names = [f"Horse {j}" for j in range(10)]
+    prediction = {
+        "track": track, "date": date, "nap_of_the_day": {"horse_name": names[0]},
+        "races": [{"race_number": r, "predictions": [{"name": random.choice(names), "power_score": 80}]}
+                  for r in range(1, races + 1)]
+    }
+    results = [dict(zip(("race_number", "winner", "second", "third"), [r] + random.sample(names, 3)))
+               for r in range(1, races + 1)]
+    return prediction, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس سجل التعلم")
+    parser.add_argument("--meetings", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    events = [meeting(i) for i in range(args.meetings)]
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        stats_path = os.path.join(tmp, "runner_stats.json")
+        engine = LearningEngine(os.path.join(tmp, "learning_history.json"), stats_path=stats_path)
+        timings = []
+        for prediction, results in events:
+            start = time.perf_counter()
+            engine.record_prediction(prediction)
+            engine.record_result(prediction["track"], prediction["date"], results)
+            timings.append(time.perf_counter() - start)
+        engine.close()
+
+        # الطريقة السابقة: إعادة كتابة الحالة كاملة مرتين لكل اجتماع (بنفس حجم السجل في النهاية)
+        legacy = os.path.join(tmp, "legacy.json")
+        start = time.perf_counter()
+        for _ in range(2):
+            with open(legacy, "w", encoding="utf-8") as f:
+                json.dump(engine.history, f, ensure_ascii=False, indent=2)
+        legacy_ms = (time.perf_counter() - start) / 2 * 1e3
+
+        start = time.perf_counter()
+        for track in range(12):
+            engine.predictions_between(f"track_{track}", "2026-02-01", "2026-02-28")
+            engine.results_between(f"track_{track}", "2026-02-01", "2026-02-28")
+        range_ms = (time.perf_counter() - start) / 12 * 1e3
+
+        start = time.perf_counter()
+        loaded = LearningEngine(os.path.join(tmp, "learning_history.json"), stats_path=stats_path)
+        load_ms = (time.perf_counter() - start) * 1e3
+        same = loaded.history == json.loads(json.dumps(engine.history))
+        loaded.close()
+
+        # انقطاع أثناء كتابة الحدث الأخير
+        log_path = loaded.log._log_path(loaded.log.generation)
+        with open(log_path, "ab") as f:
+            f.write(b'{"seq": 999999, "type": "result", "da')
+        recovered = LearningEngine(os.path.join(tmp, "learning_history.json"), stats_path=stats_path)
+        torn_ok = recovered.history == loaded.history
+        recovered.close()
+        history_kb = os.path.getsize(legacy) / 1024
+
+    timings.sort()
+    print(f"📒 {args.meetings} اجتماع (سجل نهائي {history_kb:.0f} KB بصيغة JSON)")
+    print(f"   تسجيل اجتماع (توقع + نتيجة): وسيط {timings[len(timings) // 2] * 1e3:.3f}ms، "
+          f"أقصى {timings[-1] * 1e3:.1f}ms (لقطة)")
+    print(f"   إعادة كتابة JSON كامل (الطريقة السابقة، لكل حدث): {legacy_ms:.1f}ms")
+    print(f"   استعلام شهر لمضمار (توقعات + نتائج): {range_ms:.3f}ms")
+    print(f"   التحميل: {load_ms:.1f}ms - مطابقة الحالة: {'✅' if same else '❌'}")
+    print(f"   سطر مبتور في النهاية: {'✅ تمت الاستعادة' if torn_ok else '❌'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Odds Stream Benchmark - تدفق الأسعار التدريجي مقابل إعادة الترشيحات مع كل سعر
+يسجل أسعار محاكاة في ملف، يعيد تشغيله عبر PriceBook، ويتحقق أن الرهانات النهائية
+تطابق حل البطاقة كاملة (BettingEngine.stake_card)
+
+python benchmarks/bench_odds_stream.py --ticks 5000 --full-ticks 30
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from race_bot import (CONFIG, BettingEngine, DataEngine, PowerRatingEngine, PredictionEngine,
+                          ProbabilityEngine)
+from odds_stream import PriceBook, ReplaySource, simulated_ticks, write_replay
+from racecard import RaceCard, StringPool
+
+
+def build_card(seed: int) -> RaceCard:
+    """اجتماع محاكاة واحد محسوب ثابت البذرة (الأسعار مفهرسة برقم الشوط داخل الاجتماع)"""
+    random.seed(seed)
+    engine = DataEngine(pool=StringPool(), use_cache=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        card = engine._generate_simulated_data("bench", "2026-02-18")["card"]
+    PowerRatingEngine.score_card(card, rng=np.random.default_rng(seed))
+    ProbabilityEngine.calculate_card_probabilities(card)
+    return card
+
+
+def full_repredict(card: RaceCard, odds: dict, seed: int):
+    """ما يحدث بدون التدفق: كل المراحل من نقاط القوة حتى الرهانات"""
+    PowerRatingEngine.score_card(card, rng=np.random.default_rng(seed))
+    ProbabilityEngine.calculate_card_probabilities(card)
+    PredictionEngine.build_predictions(card, card.track, card.date)
+    return BettingEngine.generate_bet_recommendations(card, odds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس تدفق الأسعار التدريجي")
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--full-ticks", type=int, default=30, help="عدد التحديثات لقياس إعادة الترشيحات")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    card = build_card(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "odds.jsonl")
+        count = write_replay(path, simulated_ticks(card, args.ticks, seed=args.seed))
+        ticks = list(ReplaySource(path))
+
+    settings = CONFIG["staking"]
+    book = PriceBook(card, bankroll=settings["bankroll"], limits=settings,
+                     stake_tolerance=CONFIG["odds_stream"]["stake_tolerance"])
+    start = time.perf_counter()
+    diffs = sum(1 for _ in book.stream(ticks))
+    incremental = (time.perf_counter() - start) / count
+
+    # إعادة الترشيحات كاملة مع كل تحديث (عينة من أول التحديثات)
+    odds = {}
+    sample = ticks[:args.full_ticks]
+    start = time.perf_counter()
+    for tick in sample:
+        odds.setdefault(tick["race_number"], {})[tick["horse_number"]] = tick["odds"]
+        full_repredict(card, odds, args.seed)
+    full = (time.perf_counter() - start) / max(len(sample), 1)
+
+    final = BettingEngine.stake_card(card, book.odds, with_risk=False)
+    expected = {(bet["race_number"], bet["number"]): bet["stake"] for bet in final["bets"]}
+    actual = {(row["race_number"], row["horse_number"]): row["stake"]
+              for race in book.snapshot()["races"].values() for row in race if row["stake"]}
+
+    print(f"📈 {count:,} تحديث × {card.num_races} أشواط ({card.num_runners} متسابق)")
+    print(f"   تدريجي: {incremental * 1e6:.0f}µs لكل تحديث ({diffs:,} فرق، "
+          f"{book.stats['races_recomputed']:,} شوط أُعيد حسابه)")
+    print(f"   إعادة الترشيحات: {full * 1e6:.0f}µs لكل تحديث ({full / incremental:.0f}x)")
+    print(f"   مطابقة الرهانات النهائية: {'✅' if expected == actual else '❌'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pipeline Benchmark - قياس كل مراحل التحليل على بطاقات من شوط واحد إلى 10,000 شوط
+المراحل: المحاكاة (الجلب) ← نقاط القوة ← الاحتمالات ← الترشيحات ← المراهنات ← الحفظ
+النتيجة JSON (p50/p95 لكل مرحلة + أعلى استهلاك للذاكرة)، مع مقارنة بنتيجة مرجعية
+
+python benchmarks/bench_pipeline.py --sizes 1,10,100,1000,10000 --repeat 5 --output bench.json
+python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+# رسائل الاستيراد (التبعيات الاختيارية) تذهب إلى stderr حتى يبقى stdout JSON فقط
+with contextlib.redirect_stdout(sys.stderr):
+    from race_bot import (CONFIG, BettingEngine, DataEngine, HorseAIPredictor, PowerRatingEngine,
+                          PredictionEngine, ProbabilityEngine)
+from racecard import RaceCard, StringPool
+
+STAGES = ("simulate", "power_rating", "probability", "prediction", "betting", "save")
+
+
+# ===============================
+# حمل العمل
+# ===============================
+def simulate_card(num_races: int, seed: int) -> RaceCard:
+    """بطاقة محاكاة ثابتة البذرة بعدد أشواط محدد (اجتماعات متتالية من _generate_simulated_data)"""
+    random.seed(seed)
+    engine = DataEngine(pool=StringPool(), use_cache=False)
+    races = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(races) < num_races:
+            data = engine._generate_simulated_data(f"track_{len(races)}", "2026-02-18")
+            races.extend(data["card"].to_races())
+    return RaceCard.from_races(races[:num_races], "bench", "2026-02-18", engine.pool)
+
+
+def run_pipeline(num_races: int, seed: int, predictor: HorseAIPredictor, timings: dict = None) -> dict:
+    """تشغيل كل المراحل مرة واحدة مع قياس زمن كل مرحلة"""
+    timings = {} if timings is None else timings
+    clock = time.perf_counter
+
+    start = clock()
+    card = simulate_card(num_races, seed)
+    timings["simulate"] = clock() - start
+
+    start = clock()
+    PowerRatingEngine.score_card(card, rng=np.random.default_rng(seed))
+    timings["power_rating"] = clock() - start
+
+    start = clock()
+    ProbabilityEngine.calculate_card_probabilities(card)
+    timings["probability"] = clock() - start
+
+    start = clock()
+    predictions = PredictionEngine.build_predictions(card, card.track, card.date)
+    timings["prediction"] = clock() - start
+
+    start = clock()
+    predictions["betting_recommendations"] = BettingEngine.generate_bet_recommendations(card)
+    timings["betting"] = clock() - start
+
+    start = clock()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor._save_predictions(predictions)
+    timings["save"] = clock() - start
+
+    return {"runners": card.num_runners, "timings": timings}
+
+
+def peak_memory(num_races: int, seed: int, predictor: HorseAIPredictor) -> dict:
+    """أعلى ذاكرة مخصصة (KB) لكل مرحلة عبر tracemalloc (تشغيل منفصل عن قياس الزمن)"""
+    peaks = {}
+
+    class StageTracker(dict):
+        """يعيد ضبط القمة بعد كل مرحلة"""
+        def __setitem__(self, stage, value):
+            peaks[stage] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            tracemalloc.reset_peak()
+            super().__setitem__(stage, value)
+
+    tracemalloc.start()
+    try:
+        run_pipeline(num_races, seed, predictor, StageTracker())
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def bench_size(num_races: int, repeat: int, seed: int, predictor: HorseAIPredictor) -> dict:
+    """قياس حجم بطاقة واحد: p50/p95 لكل مرحلة + الذاكرة"""
+    samples = {stage: [] for stage in STAGES}
+    runners = 0
+    for i in range(repeat):
+        result = run_pipeline(num_races, seed + i, predictor)
+        runners = result["runners"]
+        for stage, seconds in result["timings"].items():
+            samples[stage].append(seconds * 1000)
+
+    peaks = peak_memory(num_races, seed, predictor)
+    stages = {
+        stage: {
+            "p50_ms": round(percentile(values, 0.5), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "mean_ms": round(sum(values) / len(values), 3),
+            "peak_kb": peaks.get(stage, 0.0)
+        }
+        for stage, values in samples.items()
+    }
+    total = [sum(samples[stage][i] for stage in STAGES) for i in range(repeat)]
+    scoring = sum(stages[stage]["p50_ms"] for stage in STAGES if stage not in ("simulate", "save"))
+    return {
+        "races": num_races,
+        "runners": runners,
+        "stages": stages,
+        "total_p50_ms": round(percentile(total, 0.5), 3),
+        "total_p95_ms": round(percentile(total, 0.95), 3),
+        "scoring_races_per_s": round(num_races / scoring * 1000, 1) if scoring else None
+    }
+
+
+def peak_rss_kb():
+    """أعلى استهلاك للذاكرة الفعلية للعملية (KB)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+# ===============================
+# المقارنة بالنتيجة المرجعية
+# ===============================
+def compare(report: dict, baseline: dict, tolerance: float, min_ms: float) -> list:
+    """مقارنة p50 لكل مرحلة: تراجع إذا زاد الزمن أكثر من tolerance وأكثر من min_ms"""
+    regressions = []
+    for size, current in report["results"].items():
+        previous = baseline.get("results", {}).get(size)
+        if previous is None:
+            continue
+        for stage, stats in current["stages"].items():
+            before = previous["stages"].get(stage, {}).get("p50_ms")
+            if not before:
+                continue
+            now = stats["p50_ms"]
+            ratio = now / before
+            status = "❌" if ratio > 1 + tolerance and now - before > min_ms else "✅"
+            print(f"   {status} {size:>6} شوط  {stage:<13} {before:>10.2f} → {now:>10.2f} ms  (x{ratio:.2f})")
+            if status == "❌":
+                regressions.append({"races": int(size), "stage": stage, "baseline_ms": before,
+                                    "current_ms": now, "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس مراحل التحليل الكاملة")
+    parser.add_argument("--sizes", type=str, default="1,10,100,1000,10000", help="أحجام البطاقات بعدد الأشواط")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=str, help="حفظ النتيجة JSON في ملف")
+    parser.add_argument("--baseline", type=str, help="مقارنة بنتيجة مرجعية محفوظة")
+    parser.add_argument("--save-baseline", type=str, help="حفظ النتيجة كمرجع")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="نسبة الزيادة المسموحة في p50")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="تجاهل الفروق الأصغر من هذا (ضوضاء)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    predictor = HorseAIPredictor(use_cache=False)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "results": {}
+    }
+
+    output_dir, store_dir = CONFIG["output_dir"], CONFIG["store_dir"]
+    with tempfile.TemporaryDirectory() as tmp:
+        CONFIG["output_dir"] = tmp
+        CONFIG["store_dir"] = os.path.join(tmp, "predictions")
+        try:
+            for size in sizes:
+                result = bench_size(size, args.repeat, args.seed, predictor)
+                report["results"][str(size)] = result
+                stages = "  ".join(f"{s}={result['stages'][s]['p50_ms']:.1f}" for s in STAGES)
+                print(f"📊 {size:>6} شوط ({result['runners']} حصان): {stages}  "
+                      f"| المجموع p50={result['total_p50_ms']:.1f} ms", file=sys.stderr)
+        finally:
+            CONFIG["output_dir"], CONFIG["store_dir"] = output_dir, store_dir
+
+    report["peak_rss_kb"] = peak_rss_kb()
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"✅ تم حفظ النتيجة: {path}", file=sys.stderr)
+    if not args.output and not args.save_baseline:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n📈 المقارنة مع {args.baseline} (السماح: +{args.tolerance:.0%})", file=sys.stderr)
+        with contextlib.redirect_stdout(sys.stderr):
+            regressions = compare(report, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} تراجع في الأداء", file=sys.stderr)
+            return 1
+        print("✅ لا يوجد تراجع", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
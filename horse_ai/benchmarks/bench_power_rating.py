@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Power Rating Benchmark - قياس سرعة محرك نقاط القوة
+يقارن المسار الفردي (حصان بحصان) مع وضع الدفعات المتجه، والتطابق يُفحص مع إحصائيات
+متسابقين غير فارغة (نتائج محاكاة للبطاقات نفسها) تعدل الفارس والمسافة والأرضية في المسارين
+
+python benchmarks/bench_power_rating.py --cards 200 --seed 7
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from race_bot import CONFIG, DataEngine, Horse, PowerRatingEngine, Race
+from runner_stats import RunnerStats
+
+TRACK = "bench"
+
+
+def build_workload(num_cards: int, seed: int):
+    """توليد بطاقات محاكاة ثابتة البذرة"""
+    random.seed(seed)
+    engine = DataEngine()
+    races = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(num_cards):
+            card = engine._generate_simulated_data(f"track_{i}", "2026-02-18")
+            races.extend(card["card"].to_races())
+    return races
+
+
+def to_objects(races):
+    """بناء كائنات Race/Horse للمسار الفردي"""
+    objects = []
+    for race_dict in races:
+        race = Race(race_dict["race_number"], race_dict["race_name"], race_dict["race_time"],
+                    race_dict["distance"], race_dict["surface"], race_dict.get("going", ""))
+        for h in race_dict["predictions"]:
+            race.add_horse(Horse(number=h["number"], name=h["name"], draw=h["draw"],
+                                 jockey=h["jockey"], trainer=h["trainer"], rating=h["rating"],
+                                 weight=h["weight"], form=h["form"]))
+        objects.append(race)
+    return objects
+
+
+def score_per_horse(races):
+    """المسار الفردي: استدعاء calculate_power_score لكل حصان"""
+    return [PowerRatingEngine.calculate_power_score(horse, race, TRACK)
+            for race in races for horse in race.horses]
+
+
+def draw_random_factors(races):
+    """سحب الأجزاء العشوائية فقط (المسافة والأرضية، قيم خام قبل الإحصائيات) بنفس ترتيب المسار الفردي"""
+    drawn = {"distance": [], "surface": []}
+    for race in races:
+        for horse in race.horses:
+            drawn["distance"].append(PowerRatingEngine._calculate_distance_score(horse, race.distance))
+            drawn["surface"].append(PowerRatingEngine._calculate_surface_score(horse, race.surface))
+    return {k: np.asarray(v, dtype=np.float64) for k, v in drawn.items()}
+
+
+def build_runner_stats(race_dicts, seed: int) -> RunnerStats:
+    """نتائج محاكاة لنصف الأشواط (فائز عشوائي) - فرسان ومدربون وخيول بمشاركات فعلية"""
+    rng = random.Random(seed)
+    stats = RunnerStats()
+    for i, race in enumerate(race_dicts[::2]):
+        runners = [dict(h) for h in race["predictions"]]
+        order = rng.sample(range(len(runners)), len(runners))
+        for position, k in enumerate(order, 1):
+            runners[k]["position"] = position
+        stats.add_result(TRACK, "2026-02-18", i, runners, race["distance"])
+    return stats
+
+
+def verify_equivalence(race_dicts, seed: int) -> tuple:
+    """(تطابق المسارين، عدد الخيول التي غيرت الإحصائيات نقاطها) - الأجزاء العشوائية فقط مثبتة"""
+    objects = to_objects(race_dicts)
+    columns = PowerRatingEngine.build_columns(race_dicts)
+    random.seed(seed)
+    expected = score_per_horse(objects)
+    random.seed(seed)
+    fixed = draw_random_factors(objects)
+    actual = PowerRatingEngine.calculate_power_scores(columns, random_factors=fixed, track=TRACK)
+
+    # نفس الحساب بدون الإحصائيات: التحقق أن المقارنة لم تكن فارغة
+    CONFIG["runner_stats"]["enabled"] = False
+    try:
+        plain = PowerRatingEngine.calculate_power_scores(columns, random_factors=fixed, track=TRACK)
+    finally:
+        CONFIG["runner_stats"]["enabled"] = True
+    return actual.tolist() == expected, int((actual != plain).sum())
+
+
+def best_of(fn, repeat: int) -> float:
+    """أفضل زمن من عدة تكرارات"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس سرعة PowerRatingEngine")
+    parser.add_argument("--cards", type=int, default=200, help="عدد البطاقات (اجتماعات)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    race_dicts = build_workload(args.cards, args.seed)
+    objects = to_objects(race_dicts)
+    runners = sum(len(r.horses) for r in objects)
+    rng = np.random.default_rng(args.seed)
+
+    # إحصائيات في ملف مؤقت (data/runner_stats.json لا يُقرأ ولا يُكتب)
+    tmp = tempfile.TemporaryDirectory()
+    CONFIG["runner_stats"].update(enabled=True, path=os.path.join(tmp.name, "runner_stats.json"))
+    build_runner_stats(race_dicts, args.seed).save(CONFIG["runner_stats"]["path"])
+    PowerRatingEngine._runner_stats = None
+
+    per_horse = best_of(lambda: score_per_horse(objects), args.repeat)
+    batch = best_of(lambda: PowerRatingEngine.calculate_power_scores(
+        PowerRatingEngine.build_columns(race_dicts), rng=rng, track=TRACK), args.repeat)
+    equivalent, adjusted = verify_equivalence(race_dicts, args.seed)
+    ok = equivalent and adjusted > 0
+
+    print(f"🏇 {args.cards} بطاقة | {len(race_dicts)} شوط | {runners} حصان")
+    print(f"   المسار الفردي: {runners / per_horse:,.0f} حصان/ثانية ({per_horse * 1000:.1f} ms)")
+    print(f"   وضع الدفعات:  {runners / batch:,.0f} حصان/ثانية ({batch * 1000:.1f} ms)")
+    print(f"   التسريع: x{per_horse / batch:.1f}")
+    print(f"   تطابق النتائج: {'✅' if ok else '❌'} (الإحصائيات غيرت نقاط {adjusted} حصان)")
+    tmp.cleanup()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runner Stats Benchmark - كلفة التحديث والبحث في إحصائيات المتسابقين ودقة الانكماش
+فرسان ومدربون بمعدلات فوز "حقيقية" معروفة، والخطأ يُقاس للمعدل الخام (انتصارات/مشاركات)
+مقابل المعدل المنكمش نحو متوسط المجتمع، خاصة للمفاتيح بعينات صغيرة
+
+python benchmarks/bench_runner_stats.py --races 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from runner_stats import RunnerStats
+from strength_index import normalize_name
+
+FIELD = 10
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس إحصائيات المتسابقين")
+    parser.add_argument("--races", type=int, default=20000)
+    parser.add_argument("--jockeys", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    # المهارة = وزن في سحب الفائز (المعدل الحقيقي يُقدّر من المحاكاة نفسها)
+    jockeys = [f"Jockey{i} Rider{i}" for i in range(args.jockeys)]
+    trainers = [f"Trainer{i} Yard{i}" for i in range(args.jockeys // 4)]
+    skill = rng.gamma(2.0, 1.0, len(jockeys))
+    # تكرار المشاركات غير متساوٍ: قلة تركب كثيراً والأغلبية قليلاً
+    rides = rng.pareto(1.2, len(jockeys)) + 0.05
+    rides /= rides.sum()
+
+    races = []
+    for r in range(args.races):
+        field = rng.choice(len(jockeys), FIELD, replace=False, p=rides)
+        p = skill[field] / skill[field].sum()
+        winner = int(rng.choice(FIELD, p=p))
+        races.append([{"name": f"Horse {random.randrange(20000)}", "jockey": jockeys[j],
+                       "trainer": trainers[j % len(trainers)], "position": 1 if k == winner else 2 + k}
+                      for k, j in enumerate(field.tolist())])
+
+    stats = RunnerStats()
+    start = time.perf_counter()
+    for r, runners in enumerate(races):
+        stats.add_result("bench", "2026-02-18", r, runners, 1000 + 200 * (r % 10))
+    per_runner = (time.perf_counter() - start) / (args.races * FIELD)
+
+    # المعدل الحقيقي لكل فارس: متوسط احتمال فوزه أمام 9 منافسين عشوائيين (بنفس توزيع المشاركات)
+    others = rng.choice(len(jockeys), (len(jockeys), 2000, FIELD - 1), p=rides)
+    truth = (skill[:, None] / (skill[:, None] + skill[others].sum(axis=2))).mean(axis=1)
+
+    keys = [normalize_name(j) for j in jockeys]
+    rows = stats.rows("jockey", keys)
+    counts = stats.counts["jockey"][np.maximum(rows, 0)]
+    raw = counts[:, 1] / np.maximum(counts[:, 0], 1)
+    fixed, count = stats.shrink("jockey", rows)
+    fixed_kappa = stats.prior_rides["jockey"]
+    fitted = stats.fit_prior_rides()
+    shrunk, _ = stats.shrink("jockey", rows)
+    seen = count > 0
+
+    print(f"📈 {args.races:,} شوط، {args.races * FIELD:,} مشاركة")
+    print(f"   تحديث لكل مشاركة (5 أنواع): {per_runner * 1e6:.1f}µs")
+    print(f"   κ المقدّر: " + "، ".join(f"{kind} {kappa:g}" for kind, kappa in fitted.items()))
+    print(f"   متوسط الخطأ المطلق لمعدل الفوز: الخام ← κ={fixed_kappa:g} ← κ المقدّر")
+    for label, mask in (("كل الفرسان", seen), ("أقل من 20 مشاركة", seen & (count < 20)),
+                        ("20 مشاركة أو أكثر", seen & (count >= 20))):
+        if mask.any():
+            errors = [np.abs(values - truth)[mask].mean() for values in (raw, fixed, shrunk)]
+            print(f"   {label} ({int(mask.sum())}): " + " ← ".join(f"{e:.4f}" for e in errors))
+
+    # بحث بطاقة كاملة (2000 متسابق) مقابل بحث كل متسابق على حدة
+    sample = [races[i][k] for i in range(200) for k in range(FIELD)]
+    columns = {"jockey": np.array([h["jockey"] for h in sample]), "trainer": np.array([h["trainer"] for h in sample]),
+               "name": np.array([h["name"] for h in sample]), "distance": np.full(len(sample), 1400)}
+    start = time.perf_counter()
+    stats.card_lookup(columns, "bench")
+    batch_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    for runner in sample:
+        stats.runner_rates(runner, "bench", 1400)
+    single_ms = (time.perf_counter() - start) * 1e3
+    print(f"   بحث {len(sample)} متسابق × 5 أنواع: دفعة واحدة {batch_ms:.1f}ms، متسابق بمتسابق {single_ms:.1f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "runner_stats.json")
+        start = time.perf_counter()
+        stats.save(path)
+        save_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        loaded = RunnerStats.load(path)
+        loaded.fit_prior_rides()
+        load_ms = (time.perf_counter() - start) * 1e3
+        same = loaded.fingerprint() == stats.fingerprint() and loaded.summary() == stats.summary()
+        size_kb = os.path.getsize(path) / 1024
+    print(f"   حفظ {save_ms:.1f}ms، تحميل {load_ms:.1f}ms ({size_kb:.0f} KB) - مطابقة: {'✅' if same else '❌'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Score Cache Benchmark - تقييم البطاقة بدون ذاكرة / من الذاكرة / من القرص / بعد تغيير شوط واحد
+ويتحقق أن النتائج المقروءة من الذاكرة مطابقة تماماً للتقييم الأول
+
+python benchmarks/bench_score_cache.py --races 2000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from race_bot import CONFIG, DataEngine, PredictionEngine
+from racecard import RaceCard, StringPool
+
+COLUMNS = ("power_score", "win_probability", "place_probability", "value_code", "position_probability")
+
+
+def build_races(num_races: int, seed: int):
+    """أشواط محاكاة ثابتة البذرة (قوائم قواميس لبناء بطاقة جديدة في كل قياس)"""
+    random.seed(seed)
+    engine = DataEngine(pool=StringPool(), use_cache=False)
+    races = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(races) < num_races:
+            races.extend(engine._generate_simulated_data(f"track_{len(races)}", "2026-02-18")["card"].to_races())
+    return races[:num_races], engine.pool
+
+
+def timed(races, pool):
+    card = RaceCard.from_races(races, "bench", "2026-02-18", pool)
+    start = time.perf_counter()
+    PredictionEngine.score_card(card)
+    return card, time.perf_counter() - start
+
+
+def same(a: RaceCard, b: RaceCard) -> bool:
+    if not all(np.array_equal(getattr(a, name), getattr(b, name)) for name in COLUMNS):
+        return False
+    return all(np.array_equal(x[0], y[0]) and np.array_equal(x[1], y[1])
+               for bet in a.exotics for x, y in zip(a.exotics[bet], b.exotics[bet]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس ذاكرة التقييم")
+    parser.add_argument("--races", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    races, pool = build_races(args.races, args.seed)
+    settings = CONFIG["score_cache"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.update(enabled=True, disk_dir=tmp)
+        first, cold = timed(races, pool)
+        memory_card, memory = timed(races, pool)
+
+        # ذاكرة جديدة فارغة بنفس المجلد (مثل عملية أخرى)
+        settings["max_races"] += 1
+        disk_card, disk = timed(races, pool)
+
+        races[len(races) // 2] = dict(races[len(races) // 2], going="Heavy")
+        _, partial = timed(races, pool)
+        stats = PredictionEngine.get_score_cache().summary()
+
+    print(f"🗂️ {args.races} شوط")
+    print(f"   بدون ذاكرة: {cold * 1e3:.1f}ms (مع الكتابة على القرص)")
+    print(f"   من الذاكرة: {memory * 1e3:.1f}ms ({cold / memory:.1f}x)")
+    print(f"   من القرص: {disk * 1e3:.1f}ms")
+    print(f"   شوط واحد تغير: {partial * 1e3:.1f}ms")
+    print(f"   ملفات القرص: {stats['disk_files']} ({stats['disk_bytes'] / 1024:.0f} KB)")
+    print(f"   مطابقة النتائج: {'✅' if same(first, memory_card) and same(first, disk_card) else '❌'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
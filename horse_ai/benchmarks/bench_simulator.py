@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Simulator Benchmark - قياس سرعة محاكاة مونت كارلو
+الهدف: 100,000 محاكاة لبطاقة كاملة في أقل من ثانية على نواة واحدة
+
+python benchmarks/bench_simulator.py --sims 100000 --races 8 --runners 14
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from harville import race_probabilities
+from racecard import RaceCardBuilder
+from race_simulator import simulate_card
+
+
+def build_card(races: int, runners: int, seed: int):
+    """بطاقة بنقاط قوة عشوائية ثابتة البذرة"""
+    rng = np.random.default_rng(seed)
+    builder = RaceCardBuilder("bench", "2026-02-18")
+    for r in range(1, races + 1):
+        builder.add_race(r, f"Race {r}", f"{13 + r}:00", 1200, "Dirt")
+        for h in range(1, runners + 1):
+            builder.add_runner(h, f"Horse {r}-{h}")
+    card = builder.build()
+    card.power_score = rng.normal(70, 8, card.num_runners).round().astype(np.int32)
+    return card
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس سرعة محاكاة مونت كارلو")
+    parser.add_argument("--sims", type=int, default=100_000)
+    parser.add_argument("--races", type=int, default=8)
+    parser.add_argument("--runners", type=int, default=14)
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    card = build_card(args.races, args.runners, args.seed)
+    simulate_card(card, 1000, seed=args.seed)  # إحماء
+
+    start = time.perf_counter()
+    results = simulate_card(card, args.sims, seed=args.seed, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    # التحقق: نسب الفوز بالمحاكاة مقابل Softmax التحليلي (Gumbel يطابق Softmax)
+    error = max(
+        np.abs(result["positions"][:, 0] - race_probabilities(card.power_score[card.race_slice(r)])["win"]).max()
+        for r, result in enumerate(results)
+    )
+
+    print(f"🎲 {args.sims:,} محاكاة × {args.races} أشواط × {args.runners} متسابق")
+    print(f"   الزمن: {elapsed:.3f}s ({'✅' if elapsed < 1 else '❌'} الهدف < 1s)")
+    print(f"   أكبر فرق في نسبة الفوز عن Softmax: {error * 100:.2f} نقطة مئوية")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup Benchmark - زمن الإقلاع البارد لنقاط الدخول (python -X importtime)
+يفشل (رمز خروج 1) إذا تجاوز الاستيراد الميزانية أو حُمّلت تبعية ثقيلة لا يحتاجها الإقلاع
+
+- cli: import race_bot (سطر الأوامر)
+- web: المسار البارد لأول تحليل في الواجهة - وحدات المشروع في المستوى الأعلى من app.py
+  ثم ما تستورده load_engine (race_bot و NumPy...) (Streamlit نفسه خارج القياس)
+
+python benchmarks/bench_startup.py --repeat 5 --cli-budget 250 --web-budget 250
+"""
+
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# تبعيات اختيارية ثقيلة يجب ألا تُستورد عند الإقلاع
+HEAVY_MODULES = ("selenium", "pandas", "reportlab", "bs4", "requests", "multiprocessing")
+
+
+def web_imports() -> list:
+    """وحدات المشروع التي تستوردها الواجهة حتى أول تحليل: المستوى الأعلى من app.py ثم load_engine"""
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    engine = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == "load_engine"]
+    names = []
+    for node in tree.body + [inner for function in engine for inner in ast.walk(function)]:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names.append(node.module)
+    return [name for name in dict.fromkeys(names) if os.path.exists(os.path.join(ROOT, f"{name.split('.')[0]}.py"))]
+
+
+def import_time(modules: list, env: dict) -> tuple:
+    """(الزمن التراكمي بالمللي ثانية، كل الوحدات المستوردة) لعملية Python جديدة"""
+    code = "; ".join(f"import {name}" for name in modules) or "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    total, loaded = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # سطر العناوين
+        loaded.add(name.strip())
+        if name.strip() in modules:
+            total += int(cumulative)
+    return total / 1000, loaded
+
+
+def measure(name: str, modules: list, budget: float, repeat: int, env: dict) -> bool:
+    import_time(modules, env)  # تسخين: ملفات .pyc في المجلد المؤقت
+    samples, loaded = [], set()
+    for _ in range(repeat):
+        elapsed, loaded = import_time(modules, env)
+        samples.append(elapsed)
+    median = statistics.median(samples)
+    heavy = sorted({module.split(".")[0] for module in loaded} & set(HEAVY_MODULES))
+
+    ok = median <= budget and not heavy
+    print(f"{'✅' if ok else '❌'} {name}: {', '.join(modules) or '-'} → {median:.1f}ms "
+          f"(الميزانية {budget:.0f}ms، أقل {min(samples):.1f}ms)")
+    if heavy:
+        print(f"   ⚠️ تبعيات ثقيلة عند الإقلاع: {', '.join(heavy)}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ميزانية زمن الإقلاع")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cli-budget", type=float, default=250.0, help="الحد الأقصى لاستيراد race_bot (ms)")
+    parser.add_argument("--web-budget", type=float, default=250.0,
+                        help="الحد الأقصى لوحدات app.py حتى أول تحليل، بما فيها race_bot (ms)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache:
+        # ملفات .pyc في مجلد مؤقت: القياس بدون زمن الترجمة ودون كتابة في المشروع
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=cache)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        results = [
+            measure("cli", ["race_bot"], args.cli_budget, args.repeat, env),
+            measure("web", web_imports(), args.web_budget, args.repeat, env),
+        ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
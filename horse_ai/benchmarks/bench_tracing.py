@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracing Benchmark - كلفة التتبع على مسار التحليل (معطل / مفعل في الذاكرة / مفعل مع ملف)
+التتبع المعطل يجب أن يكون ضمن ضوضاء القياس
+
+python benchmarks/bench_tracing.py --races 200 --repeat 20
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from race_bot import DataEngine, score_meeting
+from racecard import RaceCard, StringPool
+from tracing import TRACER, span
+
+
+def build_race_data(num_races: int, seed: int) -> dict:
+    """بطاقة محاكاة ثابتة البذرة بعدد أشواط محدد"""
+    random.seed(seed)
+    engine = DataEngine(pool=StringPool(), use_cache=False)
+    races = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(races) < num_races:
+            races.extend(engine._generate_simulated_data(f"track_{len(races)}", "2026-02-18")["card"].to_races())
+    card = RaceCard.from_races(races[:num_races], "bench", "2026-02-18", engine.pool)
+    return {"success": True, "track": "bench", "date": "2026-02-18", "card": card}
+
+
+def median_ms(race_data: dict, repeat: int) -> float:
+    """الوسيط لزمن score_meeting"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score_meeting(race_data)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس كلفة التتبع")
+    parser.add_argument("--races", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    race_data = build_race_data(args.races, args.seed)
+    score_meeting(race_data)  # تسخين
+
+    # كلفة span واحد معطل
+    calls = 200_000
+    start = time.perf_counter()
+    for _ in range(calls):
+        with span("noop", race_number=1) as stage:
+            stage.add("runners_scored")
+    noop_ns = (time.perf_counter() - start) / calls * 1e9
+
+    disabled = median_ms(race_data, args.repeat)
+
+    TRACER.configure(True)
+    memory = median_ms(race_data, args.repeat)
+    spans = len(TRACER.finished) // args.repeat
+
+    with tempfile.TemporaryDirectory() as tmp:
+        TRACER.configure(True, os.path.join(tmp, "trace.jsonl"), "otlp")
+        exported = median_ms(race_data, args.repeat)
+        TRACER.configure(False)
+
+    print(f"⏱️ score_meeting على {args.races} شوط ({spans} مرحلة لكل تشغيل)")
+    print(f"   span معطل: {noop_ns:.0f}ns")
+    print(f"   معطل: {disabled:.2f}ms")
+    print(f"   مفعل (ذاكرة): {memory:.2f}ms ({(memory / disabled - 1) * 100:+.1f}%)")
+    print(f"   مفعل (ملف otlp): {exported:.2f}ms ({(exported / disabled - 1) * 100:+.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
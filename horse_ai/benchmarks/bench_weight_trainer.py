@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Weight Trainer Benchmark - زمن تدريب الأوزان ودقة استعادتها
+عوامل حقيقية من بطاقات محاكاة، والفائز يُسحب من softmax بأوزان "حقيقية" معروفة،
+ثم يُتحقق أن التدريب يستعيدها (الأوزان ودرجة الحرارة)
++ التعلم المستمر (OnlineLearner): زمن التحديث لكل شوط و log-likelihood على أشواط لم يرها
+
+python benchmarks/bench_weight_trainer.py --races 30000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from race_bot import CONFIG, DataEngine, PowerRatingEngine
+from racecard import RaceCard, StringPool
+from weight_trainer import OnlineLearner, TrainingSet, log_likelihood, train_weights
+
+TRUE_WEIGHTS = {"rating": 0.35, "form": 0.25, "jockey": 0.10, "trainer": 0.10,
+                "distance": 0.05, "surface": 0.05, "draw": 0.10}
+TRUE_TEMPERATURE = 5.0
+
+
+def factor_races(num_races: int, seed: int) -> list:
+    """صفوف العوامل لكل شوط (بطاقات محاكاة، تُكرر عشوائياً حتى العدد المطلوب)"""
+    random.seed(seed)
+    engine = DataEngine(pool=StringPool(), use_cache=False)
+    races = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(races) < min(num_races, 2000):
+            races.extend(engine._generate_simulated_data(f"track_{len(races)}", "2026-02-18")["card"].to_races())
+    card = RaceCard.from_races(races, "bench", "2026-02-18", engine.pool)
+    PowerRatingEngine.score_card(card, np.random.default_rng(seed))
+    matrix = np.stack([card.factors[name] for name in TRUE_WEIGHTS], axis=1)
+    unique = [matrix[card.race_slice(r)] for r in range(card.num_races)]
+    rng = np.random.default_rng(seed)
+    return [unique[i] for i in rng.integers(0, len(unique), num_races)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="قياس تدريب الأوزان")
+    parser.add_argument("--races", type=int, default=30000)
+    parser.add_argument("--l2", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    beta = np.array(list(TRUE_WEIGHTS.values())) / TRUE_TEMPERATURE
+    races = []
+    for factors in factor_races(args.races, args.seed):
+        z = factors @ beta
+        p = np.exp(z - z.max())
+        races.append((factors, int(rng.choice(len(p), p=p / p.sum()))))
+    data = TrainingSet.from_races(list(TRUE_WEIGHTS), races)
+
+    trained = train_weights(data, PowerRatingEngine.WEIGHTS, CONFIG["softmax_temperature"], args.l2)
+    error = max(abs(trained["weights"][name] - w) for name, w in TRUE_WEIGHTS.items())
+
+    print(f"🧠 {trained['races']:,} شوط، {trained['runners']:,} متسابق")
+    print(f"   زمن التدريب: {trained['seconds']:.2f}s ({trained['iterations']} تكرار نيوتن، "
+          f"{'تقارب ✅' if trained['converged'] else 'لم يتقارب ❌'})")
+    print(f"   log-likelihood لكل شوط: الأوزان الحالية {trained['baseline_log_likelihood']} → "
+          f"المدربة {trained['log_likelihood']} (عشوائي {trained['uniform_log_likelihood']})")
+    print(f"   درجة الحرارة: {trained['softmax_temperature']:.2f} (الحقيقية {TRUE_TEMPERATURE})")
+    for name, weight in trained["weights"].items():
+        print(f"   {name:9s} {weight:.3f} (الحقيقي {TRUE_WEIGHTS[name]:.2f})")
+    print(f"   أكبر خطأ في الأوزان: {error:.3f}")
+
+    # التعلم المستمر: نفس الأشواط كتيار (آخر 20% للاختبار فقط)
+    split = int(len(races) * 0.8)
+    test = TrainingSet.from_races(list(TRUE_WEIGHTS), races[split:])
+    with tempfile.TemporaryDirectory() as tmp:
+        learner = OnlineLearner(tmp, PowerRatingEngine.WEIGHTS, CONFIG["softmax_temperature"])
+        start = time.perf_counter()
+        for factors, winner in races[:split]:
+            learner.update(factors, winner)
+        per_update = (time.perf_counter() - start) / split
+        start = time.perf_counter()
+        learner.checkpoint()
+        checkpoint_ms = (time.perf_counter() - start) * 1e3
+    print(f"🔁 تعلم مستمر: {split:,} تحديث، {per_update * 1e6:.1f}µs لكل شوط، حفظ {checkpoint_ms:.2f}ms")
+    print(f"   log-likelihood (أشواط لم يرها): البداية {log_likelihood(test, learner.anchor):.4f} → "
+          f"{log_likelihood(test, learner.beta):.4f} (الحقيقي {log_likelihood(test, beta):.4f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
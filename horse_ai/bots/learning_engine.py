@@ -3,23 +3,250 @@
 """
 Learning Engine - محرك التعلم الذاتي
 يتعلم من نتائج السباقات ويحسن الترشيحات
+
+سجل التعلم = سجل أحداث بإضافة فقط (EventLog) + لقطة دورية:
+- كل توقع أو نتيجة = سطر JSON واحد في نهاية السجل (كلفة ثابتة مهما كبر السجل)
+- التحميل = آخر لقطة + إعادة تطبيق الأحداث بعدها فقط
+- سطر مبتور في النهاية (انقطاع أثناء الكتابة) يُحذف عند التحميل
+فهرس في الذاكرة (HistoryIndex) فوق السجل: (track, date, race_number, version) → التوقع،
+(track, date, race_number) → النتيجة، وتواريخ كل مضمار مرتبة لاستعلامات النطاق
+إحصائيات المتسابقين (RunnerStats) تُبنى من نفس الأحداث وتُحفظ في الملف المشترك الذي يقرأه
+PowerRatingEngine (data/runner_stats.json)، والأحداث المعادة بعد اللقطة لا تُحتسب مرتين
 """
 
+import bisect
 import json
 import os
+import sys
+import threading
+import uuid
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import random
 
+# وحدات المشروع (weight_trainer، runner_stats) في المجلد الأب
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weight_trainer import (DEFAULT_WEIGHTS_DIR, MIN_RACES, OnlineLearner, TrainingSet, load_weights,
+                            publish_weights, train_weights)
+from runner_stats import DEFAULT_PATH as DEFAULT_STATS_PATH, RunnerStats
+
+# درجة حرارة Softmax الافتراضية (نفس harville.DEFAULT_TEMPERATURE) إن لم تُنشر أوزان بعد
+DEFAULT_TEMPERATURE = 8.0
+
+
+# ===============================
+# سجل الأحداث
+# ===============================
+class EventLog:
+    """سجل أحداث JSONL بإضافة فقط مع لقطات دورية للحالة
+    
+    الملفات في المجلد:
+    - events.<generation>.jsonl: الأحداث منذ آخر لقطة (سطر لكل حدث مع رقم تسلسلي seq)
+    - snapshot.json: الحالة الكاملة + الجيل + آخر seq مطبق (تُكتب بشكل ذري)
+    بعد كل لقطة يبدأ جيل جديد من السجل ويُحذف القديم، فلا يُعاد تطبيق إلا ما بعد اللقطة
+    """
+    
+    SNAPSHOT_FILE = "snapshot.json"
+    
+    def __init__(self, log_dir: str, fsync: bool = False):
+        self.log_dir = log_dir
+        self.fsync = fsync
+        self.generation = 0
+        self.seq = 0
+        self.pending = 0        # عدد الأحداث منذ آخر لقطة
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.log_dir, f"events.{generation:06d}.jsonl")
+    
+    def load(self) -> Tuple[Optional[Dict], List[Dict]]:
+        """(الحالة من آخر لقطة أو None، الأحداث بعدها بالترتيب)"""
+        state = None
+        snapshot_path = os.path.join(self.log_dir, self.SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            state = snapshot["state"]
+            self.generation = snapshot["generation"]
+            self.seq = snapshot["seq"]
+        
+        events = []
+        path = self._log_path(self.generation)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            good = 0
+            for line in data.splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    break  # سطر مبتور (انقطاع أثناء الكتابة)
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                if event["seq"] <= self.seq:
+                    continue
+                self.seq = event["seq"]
+                events.append(event)
+            if good < len(data):
+                print(f"⚠️ سجل التعلم: حذف {len(data) - good} بايت مبتورة في النهاية")
+                with open(path, "r+b") as f:
+                    f.truncate(good)
+        
+        self.pending = len(events)
+        self._remove_stale()
+        return state, events
+    
+    def _remove_stale(self):
+        """حذف أجيال السجل السابقة للقطة الحالية وبقايا الكتابة الذرية"""
+        if not os.path.isdir(self.log_dir):
+            return
+        current = os.path.basename(self._log_path(self.generation))
+        for name in os.listdir(self.log_dir):
+            if (name.startswith("events.") and name.endswith(".jsonl") and name < current) or name.endswith(".tmp"):
+                os.remove(os.path.join(self.log_dir, name))
+    
+    def append(self, event_type: str, data: Dict) -> Dict:
+        """إضافة حدث في نهاية السجل (سطر واحد)"""
+        with self._lock:
+            if self._file is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._file = open(self._log_path(self.generation), "ab")
+            self.seq += 1
+            event = {"seq": self.seq, "type": event_type, "data": data}
+            self._file.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.pending += 1
+        return event
+    
+    def snapshot(self, state: Dict):
+        """كتابة الحالة الكاملة (ذرياً) ثم بدء جيل جديد من السجل"""
+        with self._lock:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, self.SNAPSHOT_FILE)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"generation": self.generation + 1, "seq": self.seq,
+                           "saved_at": datetime.now().isoformat(), "state": state}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.generation += 1
+            self.pending = 0
+            self._remove_stale()
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# ===============================
+# فهرس السجل
+# ===============================
+class HistoryIndex:
+    """فهرس التوقعات والنتائج (يُبنى من الحالة عند التحميل ويُحدث مع كل حدث)
+    
+    السجلات نفسها تبقى في history["predictions"] / history["results"]، والفهرس يشير إليها فقط
+    """
+    
+    def __init__(self):
+        # (track, date, race_number, version) -> توقع الشوط {"race_number", "top_pick", "power_score"}
+        self.races: Dict[Tuple[str, str, int, int], Dict] = {}
+        # (track, date) -> [(version, سجل التوقع)] تصاعدياً
+        self.versions: Dict[Tuple[str, str], List[Tuple[int, Dict]]] = {}
+        # (track, date) -> [سجل النتيجة]، و (track, date, race_number) -> آخر نتيجة للشوط
+        self.results: Dict[Tuple[str, str], List[Dict]] = {}
+        self.race_results: Dict[Tuple[str, str, int], Dict] = {}
+        # track -> التواريخ المسجلة (مرتبة - بحث ثنائي للنطاقات)
+        self.dates: Dict[str, List[str]] = {}
+    
+    @classmethod
+    def build(cls, history: Dict) -> "HistoryIndex":
+        index = cls()
+        for record in history.get("predictions", []):
+            index.add_prediction(record)
+        for record in history.get("results", []):
+            index.add_result(record)
+        return index
+    
+    def _add_date(self, track: str, date: str):
+        dates = self.dates.setdefault(track, [])
+        pos = bisect.bisect_left(dates, date)
+        if pos == len(dates) or dates[pos] != date:
+            dates.insert(pos, date)
+    
+    def next_version(self, track: str, date: str) -> int:
+        versions = self.versions.get((track, date))
+        return versions[-1][0] + 1 if versions else 1
+    
+    def add_prediction(self, record: Dict):
+        track, date = record.get("track"), record.get("date")
+        # السجلات القديمة بدون رقم نسخة تُرقم بترتيب التسجيل
+        record.setdefault("version", self.next_version(track, date))
+        versions = self.versions.setdefault((track, date), [])
+        versions[:] = [(v, r) for v, r in versions if v != record["version"]]
+        bisect.insort(versions, (record["version"], record), key=lambda item: item[0])
+        for race in record.get("races", []):
+            self.races[(track, date, race.get("race_number"), record["version"])] = race
+        self._add_date(track, date)
+    
+    def add_result(self, record: Dict):
+        track, date = record.get("track"), record.get("date")
+        self.results.setdefault((track, date), []).append(record)
+        for result in record.get("results", []):
+            self.race_results[(track, date, result.get("race_number"))] = result
+        self._add_date(track, date)
+    
+    def latest_version(self, track: str, date: str) -> Optional[int]:
+        versions = self.versions.get((track, date))
+        return versions[-1][0] if versions else None
+    
+    def race_prediction(self, track: str, date: str, race_number: int,
+                        version: Optional[int] = None) -> Optional[Dict]:
+        """توقع شوط (آخر نسخة افتراضياً)"""
+        if version is None:
+            version = self.latest_version(track, date)
+        return self.races.get((track, date, race_number, version))
+    
+    def date_range(self, track: str, date_from: str, date_to: str) -> List[str]:
+        """تواريخ المضمار بين date_from و date_to (شاملة)"""
+        dates = self.dates.get(track, [])
+        return dates[bisect.bisect_left(dates, date_from):bisect.bisect_right(dates, date_to)]
+
+
+# ===============================
+# محرك التعلم
+# ===============================
 class LearningEngine:
     """محرك التعلم الذاتي"""
     
-    def __init__(self, history_file: str = None):
+    # لقطة كاملة بعد هذا العدد من الأحداث (التحميل = لقطة + أقل من هذا العدد من الأحداث)
+    SNAPSHOT_EVERY = 500
+    
+    def __init__(self, history_file: str = None, log_dir: str = None, snapshot_every: int = None,
+                 fsync: bool = False, online: bool = False, weights_dir: str = None,
+                 stats_path: str = None, **online_options):
+        """history_file: ملف JSON القديم (يُنقل إلى السجل عند أول تشغيل)
+        log_dir: مجلد سجل الأحداث واللقطات
+        online: تحديث الأوزان بعد كل نتيجة (OnlineLearner - lr, decay, l2, max_change في online_options)
+        weights_dir: مجلد الأوزان المنشورة ونقطة حفظ التعلم المستمر
+        stats_path: ملف إحصائيات المتسابقين المشترك مع PowerRatingEngine
+        """
+        data_dir = os.path.join(os.path.dirname(__file__), "data")
         if history_file is None:
-            history_file = os.path.join(os.path.dirname(__file__), "data", "learning_history.json")
-        
-        self.history_file = history_file
-        self.history = self._load_history()
+            history_file = os.path.join(data_dir, "learning_history.json")
+        if log_dir is None:
+            log_dir = os.path.join(os.path.dirname(history_file), "learning_log")
         
         # أوزان العوامل (قابلة للتعديل مع التعلم)
         self.weights = {
@@ -32,21 +259,37 @@ class LearningEngine:
             "draw": 0.05
         }
         
-        # أداء الفرسان
-        self.jockey_performance = {}
+        self.weights_dir = weights_dir or DEFAULT_WEIGHTS_DIR
+        self.temperature = DEFAULT_TEMPERATURE
+        self.weights_version = None
+        published = load_weights(self.weights_dir)
+        if published is not None:
+            self.weights.update(published["weights"])
+            self.temperature = published["softmax_temperature"]
+            self.weights_version = published["version"]
         
-        # أداء المدربين
-        self.trainer_performance = {}
-    
-    def _load_history(self) -> Dict:
-        """تحميل سجل التعلم"""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
+        # التعلم المستمر (قبل تحميل السجل: الأحداث بعد نقطة الحفظ تُطبق عليه أثناء إعادة التشغيل)
+        self.online_options = online_options
+        self.online = self._new_online_learner() if online else None
+        self._online_pending = False
         
+        self.stats_path = stats_path or DEFAULT_STATS_PATH
+        # تحديثات الإحصائيات من الأحداث المطبقة ولم تُكتب في الملف المشترك بعد
+        self._stats_pending: List[Tuple[str, tuple]] = []
+        
+        self.history_file = history_file
+        self.snapshot_every = self.SNAPSHOT_EVERY if snapshot_every is None else snapshot_every
+        self.log = EventLog(log_dir, fsync)
+        self.history = self._load_history()
+        if self._online_pending:
+            self._online_checkpoint()
+        self._flush_stats()
+    
+    def _new_online_learner(self) -> OnlineLearner:
+        return OnlineLearner(self.weights_dir, self.weights, self.temperature, **self.online_options)
+    
+    @staticmethod
+    def _empty_history() -> Dict:
         return {
             "predictions": [],
             "results": [],
@@ -61,18 +304,124 @@ class LearningEngine:
             "track_stats": {}
         }
     
-    def _save_history(self):
-        """حفظ سجل التعلم"""
-        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(self.history, f, ensure_ascii=False, indent=2)
+    def _load_history(self) -> Dict:
+        """تحميل سجل التعلم: آخر لقطة + الأحداث بعدها (أو ملف JSON القديم عند أول تشغيل)"""
+        state, events = self.log.load()
+        if state is None:
+            state = self._empty_history()
+            if os.path.exists(self.history_file):
+                try:
+                    with open(self.history_file, 'r', encoding='utf-8') as f:
+                        state = json.load(f)
+                    # نقل الملف القديم إلى لقطة أولى (يبقى الملف كما هو)
+                    self.log.snapshot(state)
+                    print(f"📦 تم نقل سجل التعلم إلى {self.log.log_dir}")
+                except (OSError, ValueError):
+                    pass
+        
+        # لقطات قديمة كانت تحمل الإحصائيات: تصبح الملف المشترك إن لم يوجد بعد
+        legacy = state.pop("runner_stats", None)
+        if legacy and not os.path.exists(self.stats_path):
+            RunnerStats.from_state(legacy).save(self.stats_path)
+        self.history = state
+        self.index = HistoryIndex.build(state)
+        for event in events:
+            self._apply(event)
+        return state
+    
+    def _apply(self, event: Dict):
+        """تطبيق حدث على الحالة (نفس الدالة عند التسجيل وعند إعادة التشغيل)"""
+        data = event["data"]
+        if event["type"] == "prediction":
+            self.history["predictions"].append(data)
+            self.index.add_prediction(data)
+        elif event["type"] == "result":
+            accuracy = self.history["accuracy"]
+            accuracy["total_predictions"] += data["total_races"]
+            accuracy["correct_predictions"] += data["correct_wins"]
+            if accuracy["total_predictions"] > 0:
+                accuracy["win_accuracy"] = (
+                    accuracy["correct_predictions"] / accuracy["total_predictions"] * 100
+                )
+            self.history["results"].append(data)
+            self.index.add_result(data)
+            for result in data["results"]:
+                if result.get("runners"):
+                    self._stats_pending.append(("result", (data["track"], data["date"], result.get("race_number"),
+                                                           result["runners"], result.get("distance"))))
+            if self.online is not None and event["seq"] > self.online.seq:
+                self._online_update(data)
+                self.online.seq = event["seq"]
+                self._online_pending = True
+        elif event["type"] == "runner":
+            self._stats_pending.append(("runner", (data["runner"], data.get("track"), data.get("distance"),
+                                                   data.get("id") or f"runner|{event['seq']}")))
+    
+    def _flush_stats(self):
+        """كتابة تحديثات الإحصائيات المعلقة في الملف المشترك (أحدث نسخة تحت قفل)
+        
+        النتائج والمشاركات المسجلة سابقاً تُتجاهل، فإعادة تشغيل السجل بعد اللقطة لا تكررها
+        """
+        pending, self._stats_pending = self._stats_pending, []
+        
+        def apply(stats: RunnerStats) -> bool:
+            changed = False
+            for kind, args in pending:
+                added = stats.add_result(*args) if kind == "result" else stats.add_runner(*args)
+                changed = added or changed
+            return changed
+        
+        if pending:
+            self.stats = RunnerStats.update_file(self.stats_path, apply)
+        else:
+            self.stats = RunnerStats.load(self.stats_path)
+        # κ لكل نوع من تباين المعدلات بين المفاتيح (الأنواع بمفاتيح قليلة تبقى على الافتراضي)
+        self.stats.fit_prior_rides()
+    
+    def _record(self, event_type: str, data: Dict):
+        """تسجيل حدث: سطر في السجل ثم تطبيقه، ولقطة كاملة كل snapshot_every حدث"""
+        self._apply(self.log.append(event_type, data))
+        if self._online_pending:
+            self._online_checkpoint()
+        if self._stats_pending:
+            self._flush_stats()
+        if self.log.pending >= self.snapshot_every:
+            self.snapshot()
+    
+    def snapshot(self):
+        """لقطة كاملة للحالة الآن (تختصر زمن التحميل التالي)"""
+        self.log.snapshot(self.history)
+    
+    def close(self):
+        """إغلاق ملف السجل"""
+        self.log.close()
+    
+    @staticmethod
+    def _race_field(race: Dict, factor_names: List[str]) -> Optional[Dict]:
+        """كل المتسابقين مع قيم العوامل (إن كانت الترشيحات بـ full_field و factors) - بيانات التدريب"""
+        horses = race.get("predictions", [])
+        if not factor_names or len(horses) < race.get("field_size", len(horses)):
+            return None
+        if not all("factors" in h for h in horses):
+            return None
+        return {
+            "names": [h.get("name") for h in horses],
+            "factors": [[h["factors"][name] for name in factor_names] for h in horses]
+        }
     
     def record_prediction(self, prediction: Dict):
-        """تسجيل توقع جديد"""
+        """تسجيل توقع جديد (نسخة جديدة إن سُجل الاجتماع من قبل)
+        
+        الترشيحات بالحقل الكامل وتفصيل العوامل (full_field + factors) تُحفظ معها صفوف العوامل للتدريب
+        """
+        track, date = prediction.get("track"), prediction.get("date")
+        first = next((h for r in prediction.get("races", []) for h in r.get("predictions", [])), {})
+        factor_names = list(first.get("factors", {}))
         record = {
             "timestamp": datetime.now().isoformat(),
-            "track": prediction.get("track"),
-            "date": prediction.get("date"),
+            "track": track,
+            "date": date,
+            "version": prediction.get("version") or self.index.next_version(track, date),
             "nap": prediction.get("nap_of_the_day", {}).get("horse_name"),
             "races": [
                 {
@@ -84,10 +433,17 @@ class LearningEngine:
             ]
         }
         
-        self.history["predictions"].append(record)
-        self._save_history()
+        fields = [self._race_field(r, factor_names) for r in prediction.get("races", [])]
+        if any(fields):
+            record["factor_names"] = factor_names
+            for race, field in zip(record["races"], fields):
+                if field:
+                    race["field"] = field
+        
+        self._record("prediction", record)
     
-    def record_result(self, track: str, date: str, results: List[Dict]):
+    def record_result(self, track: str, date: str, results: List[Dict], version: Optional[int] = None,
+                      verbose: bool = True) -> Optional[Dict]:
         """تسجيل نتيجة سباق"""
         """
         results: [
@@ -95,21 +451,21 @@ class LearningEngine:
                 "race_number": 1,
                 "winner": "Horse Name",
                 "second": "Horse Name",
-                "third": "Horse Name"
+                "third": "Horse Name",
+                "runners": [{"name", "jockey", "trainer", "position"}, ...],  # اختياري: لإحصائيات المتسابقين
+                "distance": 1600                                             # اختياري: لفئة المسافة
             }
         ]
+        version: نسخة التوقع المقارنة (افتراضياً آخر نسخة مسجلة للاجتماع)
         """
         
-        # البحث عن التوقع المقابل
-        matching_prediction = None
-        for pred in self.history["predictions"]:
-            if pred.get("track") == track and pred.get("date") == date:
-                matching_prediction = pred
-                break
-        
-        if not matching_prediction:
-            print(f"⚠️ لا يوجد توقع مسجل لـ {track} - {date}")
-            return
+        # التوقع المقابل من الفهرس
+        known = self.prediction_versions(track, date)
+        if version is None and known:
+            version = known[-1]
+        if version not in known:
+            print(f"⚠️ لا يوجد توقع مسجل لـ {track} - {date}" + (f" (نسخة {version})" if version else ""))
+            return None
         
         # حساب الدقة
         correct_wins = 0
@@ -117,58 +473,174 @@ class LearningEngine:
         total_races = len(results)
         
         for result in results:
-            race_num = result.get("race_number")
-            winner = result.get("winner")
-            second = result.get("second")
-            third = result.get("third")
+            race_pred = self.index.race_prediction(track, date, result.get("race_number"), version)
+            if race_pred is None:
+                continue
+            top_pick = race_pred.get("top_pick")
             
-            # البحث عن توقع الشوط المقابل
-            for race_pred in matching_prediction.get("races", []):
-                if race_pred.get("race_number") == race_num:
-                    top_pick = race_pred.get("top_pick")
-                    
-                    if top_pick == winner:
-                        correct_wins += 1
-                    
-                    if top_pick in [winner, second, third]:
-                        correct_places += 1
-                    
-                    break
-        
-        # تحديث إحصائيات الدقة
-        self.history["accuracy"]["total_predictions"] += total_races
-        self.history["accuracy"]["correct_predictions"] += correct_wins
-        
-        if self.history["accuracy"]["total_predictions"] > 0:
-            self.history["accuracy"]["win_accuracy"] = (
-                self.history["accuracy"]["correct_predictions"] / 
-                self.history["accuracy"]["total_predictions"] * 100
-            )
+            if top_pick == result.get("winner"):
+                correct_wins += 1
+            
+            if top_pick in [result.get("winner"), result.get("second"), result.get("third")]:
+                correct_places += 1
         
-        # تسجيل النتيجة
+        # تسجيل النتيجة (تحديث الدقة يتم في _apply)
         result_record = {
             "timestamp": datetime.now().isoformat(),
             "track": track,
             "date": date,
+            "version": version,
             "results": results,
             "correct_wins": correct_wins,
             "correct_places": correct_places,
             "total_races": total_races
         }
         
-        self.history["results"].append(result_record)
-        self._save_history()
+        self._record("result", result_record)
+        
+        if verbose:
+            print(f"✅ تم تسجيل النتيجة: {correct_wins}/{total_races} فوز صحيح")
+        return result_record
+    
+    def import_results(self, date: str, results_by_track: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+        """تسجيل نتائج يوم كامل لعدة مضامير دفعة واحدة
+        
+        results_by_track: {"meydan": [{"race_number", "winner", "second", "third"}, ...], ...}
+        يعيد سجل النتيجة لكل مضمار له توقع مسجل
+        """
+        recorded = {}
+        for track, results in results_by_track.items():
+            record = self.record_result(track, date, results, verbose=False)
+            if record is not None:
+                recorded[track] = record
+        wins = sum(r["correct_wins"] for r in recorded.values())
+        races = sum(r["total_races"] for r in recorded.values())
+        print(f"✅ تم تسجيل نتائج {date}: {len(recorded)}/{len(results_by_track)} مضمار، {wins}/{races} فوز صحيح")
+        return recorded
+    
+    def prediction_for(self, track: str, date: str, race_number: int,
+                       version: Optional[int] = None) -> Optional[Dict]:
+        """توقع شوط واحد (آخر نسخة افتراضياً)"""
+        return self.index.race_prediction(track, date, race_number, version)
+    
+    def prediction_versions(self, track: str, date: str) -> List[int]:
+        """أرقام نسخ التوقع المسجلة لاجتماع"""
+        return [version for version, _ in self.index.versions.get((track, date), [])]
+    
+    def predictions_between(self, track: str, date_from: str, date_to: str,
+                            all_versions: bool = False) -> List[Dict]:
+        """توقعات مضمار بين تاريخين (شاملة، YYYY-MM-DD) - آخر نسخة لكل اجتماع افتراضياً"""
+        records = []
+        for date in self.index.date_range(track, date_from, date_to):
+            versions = self.index.versions.get((track, date), [])
+            records.extend(record for _, record in (versions if all_versions else versions[-1:]))
+        return records
+    
+    def results_between(self, track: str, date_from: str, date_to: str) -> List[Dict]:
+        """نتائج مضمار بين تاريخين (شاملة)"""
+        records = []
+        for date in self.index.date_range(track, date_from, date_to):
+            records.extend(self.index.results.get((track, date), []))
+        return records
+    
+    def _example(self, track: str, date: str, race_number: int, winner: str,
+                 version: Optional[int] = None) -> Optional[Tuple[List[List[float]], int]]:
+        """(صفوف العوامل بترتيب self.weights، ترتيب الفائز) لشوط محفوظ بحقل كامل - أو None"""
+        versions = self.index.versions.get((track, date))
+        if not versions:
+            return None
+        if version is None:
+            version = versions[-1][0]
+        record = next((r for v, r in versions if v == version), None)
+        race = self.index.races.get((track, date, race_number, version))
+        field = race.get("field") if race else None
+        if not field or winner not in field["names"]:
+            return None
+        factors = field["factors"]
+        names = list(self.weights)
+        if record["factor_names"] != names:
+            order = [record["factor_names"].index(name) for name in names]
+            factors = [[row[i] for i in order] for row in factors]
+        return factors, field["names"].index(winner)
+    
+    def training_races(self) -> Iterator[Tuple[List[List[float]], int]]:
+        """(صفوف العوامل، ترتيب الفائز) لكل شوط له نتيجة وحقل كامل في آخر نسخة توقع"""
+        for (track, date, race_number), result in self.index.race_results.items():
+            example = self._example(track, date, race_number, result.get("winner"))
+            if example is not None:
+                yield example
+    
+    def training_set(self) -> TrainingSet:
+        """مصفوفة التدريب من كل الأشواط الصالحة (بعوامل الأوزان الحالية بنفس الترتيب)"""
+        return TrainingSet.from_races(list(self.weights), self.training_races())
+    
+    # ---------- التعلم المستمر ----------
+    
+    def _online_update(self, result_record: Dict):
+        """خطوة Adagrad لكل شوط في النتيجة (مقابل نسخة التوقع التي قورنت بها)"""
+        for result in result_record.get("results", []):
+            example = self._example(result_record["track"], result_record["date"], result.get("race_number"),
+                                    result.get("winner"), result_record.get("version"))
+            if example is not None:
+                self.online.update(*example)
+    
+    def _online_checkpoint(self):
+        """حفظ المتعلم (PowerRatingEngine يلتقط الأوزان الجديدة قبل الشوط التالي)"""
+        self.online.checkpoint()
+        self._online_pending = False
+        published = self.online.published_weights()
+        if published is not None:
+            self.weights.update(published["weights"])
+            self.temperature = published["softmax_temperature"]
+    
+    def train_weights(self, l2: float = 1.0, publish: bool = True, weights_dir: Optional[str] = None
+                      ) -> Optional[Dict]:
+        """تدريب الأوزان (Conditional Logit) من التوقعات والنتائج المسجلة ونشرها كنسخة جديدة
+        
+        PowerRatingEngine يحمّل آخر نسخة منشورة عند بدء التشغيل
+        """
+        data = self.training_set()
+        if data.num_races < MIN_RACES:
+            print(f"⚠️ بيانات غير كافية للتدريب ({data.num_races} شوط بحقل كامل، الحد الأدنى {MIN_RACES})")
+            return None
+        
+        try:
+            trained = train_weights(data, self.weights, self.temperature, l2)
+        except ValueError as e:
+            print(f"⚠️ فشل التدريب: {e}")
+            return None
+        
+        print(f"🧠 تدريب على {trained['races']} شوط في {trained['seconds']}s: "
+              f"log-likelihood {trained['baseline_log_likelihood']} → {trained['log_likelihood']} "
+              f"(عشوائي {trained['uniform_log_likelihood']})، "
+              f"دقة المرشح الأول {trained['baseline_top_pick_accuracy']:.1%} → {trained['top_pick_accuracy']:.1%}")
         
-        print(f"✅ تم تسجيل النتيجة: {correct_wins}/{total_races} فوز صحيح")
+        if publish:
+            trained = publish_weights(trained, weights_dir or self.weights_dir)
+            self.weights_version = trained["version"]
+            print(f"✅ نُشرت الأوزان (نسخة {trained['version']})")
+        self.weights.update(trained["weights"])
+        self.temperature = trained["softmax_temperature"]
+        if publish and self.online is not None:
+            # التعلم المستمر يبدأ من النسخة الجديدة
+            seq = self.online.seq
+            self.online = self._new_online_learner()
+            self.online.seq = seq
+            self._online_checkpoint()
+        return trained
     
     def learn_and_adjust(self):
-        """التعلم من النتائج وتعديل الأوزان"""
+        """التعلم من النتائج وتعديل الأوزان (تدريب كامل إن توفرت أشواط بحقل كامل)"""
         results = self.history.get("results", [])
         
         if len(results) < 5:
             print("⚠️ بيانات غير كافية للتعلم (أقل من 5 سباقات)")
             return
         
+        if any(True for _ in self.training_races()):
+            if self.train_weights() is not None:
+                return
+        
         # تحليل العوامل الأكثر تأثيراً
         # (هذا تبسيط - يمكن استخدام ML حقيقي لاحقاً)
         
@@ -184,7 +656,6 @@ class LearningEngine:
             self.weights["rating"] = max(0.20, self.weights["rating"] - 0.01)
             self.weights["jockey"] = min(0.20, self.weights["jockey"] + 0.01)
         
-        self._save_history()
         print(f"🔄 تم تحديث الأوزان بناءً على {len(results)} نتيجة")
     
     def get_accuracy_report(self) -> Dict:
@@ -201,21 +672,20 @@ class LearningEngine:
         """الحصول على الأوزان المعدلة"""
         return self.weights.copy()
     
-    def update_jockey_stats(self, jockey: str, won: bool):
-        """تحديث إحصائيات الفارس"""
-        if jockey not in self.jockey_performance:
-            self.jockey_performance[jockey] = {"rides": 0, "wins": 0}
-        
-        self.jockey_performance[jockey]["rides"] += 1
-        if won:
-            self.jockey_performance[jockey]["wins"] += 1
+    def update_jockey_stats(self, jockey: str, won: bool, trainer: Optional[str] = None,
+                            horse: Optional[str] = None, track: Optional[str] = None,
+                            distance: Optional[int] = None):
+        """تحديث إحصائيات الفارس (ومع المدرب/الحصان/المضمار/المسافة إن توفرت) - حدث في السجل"""
+        runner = {"jockey": jockey, "trainer": trainer, "name": horse, "position": 1 if won else 0}
+        self._record("runner", {"runner": runner, "track": track, "distance": distance, "id": uuid.uuid4().hex})
     
     def get_jockey_win_rate(self, jockey: str) -> float:
-        """الحصول على معدل فوز الفارس"""
-        stats = self.jockey_performance.get(jockey, {"rides": 0, "wins": 0})
-        if stats["rides"] == 0:
-            return 0.15  # معدل افتراضي
-        return stats["wins"] / stats["rides"]
+        """معدل فوز الفارس المنكمش نحو متوسط الفرسان (عينة صغيرة ← قريب من المتوسط)"""
+        return self.stats.runner_rates({"jockey": jockey}).get("jockey", self.stats.mean("jockey"))
+    
+    def get_trainer_win_rate(self, trainer: str) -> float:
+        """معدل فوز المدرب المنكمش نحو متوسط المدربين"""
+        return self.stats.runner_rates({"trainer": trainer}).get("trainer", self.stats.mean("trainer"))
     
     def suggest_improvements(self) -> List[str]:
         """اقتراحات لتحسين الدقة"""
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Browser Pool - مجمع المتصفحات الدائمة
+جلسات WebDriver جاهزة يُعاد استخدامها بين عمليات الجلب بدلاً من تشغيل
+Chrome جديد لكل اجتماع، مع فحص الصحة وإعادة التدوير حسب العمر وعدد الاستخدامات
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class PooledSession:
+    """جلسة متصفح داخل المجمع"""
+
+    __slots__ = ("driver", "created", "uses")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created = time.monotonic()
+        self.uses = 0
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created
+
+
+def default_health_check(driver) -> bool:
+    """التأكد من أن المتصفح ما زال يستجيب"""
+    try:
+        return driver.execute_script("return 1") == 1
+    except Exception:
+        return False
+
+
+class BrowserPool:
+    """مجمع جلسات WebDriver بحد أقصى للحجم
+
+    factory: دالة تُنشئ متصفحاً جديداً
+    size: أقصى عدد متصفحات مفتوحة في نفس الوقت (الطلبات الزائدة تنتظر)
+    max_age: أقصى عمر للجلسة بالثواني قبل إعادة تدويرها
+    max_uses: أقصى عدد استخدامات للجلسة الواحدة
+    """
+
+    def __init__(self, factory: Callable, size: int = 2, max_age: float = 600,
+                 max_uses: int = 50, health_check: Callable = default_health_check):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.health_check = health_check
+
+        self._idle = deque()
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats: Dict[str, int] = {"created": 0, "reused": 0, "recycled": 0, "unhealthy": 0, "waits": 0}
+
+    # ---------- الدورة ----------
+
+    def _expired(self, session: PooledSession) -> bool:
+        return session.age > self.max_age or session.uses >= self.max_uses
+
+    def _destroy(self, session: PooledSession):
+        """إغلاق المتصفح (خارج القفل)"""
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def _discard(self, session: PooledSession, reason: str):
+        with self._cond:
+            self._total -= 1
+            self.stats[reason] += 1
+            self._cond.notify()
+        self._destroy(session)
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledSession:
+        """الحصول على جلسة جاهزة (أو إنشاء جديدة إن سمح الحجم)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            session = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("مجمع المتصفحات مغلق")
+                    if self._idle:
+                        session = self._idle.popleft()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("لا يوجد متصفح متاح في المجمع")
+                    self.stats["waits"] += 1
+                    self._cond.wait(remaining)
+
+            if session is None:
+                try:
+                    session = PooledSession(self.factory())
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.stats["created"] += 1
+            elif self._expired(session):
+                self._discard(session, "recycled")
+                continue
+            elif not self.health_check(session.driver):
+                self._discard(session, "unhealthy")
+                continue
+            else:
+                with self._cond:
+                    self.stats["reused"] += 1
+
+            session.uses += 1
+            return session
+
+    def release(self, session: PooledSession, healthy: bool = True):
+        """إرجاع الجلسة للمجمع (أو إغلاقها إن كانت معطلة أو منتهية)"""
+        if not healthy or self._closed or self._expired(session):
+            self._discard(session, "recycled" if healthy else "unhealthy")
+            return
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None):
+        """استخدام متصفح من المجمع: with pool.session() as driver"""
+        session = self.acquire(timeout)
+        healthy = True
+        try:
+            yield session.driver
+        except Exception:
+            # المتصفح قد يكون سليماً (خطأ في الصفحة) - نتحقق قبل إعادته
+            healthy = self.health_check(session.driver)
+            raise
+        finally:
+            self.release(session, healthy)
+
+    def warm(self, count: Optional[int] = None):
+        """تشغيل متصفحات مسبقاً حتى تكون جاهزة عند أول طلب"""
+        sessions = []
+        try:
+            for _ in range(min(count or self.size, self.size)):
+                sessions.append(self.acquire(timeout=0))
+        except TimeoutError:
+            pass
+        for session in sessions:
+            session.uses -= 1
+            self.release(session)
+
+    def close(self):
+        """إغلاق كل المتصفحات الخاملة (المستخدمة تُغلق عند إرجاعها)"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for session in idle:
+            self._destroy(session)
+
+    @property
+    def in_use(self) -> int:
+        with self._cond:
+            return self._total - len(self._idle)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File Lock - قفل ملف حصري على مستوى نظام التشغيل
+للملفات التي يكتبها أكثر من كاتب (عمليات، جلسات الواجهة، LearningEngine): مخزن الترشيحات
+وإحصائيات المتسابقين. القفل على ملف جانبي ثابت، لأن الملف نفسه يُستبدل ذرياً (os.replace)
+وقفل على ملف مستبدل لا يمنع أحداً
+"""
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+@contextmanager
+def file_lock(path: str):
+    """قفل حصري على path (بين العمليات، وبين الخيوط التي تفتح الملف كلٌ على حدة)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Form Features - تحليل سلسلة الفورمة
+وحدة مشتركة بين horse_ai و HorseMaster لتحويل الفورمة (مثل "21-3/0P1")
+إلى متجه خصائص صغير، مع ذاكرة LRU لأن نفس السلاسل تتكرر طوال اليوم
+
+صيغة الفورمة (UK/UAE): الأقدم يساراً والأحدث يميناً
+  1-9  المركز في السباق
+  0    خارج العشرة الأوائل
+  P F U R B S C   لم يكمل السباق (Pulled up, Fell, Unseated ...)
+  -    فاصل موسم
+  /    غياب موسمين أو أكثر (تُخفض قيمة السباقات قبله للنصف)
+
+HorseMaster يحمل نسخة من هذا الملف (HorseMaster/bots/form_features.py) لأنه يُنشر مستقلاً
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable
+
+# حجم ذاكرة التخزين المؤقت
+FORM_CACHE_SIZE = 8192
+
+# نقاط كل نتيجة (جدول ثابت بدلاً من سلسلة if/elif)
+POSITION_POINTS = {"1": 100, "2": 70, "3": 50, "4": 30,
+                   "5": 20, "6": 20, "7": 20, "8": 20, "9": 20, "0": 10}
+NON_COMPLETION = frozenset("PFURBSC")
+SEASON_BREAK = "-"
+LONG_BREAK = "/"
+
+# أوزان آخر 5 سباقات (الأحدث أعلى)
+RECENT_WEIGHTS = (5, 4, 3, 2, 1)
+WEIGHT_TOTAL = sum(RECENT_WEIGHTS)
+
+# النقاط عند عدم وجود أي سباق
+EMPTY_SCORE = 50
+
+FormFeatures = namedtuple("FormFeatures", ["score", "runs", "wins", "places", "recency"])
+FormFeatures.__doc__ = """متجه خصائص الفورمة
+
+score    النقاط الموزونة لآخر 5 سباقات (0-100)
+runs     عدد السباقات
+wins     عدد مرات الفوز
+places   عدد مرات المركز 1-3
+recency  عدد السباقات منذ آخر مركز 1-3 (= runs إن لم يحدث)
+"""
+
+FEATURE_NAMES = FormFeatures._fields
+
+
+@lru_cache(maxsize=FORM_CACHE_SIZE)
+def form_features(form: str) -> FormFeatures:
+    """تحليل سلسلة فورمة واحدة (مع ذاكرة LRU حسب النص الخام)"""
+    score = 0.0
+    runs = wins = places = 0
+    recency = None
+    discount = 1.0
+
+    # القراءة من الأحدث (يمين) إلى الأقدم (يسار)
+    for ch in reversed((form or "").upper()):
+        if ch == LONG_BREAK:
+            discount *= 0.5
+            continue
+        if ch == SEASON_BREAK:
+            continue
+
+        points = POSITION_POINTS.get(ch)
+        if points is None:
+            if ch not in NON_COMPLETION:
+                continue
+            points = 0
+
+        if runs < len(RECENT_WEIGHTS):
+            score += points * RECENT_WEIGHTS[runs] * discount
+        if ch == "1":
+            wins += 1
+        if ch in "123":
+            places += 1
+            if recency is None:
+                recency = runs
+        runs += 1
+
+    if runs == 0:
+        return FormFeatures(EMPTY_SCORE, 0, 0, 0, 0)
+
+    return FormFeatures(
+        score=min(score / WEIGHT_TOTAL, 100),
+        runs=runs,
+        wins=wins,
+        places=places,
+        recency=runs if recency is None else recency
+    )
+
+
+def form_score(form: str) -> float:
+    """النقاط الموزونة فقط"""
+    return form_features(form).score
+
+
+def form_feature_matrix(forms: Iterable[str]):
+    """النسخة المتجهة لبطاقة كاملة: مصفوفة (عدد الخيول × 5)
+
+    كل سلسلة فريدة تُحلل مرة واحدة ثم تُوزع النتائج بفهرسة NumPy
+    """
+    import numpy as np
+
+    forms = forms.tolist() if hasattr(forms, "tolist") else list(forms)
+    unique = dict.fromkeys(forms)
+    ids = {f: i for i, f in enumerate(unique)}
+    inverse = np.fromiter(map(ids.__getitem__, forms), dtype=np.int64, count=len(forms))
+    table = np.fromiter(chain.from_iterable(map(form_features, unique)), dtype=np.float64,
+                        count=len(unique) * len(FEATURE_NAMES)).reshape(len(unique), len(FEATURE_NAMES))
+    return table[inverse]
+
+
+def form_scores(forms: Iterable[str]):
+    """عمود النقاط الموزونة لبطاقة كاملة"""
+    return form_feature_matrix(forms)[:, FEATURE_NAMES.index("score")]
+
+
+def cache_info():
+    """إحصائيات ذاكرة التخزين المؤقت (hits/misses)"""
+    return form_features.cache_info()
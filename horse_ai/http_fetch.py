@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP Fetch - جلب البطاقات عبر HTTP أولاً
+معظم صفحات البطاقات تُولد من الخادم، لذلك نجرب طلب HTTP عادي (جلسة مشتركة
+بمجمع اتصالات) ثم التحليل، ولا نلجأ للمتصفح إلا للمصادر التي تحتاج JavaScript
+"""
+
+import re
+import threading
+from importlib.util import find_spec
+from typing import Dict, List, Optional
+
+# requests و bs4 يُستوردان عند أول جلب/تحليل فعلي (وليس عند استيراد الوحدة)
+REQUESTS_AVAILABLE = find_spec("requests") is not None
+BS4_AVAILABLE = find_spec("bs4") is not None
+
+from racecard import RaceCardBuilder, StringPool
+
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+# أسماء الأعمدة المعروفة في جداول البطاقات
+COLUMN_ALIASES = {
+    "number": ("no", "no.", "#", "number", "num"),
+    "name": ("horse", "name", "horse name", "runner"),
+    "draw": ("draw", "dr", "gate", "stall"),
+    "jockey": ("jockey", "rider"),
+    "trainer": ("trainer",),
+    "rating": ("rating", "or", "rtg", "official rating"),
+    "weight": ("weight", "wgt", "wt"),
+    "form": ("form", "recent form"),
+}
+HEADER_TO_FIELD = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+DISTANCE_RE = re.compile(r"(\d{3,4})\s*m\b", re.IGNORECASE)
+TIME_RE = re.compile(r"\b(\d{1,2}:\d{2})\b")
+SURFACE_RE = re.compile(r"\b(Dirt|Turf|Tapeta|All[- ]Weather|Polytrack)\b", re.IGNORECASE)
+GOING_RE = re.compile(r"\b(Good to Firm|Good to Soft|Good|Soft|Firm|Heavy|Standard|Fast|Yielding)\b", re.IGNORECASE)
+INT_RE = re.compile(r"\d+")
+
+
+# ===============================
+# إحصائيات المصادر
+# ===============================
+class SourceStats:
+    """نسبة النجاح والزمن لكل مصدر ولكل طريقة (http / browser)"""
+
+    MAX_SAMPLES = 500
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Dict]] = {}
+
+    def record(self, source: str, method: str, success: bool, latency: float):
+        with self._lock:
+            entry = self._stats.setdefault(source, {}).setdefault(
+                method, {"attempts": 0, "hits": 0, "latencies": []})
+            entry["attempts"] += 1
+            if success:
+                entry["hits"] += 1
+            entry["latencies"].append(latency)
+            if len(entry["latencies"]) > self.MAX_SAMPLES:
+                del entry["latencies"][0]
+
+    def summary(self) -> Dict:
+        """ملخص قابل للتحويل إلى JSON"""
+        with self._lock:
+            report = {}
+            for source, methods in self._stats.items():
+                report[source] = {}
+                for method, entry in methods.items():
+                    latencies = sorted(entry["latencies"])
+                    report[source][method] = {
+                        "attempts": entry["attempts"],
+                        "hits": entry["hits"],
+                        "hit_rate": round(entry["hits"] / entry["attempts"], 3) if entry["attempts"] else 0.0,
+                        "avg_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+                        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else 0.0
+                    }
+            return report
+
+
+# ===============================
+# عميل HTTP
+# ===============================
+class HttpFetcher:
+    """جلسة HTTP مشتركة مع مجمع اتصالات (Keep-Alive)"""
+
+    def __init__(self, pool_size: int = 8, timeout: float = 10):
+        self.timeout = timeout
+        self.session = None
+        if REQUESTS_AVAILABLE:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.session = requests.Session()
+            self.session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+    @property
+    def available(self) -> bool:
+        return self.session is not None and BS4_AVAILABLE
+
+    def fetch_page(self, url: str) -> Optional[str]:
+        """جلب صفحة (None عند الفشل)"""
+        if self.session is None:
+            return None
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.text
+        except Exception as e:
+            print(f"⚠️ فشل طلب HTTP {url}: {e}")
+            return None
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+# ===============================
+# تحليل صفحة البطاقة
+# ===============================
+def _parse_int(text: str, default: int = 0) -> int:
+    match = INT_RE.search(text or "")
+    return int(match.group()) if match else default
+
+
+def _race_heading(table) -> str:
+    """نص العنوان الأقرب قبل جدول الشوط"""
+    heading = table.find_previous(["h1", "h2", "h3", "h4"])
+    return heading.get_text(" ", strip=True) if heading else ""
+
+
+def parse_racecard_html(html: str, track: str, date: str, pool: StringPool = None) -> Dict:
+    """استخراج البطاقة من HTML: كل جدول يحتوي على عمود Horse يُعتبر شوطاً"""
+    if not html or not BS4_AVAILABLE:
+        return {"success": False, "message": "لا يوجد HTML للتحليل"}
+
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    builder = RaceCardBuilder(track, date, pool)
+    num_races = 0
+
+    for table in soup.find_all("table"):
+        rows = table.find_all("tr")
+        if len(rows) < 2:
+            continue
+        headers = [c.get_text(" ", strip=True).lower() for c in rows[0].find_all(["th", "td"])]
+        fields = [HEADER_TO_FIELD.get(h) for h in headers]
+        if "name" not in fields:
+            continue
+
+        heading = _race_heading(table)
+        distance = DISTANCE_RE.search(heading)
+        race_time = TIME_RE.search(heading)
+        surface = SURFACE_RE.search(heading)
+        going = GOING_RE.search(heading)
+        num_races += 1
+        builder.add_race(
+            race_number=num_races,
+            race_name=heading or f"Race {num_races}",
+            race_time=race_time.group(1) if race_time else "",
+            distance=int(distance.group(1)) if distance else 0,
+            surface=surface.group(1).title() if surface else "",
+            going=going.group(1).title() if going else ""
+        )
+
+        for i, row in enumerate(rows[1:], 1):
+            cells = [c.get_text(" ", strip=True) for c in row.find_all(["td", "th"])]
+            values = {field: cells[j] for j, field in enumerate(fields) if field and j < len(cells)}
+            if not values.get("name"):
+                continue
+            builder.add_runner(
+                number=_parse_int(values.get("number"), i),
+                name=values["name"],
+                draw=_parse_int(values.get("draw")),
+                jockey=values.get("jockey", ""),
+                trainer=values.get("trainer", ""),
+                rating=_parse_int(values.get("rating")),
+                weight=_parse_int(values.get("weight")),
+                form=values.get("form", "").replace(" ", "")
+            )
+
+    if num_races == 0:
+        return {"success": False, "message": "لم يتم العثور على جداول البطاقة"}
+
+    card = builder.build()
+    if card.num_runners == 0:
+        return {"success": False, "message": "البطاقة لا تحتوي على خيول"}
+
+    return {
+        "success": True,
+        "track": track,
+        "date": date,
+        "card": card,
+        "total_races": card.num_races
+    }
+
+
+def sources_for(track: str, racetracks: Dict[str, List[Dict]], sources: Dict[str, Dict]) -> List[str]:
+    """المصادر المناسبة لمضمار حسب دولته"""
+    country = next((c for c, tracks in racetracks.items() if any(t["id"] == track for t in tracks)), None)
+    return [sid for sid, src in sources.items() if country in src.get("countries", [])]
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Odds Stream - تدفق أسعار السوق وإعادة الحساب التدريجي
+- مصدر الأسعار قابل للتبديل: أي iterable من التحديثات (ملف تسجيل JSONL، محاكاة، أو خدمة مباشرة)
+  {"ts": ..., "track": ..., "date": ..., "race_number": 3, "horse_number": 7, "odds": 4.5 | "7/2"}
+- دفتر أسعار (PriceBook) بمصفوفات (أشواط × متسابقين) مربوطة بأعمدة RaceCard
+- كل تحديث يعيد حساب الشوط المتأثر فقط: الاحتمال الضمني، القيمة (edge)، ورهانات كيلي
+- المخرجات تيار فروقات (diff): سعر تغير، رهان تغير - بدون إعادة الترشيحات أبداً
+"""
+
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from racecard import VALUE_LABELS, RaceCard
+from staking import DEFAULT_LIMITS, apply_limits, kelly_fractions
+
+# حدود تصنيف القيمة حسب الأفضلية على السوق (edge %) - كود في VALUE_LABELS
+EDGE_THRESHOLDS = np.array([0.0, 10.0, 25.0])
+
+
+def parse_odds(value) -> float:
+    """سعر عشري من 4.5 أو "7/2" أو "evs"
+
+    NaN = بدون سعر / معلق، وكذلك أي قيمة لا تُقرأ كسعر ("SP"، "NR"، "5/0"، سعر عشري أقل من 1)
+    """
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)):
+        price = float(value)
+    else:
+        text = str(value).strip().lower()
+        if text in ("evs", "evens", "evn"):
+            return 2.0
+        try:
+            if "/" in text:
+                numerator, denominator = text.split("/", 1)
+                price = float(numerator) / float(denominator) + 1
+            else:
+                price = float(text)
+        except (ValueError, ZeroDivisionError):
+            return np.nan
+    return price if np.isfinite(price) and price >= 1 else np.nan
+
+
+def _timestamp(value) -> Optional[float]:
+    """وقت التحديث بالثواني (رقم أو ISO)"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(str(value)).timestamp()
+
+
+# ===============================
+# مصادر الأسعار
+# ===============================
+class ReplaySource:
+    """إعادة تشغيل ملف تسجيل أسعار (JSONL، أو JSONL.gz)
+
+    speed: 0 = بأسرع ما يمكن، 1 = بالزمن الحقيقي، 10 = أسرع 10 مرات
+    """
+
+    def __init__(self, path: str, speed: float = 0.0, track: Optional[str] = None,
+                 date: Optional[str] = None):
+        self.path = path
+        self.speed = speed
+        self.track = track
+        self.date = date
+
+    def __iter__(self) -> Iterator[Dict]:
+        opener = gzip.open if self.path.endswith(".gz") else open
+        last = None
+        with opener(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    tick = json.loads(line)
+                except json.JSONDecodeError:
+                    # سطر مبتور (تسجيل انقطع) - يُتجاهل
+                    continue
+                if self.track and tick.get("track", self.track) != self.track:
+                    continue
+                if self.date and tick.get("date", self.date) != self.date:
+                    continue
+
+                if self.speed > 0:
+                    ts = _timestamp(tick.get("ts"))
+                    if ts is not None and last is not None and ts > last:
+                        time.sleep((ts - last) / self.speed)
+                    last = ts if ts is not None else last
+                yield tick
+
+
+def write_replay(path: str, ticks: Iterable[Dict]) -> int:
+    """تسجيل تحديثات الأسعار في ملف JSONL (لإعادة التشغيل لاحقاً)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    with opener(path, "wt", encoding="utf-8") as f:
+        for tick in ticks:
+            f.write(json.dumps(tick, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def simulated_ticks(card: RaceCard, n_ticks: int = 1000, margin: float = 1.15,
+                    volatility: float = 0.05, seed=None, start: float = 0.0) -> Iterator[Dict]:
+    """أسعار محاكاة: سوق افتتاحي حول احتمالات النموذج ثم تحركات عشوائية (وضع المحاكاة)"""
+    rng = np.random.default_rng(seed)
+    p = np.maximum(card.win_probability / 100, 0.005)
+    noise = rng.lognormal(0.0, 0.25, card.num_runners)
+    prices = np.maximum(np.round(1 / (p * margin) * noise, 2), 1.01)
+    race_numbers = card.races["race_number"][card.race_index]
+    numbers = card.runners["number"]
+
+    def tick(i: int, ts: float) -> Dict:
+        return {"ts": ts, "track": card.track, "date": card.date, "race_number": int(race_numbers[i]),
+                "horse_number": int(numbers[i]), "odds": float(prices[i])}
+
+    ts = start
+    for i in range(card.num_runners):
+        yield tick(i, ts)
+    for _ in range(n_ticks):
+        ts += float(rng.exponential(2.0))
+        i = int(rng.integers(card.num_runners))
+        prices[i] = max(round(float(prices[i] * np.exp(rng.normal(0.0, volatility))), 2), 1.01)
+        yield tick(i, ts)
+
+
+# ===============================
+# دفتر الأسعار
+# ===============================
+class PriceBook:
+    """أسعار السوق لبطاقة محسوبة مع القيمة ورهانات كيلي، تُحدث شوطاً بشوط"""
+
+    def __init__(self, card: RaceCard, odds: Optional[Dict] = None, bankroll: float = 1000.0,
+                 limits: Optional[Dict] = None, stake_tolerance: float = 0.0):
+        """stake_tolerance: أقل تغير في الرهان يُرسل كفرق (حد التعرض يغير كل الرهانات بقروش مع كل سعر)"""
+        self.card = card
+        self.bankroll = bankroll
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.stake_tolerance = stake_tolerance
+        # {race_number: {horse_number: odds}} - آخر سعر لكل حصان (يبقى صالحاً بعد سحب حصان)
+        self.odds: Dict[int, Dict[int, float]] = {}
+        for race_number, race_odds in (odds or {}).items():
+            for number, price in race_odds.items():
+                self.odds.setdefault(int(race_number), {})[int(number)] = parse_odds(price)
+        # rejected: تحديث بدون رقم شوط/حصان صالح، invalid_odds: سعر غير صالح عومل كـ "بدون سعر"
+        self.stats = {"ticks": 0, "unchanged": 0, "unknown": 0, "rejected": 0, "invalid_odds": 0,
+                      "races_recomputed": 0, "diffs": 0}
+        self.rebind()
+
+    def rebind(self):
+        """(إعادة) ربط الدفتر بأعمدة البطاقة وحساب كل شيء - عند الإنشاء أو بعد سحب حصان
+
+        لا تُرسل فروقات: العملاء يأخذون snapshot جديدة بعد إعادة الربط
+        """
+        card = self.card
+        self.slots: Dict[tuple, tuple] = {}
+        for r in range(card.num_races):
+            race_number = int(card.races["race_number"][r])
+            sl = card.race_slice(r)
+            for col, number in enumerate(card.runners["number"][sl].tolist()):
+                self.slots[(race_number, int(number))] = (r, col)
+
+        self.p, self.mask = card.pad_races(card.win_probability / 100)
+        self.prices = np.full(self.p.shape, np.nan)
+        for (race_number, number), slot in self.slots.items():
+            self.prices[slot] = self.odds.get(race_number, {}).get(number, np.nan)
+
+        self.overround = np.zeros(card.num_races)
+        self.market = np.zeros(self.p.shape)
+        self.edge = np.full(self.p.shape, np.nan)
+        self.value_code = np.zeros(self.p.shape, dtype=np.int8)
+        self.kelly = np.zeros(self.p.shape)
+        self._recompute(np.arange(card.num_races))
+        self.stakes = self._stakes()
+        # آخر رهان أُرسل لكل حصان (الفروقات تُقاس منه)
+        self.published = self.stakes.copy()
+
+    def _recompute(self, rows: np.ndarray):
+        """السوق والقيمة ونسب كيلي الكاملة لأشواط محددة فقط"""
+        prices = self.prices[rows]
+        priced = np.isfinite(prices) & (prices > 1)
+        inverse = np.where(priced, 1 / np.where(priced, prices, 1.0), 0.0)
+        overround = inverse.sum(axis=-1)
+        self.overround[rows] = overround
+        self.market[rows] = np.divide(inverse, overround[:, None], out=np.zeros_like(inverse),
+                                      where=overround[:, None] > 0)
+
+        edge = np.where(priced, (self.p[rows] * np.where(priced, prices, 0.0) - 1) * 100, np.nan)
+        self.edge[rows] = edge
+        self.value_code[rows] = np.where(priced, np.searchsorted(EDGE_THRESHOLDS, np.nan_to_num(edge),
+                                                                 side="right"), 0)
+        self.kelly[rows] = kelly_fractions(self.p[rows], prices)
+        self.stats["races_recomputed"] += len(rows)
+
+    def _stakes(self) -> np.ndarray:
+        """الرهانات بعد كسر كيلي والحدود (حد التعرض يربط كل الأشواط)"""
+        limits = self.limits
+        fractions = apply_limits(self.kelly, limits["kelly_fraction"], limits["race_cap"], limits["max_exposure"])
+        stakes = np.round(fractions * self.bankroll, 2)
+        stakes[stakes < limits["min_stake"]] = 0.0
+        return stakes
+
+    def _runner(self, r: int, col: int) -> Dict:
+        """رقم واسم الحصان في خانة الدفتر"""
+        i = int(self.card.offsets[r]) + col
+        return {"race_number": int(self.card.races["race_number"][r]),
+                "horse_number": int(self.card.runners["number"][i]),
+                "horse": self.card.pool.lookup(self.card.runners["name"][i])}
+
+    def apply(self, ticks: Iterable[Dict]) -> List[Dict]:
+        """تطبيق دفعة تحديثات وإعادة الفروقات فقط
+
+        كل شوط تأثر يُعاد حسابه مرة واحدة مهما كان عدد تحديثاته في الدفعة
+        """
+        touched: Dict[int, Dict[int, tuple]] = {}
+        for tick in ticks:
+            self.stats["ticks"] += 1
+            try:
+                key = (int(tick["race_number"]), int(tick["horse_number"]))
+            except (KeyError, TypeError, ValueError):
+                self.stats["rejected"] += 1
+                continue
+            slot = self.slots.get(key)
+            if slot is None:
+                # حصان غير موجود (مسحوب أو من اجتماع آخر)
+                self.stats["unknown"] += 1
+                continue
+
+            price = parse_odds(tick.get("odds"))
+            if np.isnan(price) and tick.get("odds") not in (None, ""):
+                self.stats["invalid_odds"] += 1
+            previous = float(self.prices[slot])
+            if price == previous or (np.isnan(price) and np.isnan(previous)):
+                self.stats["unchanged"] += 1
+                continue
+
+            self.prices[slot] = price
+            self.odds.setdefault(key[0], {})[key[1]] = price
+            first = touched.setdefault(slot[0], {}).get(slot[1])
+            touched[slot[0]][slot[1]] = (first[0] if first else previous, tick.get("ts"))
+
+        if not touched:
+            return []
+
+        self._recompute(np.fromiter(touched, dtype=np.int64))
+        stakes = self._stakes()
+
+        diffs = []
+        for r, columns in touched.items():
+            for col, (previous, ts) in columns.items():
+                price = float(self.prices[r, col])
+                edge = float(self.edge[r, col])
+                diffs.append(dict(self._runner(r, col), **{
+                    "type": "price",
+                    "ts": ts,
+                    "odds": None if np.isnan(price) else price,
+                    "previous": None if np.isnan(previous) else previous,
+                    "implied_probability": round(100 / price, 2) if price > 1 else None,
+                    "market_probability": round(float(self.market[r, col]) * 100, 2),
+                    "overround": round(float(self.overround[r]) * 100, 1),
+                    "edge": None if np.isnan(edge) else round(edge, 1),
+                    "value_rating": VALUE_LABELS[self.value_code[r, col]]
+                }))
+
+        # رهان أصبح صفراً أو بدأ من صفر يُرسل دائماً، وبقية التغيرات فوق الحد فقط
+        delta = np.abs(stakes - self.published)
+        changed = (delta > self.stake_tolerance) | ((stakes == 0) != (self.published == 0))
+        for r, col in zip(*np.nonzero(changed & (delta > 0))):
+            diffs.append(dict(self._runner(int(r), int(col)), **{
+                "type": "stake",
+                "stake": float(stakes[r, col]),
+                "previous": float(self.published[r, col])
+            }))
+            self.published[r, col] = stakes[r, col]
+        self.stakes = stakes
+        self.stats["diffs"] += len(diffs)
+        return diffs
+
+    def stream(self, source: Iterable[Dict], batch: int = 1) -> Iterator[Dict]:
+        """تيار الفروقات من مصدر أسعار (batch: عدد التحديثات في كل دفعة)"""
+        buffer = []
+        for tick in source:
+            buffer.append(tick)
+            if len(buffer) >= batch:
+                yield from self.apply(buffer)
+                buffer = []
+        if buffer:
+            yield from self.apply(buffer)
+
+    def snapshot(self) -> Dict:
+        """الحالة الكاملة الحالية (لعميل جديد قبل الاشتراك في الفروقات)"""
+        races = {}
+        for (race_number, number), (r, col) in self.slots.items():
+            price = float(self.prices[r, col])
+            edge = float(self.edge[r, col])
+            races.setdefault(race_number, []).append(dict(self._runner(r, col), **{
+                "odds": None if np.isnan(price) else price,
+                "market_probability": round(float(self.market[r, col]) * 100, 2),
+                "edge": None if np.isnan(edge) else round(edge, 1),
+                "value_rating": VALUE_LABELS[self.value_code[r, col]],
+                "stake": float(self.stakes[r, col])
+            }))
+        return {
+            "races": races,
+            "total_stake": round(float(self.stakes.sum()), 2),
+            "exposure_pct": round(float(self.stakes.sum()) / self.bankroll * 100, 2) if self.bankroll else 0.0
+        }
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prediction Store - مخزن الترشيحات (إضافة فقط، مضغوط، بنسخ متعددة)
+كل حفظ لاجتماع = نسخة جديدة تُضاف كإطار مضغوط واحد (gzip أو zstd) في نهاية المقطع الحالي
+داخل الإطار سطر JSON لكل سجل: رأس الاجتماع (race = 0) ثم سطر لكل شوط
+
+- الفهرس (track, date, race, version) → (المقطع، الإزاحة، الطول، السطر) في الذاكرة وفي index.jsonl
+  القراءة: بحث في القاموس ثم فك إطار واحد فقط
+- المقاطع ملفات gzip/zstd عادية (إطارات متتالية) تُقرأ تدفقياً سطراً بسطر (zcat يعمل عليها)
+- بعد انقطاع الكتابة: الإطارات غير المفهرسة تُستعاد، والإطار المبتور في النهاية يُحذف
+- الضغط (compact): إعادة كتابة المقاطع مع الاحتفاظ بآخر N نسخ لكل اجتماع
+- عدة نسخ من المخزن (أو عدة عمليات) على نفس المجلد: الكتابة تحت قفل ملف (index.lock)
+  تقرأ أولاً ما أضافه الآخرون إلى index.jsonl ثم تُعطي رقم النسخة التالي
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from file_lock import file_lock
+from tracing import current_span
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# امتداد المقطع لكل نوع ضغط
+CODECS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+SEGMENT_RE = re.compile(r"^(\d{6})\.jsonl\.(gz|zst)$")
+INDEX_FILE = "index.jsonl"
+# قفل الكتابة بين نسخ المخزن والعمليات (ملف جانبي: الضغط يستبدل index.jsonl)
+LOCK_FILE = "index.lock"
+
+# رقم "الشوط" لسجل رأس الاجتماع (NAP، توصيات المراهنات، التعديلات...)
+MEETING = 0
+
+# حجم المقطع قبل بدء مقطع جديد
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+
+def _codec_of(segment: str) -> str:
+    return "zstd" if segment.endswith(".zst") else "gzip"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompressor(codec: str):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(zlib.MAX_WBITS | 16)
+
+
+def _frames(data: bytes, codec: str, start: int = 0) -> Iterator[Tuple[int, int, bytes]]:
+    """الإطارات الكاملة في بيانات مقطع: (الإزاحة، الطول، المحتوى) - يتوقف عند إطار مبتور"""
+    errors = (zlib.error, zstandard.ZstdError) if ZSTD_AVAILABLE else (zlib.error,)
+    pos = start
+    while pos < len(data):
+        decoder = _decompressor(codec)
+        try:
+            payload = decoder.decompress(data[pos:])
+        except errors:
+            return
+        if not decoder.eof:
+            return
+        length = len(data) - pos - len(decoder.unused_data)
+        yield pos, length, payload
+        pos += length
+
+
+class PredictionStore:
+    """مخزن ترشيحات بإضافة فقط مع فهرس (track, date, race, version)"""
+
+    def __init__(self, store_dir: str, codec: str = "gzip", max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        if codec not in CODECS:
+            raise ValueError(f"نوع ضغط غير معروف: {codec}")
+        if codec == "zstd" and not ZSTD_AVAILABLE:
+            print("⚠️ zstandard غير مثبت - سيتم استخدام gzip")
+            codec = "gzip"
+        self.store_dir = store_dir
+        self.codec = codec
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        # (track, date, race, version) -> (segment, offset, length, line)
+        self._index: Dict[Tuple[str, str, int, int], Tuple[str, int, int, int]] = {}
+        # (track, date) -> [(version, saved_at), ...] تصاعدياً
+        self._versions: Dict[Tuple[str, str], List[Tuple[int, str]]] = {}
+        # ما قُرئ من index.jsonl: (رقم الملف inode، عدد البايتات) - لقراءة الإضافات الجديدة فقط
+        self._index_ino = None
+        self._index_pos = 0
+        self._open()
+
+    # ---------- الفهرس ----------
+
+    def _segments(self) -> List[str]:
+        """أسماء المقاطع بالترتيب"""
+        if not os.path.isdir(self.store_dir):
+            return []
+        return sorted(name for name in os.listdir(self.store_dir) if SEGMENT_RE.match(name))
+
+    def _add_block(self, entry: Dict) -> bool:
+        """إضافة إطار (نسخة اجتماع) إلى الفهرس في الذاكرة - False إن كانت النسخة مفهرسة مسبقاً"""
+        meeting = (entry["track"], entry["date"])
+        versions = self._versions.setdefault(meeting, [])
+        if any(version == entry["version"] for version, _ in versions):
+            return False
+        versions.append((entry["version"], entry["saved_at"]))
+        versions.sort()
+        for line, race in enumerate(entry["races"]):
+            self._index[(entry["track"], entry["date"], race, entry["version"])] = (
+                entry["segment"], entry["offset"], entry["length"], line)
+        return True
+
+    @staticmethod
+    def _block_entry(segment: str, offset: int, length: int, payload: bytes) -> Optional[Dict]:
+        """مدخل الفهرس لإطار من محتواه (None = إطار تالف)"""
+        try:
+            records = [json.loads(line) for line in payload.decode("utf-8").splitlines() if line]
+            head = records[0]
+        except (ValueError, IndexError):
+            return None
+        return {"segment": segment, "offset": offset, "length": length, "track": head["track"],
+                "date": head["date"], "version": head["version"], "saved_at": head["saved_at"],
+                "races": [record["race"] for record in records]}
+
+    def _open(self):
+        """تحميل الفهرس واستعادة الإطارات غير المفهرسة (انقطاع بين كتابة الإطار والفهرس)"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        with self._lock, file_lock(os.path.join(self.store_dir, LOCK_FILE)):
+            # بقايا ضغط لم يكتمل
+            for name in os.listdir(self.store_dir):
+                if name.endswith(".tmp"):
+                    os.remove(os.path.join(self.store_dir, name))
+
+            segments = self._segments()
+            ends = {name: 0 for name in segments}
+            index_path = os.path.join(self.store_dir, INDEX_FILE)
+            if os.path.exists(index_path):
+                # سطر مبتور في نهاية الفهرس يُحذف - الإطار نفسه يُستعاد من المقطع
+                with open(index_path, "r+b") as f:
+                    size = f.seek(0, os.SEEK_END)
+                    if size:
+                        f.seek(size - 1)
+                        if f.read(1) != b"\n":
+                            f.seek(0)
+                            f.truncate(f.read().rfind(b"\n") + 1)
+            for entry in self._read_index():
+                if entry["segment"] not in ends:
+                    # الفهرس يشير لمقطع غير موجود: إعادة بناء كاملة من المقاطع
+                    self._rebuild(segments)
+                    return
+                self._add_block(entry)
+                ends[entry["segment"]] = max(ends[entry["segment"]], entry["offset"] + entry["length"])
+
+            recovered = []
+            for name in segments:
+                if _codec_of(name) == "zstd" and not ZSTD_AVAILABLE:
+                    continue
+                path = os.path.join(self.store_dir, name)
+                size = os.path.getsize(path)
+                if size < ends[name]:
+                    self._rebuild(segments)
+                    return
+                if size == ends[name]:
+                    continue
+                with open(path, "rb") as f:
+                    data = f.read()
+                good = ends[name]
+                for offset, length, payload in _frames(data, _codec_of(name), ends[name]):
+                    entry = self._block_entry(name, offset, length, payload)
+                    if entry is None:
+                        break
+                    if self._add_block(entry):
+                        recovered.append(entry)
+                    good = offset + length
+                if good < size:
+                    # إطار مبتور في نهاية المقطع (انقطاع أثناء الكتابة)
+                    with open(path, "r+b") as f:
+                        f.truncate(good)
+
+            if recovered:
+                self._append_index(recovered)
+
+    def _read_index(self) -> List[Dict]:
+        """مدخلات index.jsonl الجديدة منذ آخر قراءة (قراءة كاملة إذا استبدله الضغط)"""
+        path = os.path.join(self.store_dir, INDEX_FILE)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return []
+        if stat.st_ino != self._index_ino or stat.st_size < self._index_pos:
+            self._index.clear()
+            self._versions.clear()
+            self._index_ino, self._index_pos = stat.st_ino, 0
+        if stat.st_size == self._index_pos:
+            return []
+
+        with open(path, "rb") as f:
+            f.seek(self._index_pos)
+            data = f.read()
+        # الأسطر الكاملة فقط (كاتب آخر قد يكون في منتصف سطر)
+        data = data[:data.rfind(b"\n") + 1]
+        self._index_pos += len(data)
+        entries = []
+        for line in data.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return entries
+
+    def _sync(self):
+        """التقاط النسخ التي أضافتها نسخ أخرى من المخزن منذ آخر قراءة"""
+        with self._lock:
+            for entry in self._read_index():
+                self._add_block(entry)
+
+    def _rebuild(self, segments: List[str]):
+        """إعادة بناء الفهرس بالكامل من المقاطع"""
+        self._index.clear()
+        self._versions.clear()
+        entries = []
+        for name in segments:
+            if _codec_of(name) == "zstd" and not ZSTD_AVAILABLE:
+                print(f"⚠️ zstandard غير مثبت - تخطي المقطع {name}")
+                continue
+            with open(os.path.join(self.store_dir, name), "rb") as f:
+                data = f.read()
+            for offset, length, payload in _frames(data, _codec_of(name)):
+                entry = self._block_entry(name, offset, length, payload)
+                if entry is None:
+                    break
+                if self._add_block(entry):
+                    entries.append(entry)
+        self._write_index(os.path.join(self.store_dir, INDEX_FILE), entries)
+
+    def _append_index(self, entries: List[Dict]):
+        """إضافة مدخلات إلى الفهرس (تحت قفل الملف وبعد قراءة كل ما سبقها)"""
+        path = os.path.join(self.store_dir, INDEX_FILE)
+        with open(path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        stat = os.stat(path)
+        self._index_ino, self._index_pos = stat.st_ino, stat.st_size
+
+    def _write_index(self, path: str, entries: List[Dict]):
+        """كتابة فهرس كامل (ذرية)"""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        os.replace(tmp, path)
+        stat = os.stat(path)
+        self._index_ino, self._index_pos = stat.st_ino, stat.st_size
+
+    # ---------- الكتابة ----------
+
+    def _active_segment(self) -> str:
+        """المقطع الحالي للكتابة (جديد إذا امتلأ أو اختلف نوع الضغط)"""
+        segments = self._segments()
+        if segments:
+            last = segments[-1]
+            path = os.path.join(self.store_dir, last)
+            if _codec_of(last) == self.codec and os.path.getsize(path) < self.max_segment_bytes:
+                return last
+            number = int(SEGMENT_RE.match(last).group(1)) + 1
+        else:
+            number = 1
+        return f"{number:06d}{CODECS[self.codec]}"
+
+    def put(self, predictions: Dict) -> int:
+        """إضافة نسخة جديدة من ترشيحات اجتماع - تُعيد رقم النسخة"""
+        track = predictions.get("track", "unknown")
+        date = predictions.get("date", "today")
+        saved_at = datetime.now().isoformat(timespec="seconds")
+
+        with self._lock, file_lock(os.path.join(self.store_dir, LOCK_FILE)):
+            # ما أضافته نسخ/عمليات أخرى أولاً، ثم رقم النسخة التالي
+            for entry in self._read_index():
+                self._add_block(entry)
+            versions = self._versions.get((track, date))
+            version = versions[-1][0] + 1 if versions else 1
+
+            def record(race: int, data: Dict) -> str:
+                return json.dumps({"track": track, "date": date, "race": race, "version": version,
+                                   "saved_at": saved_at, "data": data},
+                                  ensure_ascii=False, separators=(",", ":"))
+
+            header = {key: value for key, value in predictions.items() if key != "races"}
+            races = predictions.get("races", [])
+            lines = [record(MEETING, header)] + [record(race["race_number"], race) for race in races]
+            blob = _compress(("\n".join(lines) + "\n").encode("utf-8"), self.codec)
+
+            segment = self._active_segment()
+            with open(os.path.join(self.store_dir, segment), "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(blob)
+
+            entry = {"segment": segment, "offset": offset, "length": len(blob), "track": track,
+                     "date": date, "version": version, "saved_at": saved_at,
+                     "races": [MEETING] + [race["race_number"] for race in races]}
+            self._add_block(entry)
+            self._append_index([entry])
+        current_span().add("bytes_written", len(blob))
+        return version
+
+    # ---------- القراءة ----------
+
+    def _read_block(self, segment: str, offset: int, length: int) -> List[Dict]:
+        """فك إطار واحد فقط"""
+        with open(os.path.join(self.store_dir, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        decoder = _decompressor(_codec_of(segment))
+        payload = decoder.decompress(data)
+        return [json.loads(line) for line in payload.decode("utf-8").splitlines() if line]
+
+    def versions(self, track: str, date: str) -> List[Dict]:
+        """كل نسخ اجتماع: [{"version", "saved_at"}]"""
+        self._sync()
+        return [{"version": version, "saved_at": saved_at}
+                for version, saved_at in self._versions.get((track, date), [])]
+
+    def latest_version(self, track: str, date: str) -> Optional[int]:
+        self._sync()
+        return self._latest(track, date)
+
+    def _latest(self, track: str, date: str) -> Optional[int]:
+        versions = self._versions.get((track, date))
+        return versions[-1][0] if versions else None
+
+    def get(self, track: str, date: str, race: Optional[int] = None,
+            version: Optional[int] = None) -> Optional[Dict]:
+        """شوط واحد (race) أو وثيقة الاجتماع كاملة (race=None) - آخر نسخة افتراضياً"""
+        self._sync()
+        version = self._latest(track, date) if version is None else version
+        location = self._index.get((track, date, MEETING if race is None else race, version))
+        if location is None:
+            return None
+        segment, offset, length, line = location
+        records = self._read_block(segment, offset, length)
+        if race is not None:
+            return records[line]["data"]
+
+        predictions = dict(records[0]["data"])
+        predictions["races"] = [record["data"] for record in records[1:]]
+        predictions["version"] = version
+        predictions["saved_at"] = records[0]["saved_at"]
+        return predictions
+
+    def _open_segment(self, segment: str):
+        """قراءة مقطع كنص تدفقياً (كل الإطارات، بدون تحميل الملف كاملاً)"""
+        path = os.path.join(self.store_dir, segment)
+        if _codec_of(segment) == "zstd":
+            raw = open(path, "rb")
+            reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(reader, encoding="utf-8")
+        return gzip.open(path, "rt", encoding="utf-8")
+
+    def iter_records(self, track: Optional[str] = None, date: Optional[str] = None,
+                     race: Optional[int] = None, latest_only: bool = False) -> Iterator[Dict]:
+        """كل السجلات بترتيب الكتابة (مع تصفية اختيارية) - سطراً بسطر"""
+        self._sync()
+        for segment in self._segments():
+            if _codec_of(segment) == "zstd" and not ZSTD_AVAILABLE:
+                print(f"⚠️ zstandard غير مثبت - تخطي المقطع {segment}")
+                continue
+            with self._open_segment(segment) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if track is not None and record["track"] != track:
+                        continue
+                    if date is not None and record["date"] != date:
+                        continue
+                    if race is not None and record["race"] != race:
+                        continue
+                    if latest_only and record["version"] != self._latest(record["track"], record["date"]):
+                        continue
+                    yield record
+
+    # ---------- الضغط ----------
+
+    def compact(self, keep_versions: Optional[int] = None, codec: Optional[str] = None) -> Dict:
+        """إعادة كتابة المقاطع (آخر keep_versions نسخ لكل اجتماع، None = كل النسخ)
+
+        المقاطع الجديدة تُكتب مؤقتاً ثم يُستبدل الفهرس (نقطة الالتزام) ثم تُحذف القديمة
+        """
+        with self._lock, file_lock(os.path.join(self.store_dir, LOCK_FILE)):
+            # نسخ أضافتها عمليات أخرى تدخل في الضغط أيضاً
+            for entry in self._read_index():
+                self._add_block(entry)
+            old_segments = self._segments()
+            bytes_before = sum(os.path.getsize(os.path.join(self.store_dir, name)) for name in old_segments)
+            if codec is not None:
+                self.codec = codec if codec != "zstd" or ZSTD_AVAILABLE else "gzip"
+
+            number = int(SEGMENT_RE.match(old_segments[-1]).group(1)) + 1 if old_segments else 1
+            entries, written, dropped = [], [], 0
+            segment, handle = None, None
+            try:
+                for (track, date), versions in sorted(self._versions.items()):
+                    kept = versions if keep_versions is None else versions[-keep_versions:]
+                    dropped += len(versions) - len(kept)
+                    for version, saved_at in kept:
+                        location = self._index[(track, date, MEETING, version)]
+                        records = self._read_block(*location[:3])
+                        payload = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n"
+                                          for r in records)
+                        blob = _compress(payload.encode("utf-8"), self.codec)
+
+                        if handle is None or handle.tell() >= self.max_segment_bytes:
+                            if handle is not None:
+                                handle.close()
+                            segment = f"{number:06d}{CODECS[self.codec]}"
+                            number += 1
+                            written.append(segment)
+                            handle = open(os.path.join(self.store_dir, segment + ".tmp"), "wb")
+                        offset = handle.tell()
+                        handle.write(blob)
+                        entries.append({"segment": segment, "offset": offset, "length": len(blob),
+                                        "track": track, "date": date, "version": version,
+                                        "saved_at": saved_at, "races": [r["race"] for r in records]})
+            finally:
+                if handle is not None:
+                    handle.close()
+
+            self._write_index(os.path.join(self.store_dir, INDEX_FILE), entries)
+            for name in written:
+                os.replace(os.path.join(self.store_dir, name + ".tmp"), os.path.join(self.store_dir, name))
+            for name in old_segments:
+                os.remove(os.path.join(self.store_dir, name))
+
+            self._index.clear()
+            self._versions.clear()
+            for entry in entries:
+                self._add_block(entry)
+
+        return {
+            "segments_before": len(old_segments),
+            "segments_after": len(written),
+            "bytes_before": bytes_before,
+            "bytes_after": sum(os.path.getsize(os.path.join(self.store_dir, name)) for name in written),
+            "versions_dropped": dropped
+        }
+
+    def summary(self) -> Dict:
+        """إحصائيات المخزن"""
+        self._sync()
+        segments = self._segments()
+        return {
+            "meetings": len(self._versions),
+            "versions": sum(len(v) for v in self._versions.values()),
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(os.path.join(self.store_dir, name)) for name in segments)
+        }
@@ -9,30 +9,38 @@ Version: 1.0.0
 
 import os
 import json
+import atexit
+import contextvars
+import threading
 import time
 import random
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
-    print("⚠️ Selenium غير مثبت - سيتم استخدام وضع المحاكاة")
-
-try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
-except ImportError:
-    PANDAS_AVAILABLE = False
-    print("⚠️ Pandas غير مثبت")
+from importlib.util import find_spec
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Selenium يُستورد فقط عند تشغيل متصفح فعلاً (وضع المحاكاة و HTTP لا يحتاجانه)
+SELENIUM_AVAILABLE = find_spec("selenium") is not None
+
+import numpy as np
+
+from racecard import Horse, Race, RaceCard, RaceCardBuilder, StringPool
+from strength_index import StrengthIndex
+from runner_stats import RunnerStats
+from form_features import form_score, form_scores
+from browser_pool import BrowserPool
+from harville import MAX_TENSOR_CELLS, place_terms, race_probabilities, top_combinations
+from race_simulator import simulate_card
+from odds_stream import PriceBook, ReplaySource
+from prediction_store import PredictionStore
+from staking import solve_card
+from tracing import TRACER, span
+from tickets import iter_accumulators, iter_tickets, race_coverage, top_k
+from http_fetch import HttpFetcher, SourceStats, parse_racecard_html, sources_for
+from racecard_cache import SIMULATED_SOURCE, RacecardCache
+from score_cache import ScoreCache, extract_race, model_key, race_keys, restore_race
+from tracks import RACETRACKS
+from weight_trainer import ONLINE_FILE, load_online_weights, load_weights as load_published_weights
 
 
 # ===============================
@@ -42,30 +50,116 @@ CONFIG = {
     "chrome_driver_path": r"C:\Users\Elghali Ali\chromedriver.exe",
     "output_dir": os.path.join(os.path.dirname(__file__), "output"),
     "data_dir": os.path.join(os.path.dirname(__file__), "data"),
+    "strength_index_path": os.path.join(os.path.dirname(__file__), "data", "strength_index.json"),
+    # إحصائيات الفوز المنكمشة (الثنائي فارس × مدرب، الحصان × المضمار، الحصان × فئة المسافة) - انظر runner_stats.py
+    "runner_stats": {
+        "enabled": True,
+        "path": os.path.join(os.path.dirname(__file__), "data", "runner_stats.json"),
+        "prior_rides": {},          # تثبيت المشاركات الوهمية κ لنوع (انظر runner_stats.PRIOR_RIDES)
+        "fit_prior": True,          # تقدير κ لبقية الأنواع من تباين المعدلات (عند التحميل ومع كل نتائج)
+        "poll_seconds": 1.0,        # أقل فترة بين فحصين للملف (نتائج سجلها LearningEngine أو عملية أخرى)
+        # العامل ← نوع الإحصائية التي تعدله (قيمة العامل الحالية هي نقطة البداية قبل أي مشاركة)
+        "factors": {"jockey": "jockey_trainer", "trainer": "trainer", "distance": "distance_band",
+                    "surface": "course"}
+    },
+    # أوزان العوامل المدربة (weight_trainer.py): None = آخر نسخة منشورة، 0 = الأوزان الافتراضية
+    "weights_dir": os.path.join(os.path.dirname(__file__), "data", "weights"),
+    "weights_version": None,
+    # التعلم المستمر: أوزان LearningEngine(online=True) تُلتقط بين الأشواط بدون إعادة تشغيل
+    "online_weights": {
+        "enabled": True,
+        "poll_seconds": 1.0         # أقل فترة بين فحصين لملف online.json
+    },
+    # مجمع المتصفحات
+    "browser_pool_size": 2,         # أقصى عدد متصفحات مفتوحة
+    "browser_max_age": 600,         # إعادة تدوير المتصفح بعد 10 دقائق
+    "browser_max_uses": 50,         # أو بعد 50 صفحة
+    "browser_acquire_timeout": 60,  # أقصى انتظار لمتصفح متاح
+    "page_timeout": 15,             # أقصى انتظار لجاهزية الصفحة
+    "racecard_selector": None,      # عنصر CSS يدل على اكتمال تحميل البطاقة (اختياري)
+    # جلب HTTP
+    "http_pool_size": 8,            # عدد الاتصالات المفتوحة لكل مضيف
+    "http_timeout": 10,
+    # الاحتمالات (انظر harville.py)
+    "softmax_temperature": 8.0,     # درجة حرارة Softmax (تُعاير من النتائج عبر calibrate_temperature)
+    "exotic_depth": 3,              # عدد المراكز المحسوبة (3 = حتى Trifecta)
+    "exotic_top": 3,                # عدد أفضل ترتيبات Exacta/Trifecta لكل شوط
+    # احتمالات المراكز: "harville" (تحليلي) أو "simulation" (مونت كارلو - race_simulator.py)
+    "place_model": "harville",
+    "simulation_sims": 100_000,
+    "simulation_distribution": "gumbel",
+    "simulation_spread": None,      # None = نفس درجة حرارة Softmax
+    "simulation_workers": 0,
+    # حساب الرهانات (كيلي) - انظر staking.py
+    "staking": {
+        "bankroll": 1000.0,
+        "kelly_fraction": 0.25,     # ربع كيلي
+        "race_cap": 0.05,           # أقصى 5% من رأس المال في شوط واحد
+        "max_exposure": 0.20,       # أقصى 20% على البطاقة كاملة
+        "min_stake": 1.0,
+        "risk_horizon": 100,        # عدد البطاقات في محاكاة خطر الإفلاس
+        "risk_paths": 2000,
+        "ruin_level": 0.5           # الإفلاس = خسارة نصف رأس المال
+    },
+    # تدفق الأسعار - انظر odds_stream.py
+    "odds_stream": {
+        "batch": 1,                 # عدد التحديثات في كل دفعة إعادة حساب
+        "stake_tolerance": 0.5      # أقل تغير في الرهان يُرسل كفرق
+    },
+    # تذاكر الأشواط المتعددة (Placepot / Pick 6 / Accumulator) - انظر tickets.py
+    "tickets": {
+        "legs": 6,                  # عدد الأشواط الافتراضي (أول 6 أشواط)
+        "unit_stake": 1.0,          # قيمة الخط الواحد
+        "max_lines": 64,            # أقصى عدد خطوط للتذكرة
+        "top": 5
+    },
+    # مخزن الترشيحات (إضافة فقط، نسخة لكل حفظ) - انظر prediction_store.py
+    "store_dir": os.path.join(os.path.dirname(__file__), "data", "predictions"),
+    "store_codec": "gzip",          # gzip أو zstd (يتطلب zstandard)
+    "export_json": False,           # حفظ نسخة JSON مقروءة في output_dir أيضاً
+    # قياس زمن المراحل (جلب، تحليل، مراهنات، حفظ) - انظر tracing.py
+    "tracing": {
+        "enabled": False,
+        "path": None,               # ملف JSON lines للمراحل (None = ملخص في الذاكرة فقط)
+        "format": "jsonl"           # jsonl أو otlp (سجلات OpenTelemetry)
+    },
+    # وثيقة الترشيحات: أفضل top_n فقط افتراضياً، والحقل الكامل يبقى في البطاقة (انظر race_field)
+    "predictions": {
+        "top_n": 5,
+        "full_field": False,        # كل المتسابقين في الوثيقة
+        "factors": False            # تفصيل العوامل لكل حصان
+    },
+    # ذاكرة نتائج التقييم لكل شوط (مفتاح = محتوى الشوط + بصمة النموذج) - انظر score_cache.py
+    "score_cache": {
+        "enabled": True,
+        "max_races": 20000,         # طبقة الذاكرة (عدد أشواط)
+        "disk_dir": None,           # مجلد مشترك بين العمليات (None = الذاكرة فقط)
+        "disk_max_mb": 200
+    },
+    # ذاكرة البطاقات على القرص
+    "cache_dir": os.path.join(os.path.dirname(__file__), "data", "cache"),
+    "cache_max_mb": 200,            # الحد الأقصى لحجم الذاكرة (يُحذف الأقدم استخداماً)
+    "cache_ttl": {},                # تعديل مدد الصلاحية (انظر racecard_cache.DEFAULT_TTL)
     "sources": {
         "emirates_racing": "https://www.emiratesracing.com",
         "tipmeerkat": "https://tipmeerkat.com/tracks#country-united-arab-emirates",
         "attheraces": "https://www.attheraces.com"
+    },
+    # مصادر البطاقات: HTTP أولاً، والمتصفح فقط للمصادر التي تحتاج JavaScript
+    "racecard_sources": {
+        "emirates_racing": {
+            "url": "https://www.emiratesracing.com/racecard/{track}/{date}",
+            "countries": ["UAE"],
+            "needs_js": True
+        },
+        "attheraces": {
+            "url": "https://www.attheraces.com/racecard/{track}/{date}",
+            "countries": ["UK"],
+            "needs_js": False
+        }
     }
 }
 
-# بيانات المضامير
-RACETRACKS = {
-    "UAE": [
-        {"id": "meydan", "name": "Meydan Racecourse", "city": "Dubai"},
-        {"id": "jebel_ali", "name": "Jebel Ali Racecourse", "city": "Dubai"},
-        {"id": "al_ain", "name": "Al Ain Racecourse", "city": "Al Ain"},
-        {"id": "abu_dhabi", "name": "Abu Dhabi Equestrian Club", "city": "Abu Dhabi"},
-        {"id": "sharjah", "name": "Sharjah Equestrian", "city": "Sharjah"}
-    ],
-    "UK": [
-        {"id": "wolverhampton", "name": "Wolverhampton Racecourse", "city": "Wolverhampton"},
-        {"id": "lingfield", "name": "Lingfield Park", "city": "Lingfield"},
-        {"id": "kempton", "name": "Kempton Park", "city": "Sunbury"},
-        {"id": "newcastle", "name": "Newcastle Racecourse", "city": "Newcastle"}
-    ]
-}
-
 # أسماء الخيول للتوليد
 HORSE_NAMES = [
     "Thunder Strike", "Golden Arrow", "Speed Demon", "Night Rider", "Storm Chaser",
@@ -89,125 +183,121 @@ TRAINERS = [
 ]
 
 
-# ===============================
-# فئة الحصان
-# ===============================
-class Horse:
-    """فئة الحصان مع جميع بياناته"""
-    
-    def __init__(self, number: int, name: str, draw: int = 0, 
-                 jockey: str = "", trainer: str = "", rating: int = 0,
-                 weight: int = 0, form: str = "", surface: str = "",
-                 distance: int = 0, pedigree: str = ""):
-        self.number = number
-        self.name = name
-        self.draw = draw
-        self.jockey = jockey
-        self.trainer = trainer
-        self.rating = rating
-        self.weight = weight
-        self.form = form
-        self.surface = surface
-        self.distance = distance
-        self.pedigree = pedigree
-        
-        # النتائج المحسوبة
-        self.power_score = 0
-        self.win_probability = 0.0
-        self.value_rating = ""
-        self.strengths = []
-        self.concerns = []
-        
-    def to_dict(self) -> Dict:
-        """تحويل إلى قاموس"""
-        return {
-            "number": self.number,
-            "name": self.name,
-            "draw": self.draw,
-            "jockey": self.jockey,
-            "trainer": self.trainer,
-            "rating": self.rating,
-            "weight": self.weight,
-            "form": self.form,
-            "power_score": self.power_score,
-            "win_probability": self.win_probability,
-            "value_rating": self.value_rating,
-            "strengths": self.strengths,
-            "concerns": self.concerns
-        }
-
-
-# ===============================
-# فئة السباق
-# ===============================
-class Race:
-    """فئة السباق"""
-    
-    def __init__(self, race_number: int, race_name: str, race_time: str,
-                 distance: int, surface: str, going: str = ""):
-        self.race_number = race_number
-        self.race_name = race_name
-        self.race_time = race_time
-        self.distance = distance
-        self.surface = surface
-        self.going = going
-        self.horses: List[Horse] = []
-        self.analysis = ""
-        self.withdrawals = []
-        
-    def add_horse(self, horse: Horse):
-        """إضافة حصان للسباق"""
-        self.horses.append(horse)
-        
-    def to_dict(self) -> Dict:
-        """تحويل إلى قاموس"""
-        return {
-            "race_number": self.race_number,
-            "race_name": self.race_name,
-            "race_time": self.race_time,
-            "distance": self.distance,
-            "surface": self.surface,
-            "going": self.going,
-            "predictions": [h.to_dict() for h in self.horses],
-            "analysis": self.analysis,
-            "withdrawals": self.withdrawals
-        }
-
-
 # ===============================
 # محرك جمع البيانات
 # ===============================
 class DataEngine:
     """محرك جمع البيانات من المواقع الرسمية"""
     
-    def __init__(self, headless: bool = True):
+    def __init__(self, headless: bool = True, pool: StringPool = None,
+                 use_cache: bool = True, refresh: bool = False):
         self.headless = headless
         self.driver = None
+        # مخزن نصوص مشترك بين كل البطاقات المولدة (أسماء، فرسان، مدربين)
+        self.pool = pool if pool is not None else StringPool()
+        # use_cache=False: بدون قراءة أو كتابة | refresh=True: تجاهل المخزن وإعادة الجلب
+        self.use_cache = use_cache
+        self.refresh = refresh
+        
+    # مجمعات المتصفحات المشتركة بين كل المحركات (حسب وضع headless)
+    _browser_pools: Dict[bool, BrowserPool] = {}
+    _browser_pools_lock = threading.Lock()
+    
+    # عميل HTTP وإحصائيات المصادر المشتركة
+    _http_fetcher: Optional[HttpFetcher] = None
+    source_stats = SourceStats()
+    
+    # ذاكرة البطاقات المشتركة
+    _racecard_cache: Optional[RacecardCache] = None
+    
+    @staticmethod
+    def _create_driver(headless: bool = True):
+        """تشغيل متصفح Chrome جديد"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        
+        options = Options()
+        if headless:
+            options.add_argument("--headless")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--window-size=1920,1080")
+        
+        # البحث عن ChromeDriver
+        driver_path = CONFIG["chrome_driver_path"]
+        if not os.path.exists(driver_path):
+            # محاولة العثور على chromedriver في PATH
+            driver_path = "chromedriver"
         
+        service = Service(driver_path)
+        driver = webdriver.Chrome(service=service, options=options)
+        print("✅ تم تهيئة المتصفح بنجاح")
+        return driver
+    
+    @classmethod
+    def get_browser_pool(cls, headless: bool = True) -> BrowserPool:
+        """مجمع المتصفحات المشترك (يُنشأ عند أول استخدام)"""
+        with cls._browser_pools_lock:
+            pool = cls._browser_pools.get(headless)
+            if pool is None:
+                pool = BrowserPool(
+                    factory=lambda: cls._create_driver(headless),
+                    size=CONFIG["browser_pool_size"],
+                    max_age=CONFIG["browser_max_age"],
+                    max_uses=CONFIG["browser_max_uses"]
+                )
+                cls._browser_pools[headless] = pool
+            return pool
+    
+    @classmethod
+    def close_browser_pools(cls):
+        """إغلاق كل المتصفحات المفتوحة"""
+        with cls._browser_pools_lock:
+            pools = list(cls._browser_pools.values())
+            cls._browser_pools.clear()
+        for pool in pools:
+            pool.close()
+    
+    @classmethod
+    def get_http_fetcher(cls) -> HttpFetcher:
+        """عميل HTTP المشترك (يُنشأ عند أول استخدام)"""
+        with cls._browser_pools_lock:
+            if cls._http_fetcher is None:
+                cls._http_fetcher = HttpFetcher(CONFIG["http_pool_size"], CONFIG["http_timeout"])
+            return cls._http_fetcher
+    
+    @classmethod
+    def fetch_stats(cls) -> Dict:
+        """نسبة النجاح والزمن لكل مصدر (http / browser)"""
+        return cls.source_stats.summary()
+    
+    @classmethod
+    def get_racecard_cache(cls) -> RacecardCache:
+        """ذاكرة البطاقات المشتركة (تُنشأ عند أول استخدام)"""
+        with cls._browser_pools_lock:
+            if cls._racecard_cache is None:
+                cls._racecard_cache = RacecardCache(
+                    CONFIG["cache_dir"],
+                    max_bytes=int(CONFIG["cache_max_mb"] * 1024 * 1024),
+                    ttl=CONFIG["cache_ttl"]
+                )
+            return cls._racecard_cache
+    
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        """عدادات ذاكرة البطاقات (hits / misses / expired / evictions ...)"""
+        return cls.get_racecard_cache().summary()
+    
     def init_driver(self):
-        """تهيئة المتصفح"""
+        """تهيئة متصفح خاص بهذا المحرك (خارج المجمع)"""
         if not SELENIUM_AVAILABLE:
             print("⚠️ Selenium غير متاح - استخدام وضع المحاكاة")
             return False
             
         try:
-            options = Options()
-            if self.headless:
-                options.add_argument("--headless")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--window-size=1920,1080")
-            
-            # البحث عن ChromeDriver
-            driver_path = CONFIG["chrome_driver_path"]
-            if not os.path.exists(driver_path):
-                # محاولة العثور على chromedriver في PATH
-                driver_path = "chromedriver"
-            
-            service = Service(driver_path)
-            self.driver = webdriver.Chrome(service=service, options=options)
-            print("✅ تم تهيئة المتصفح بنجاح")
+            self.driver = self._create_driver(self.headless)
             return True
         except Exception as e:
             print(f"❌ فشل تهيئة المتصفح: {e}")
@@ -219,42 +309,130 @@ class DataEngine:
             self.driver.quit()
             self.driver = None
     
+    @staticmethod
+    def _wait_until_ready(driver):
+        """انتظار جاهزية الصفحة بدلاً من انتظار ثابت"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        
+        wait = WebDriverWait(driver, CONFIG["page_timeout"])
+        wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
+        if CONFIG.get("racecard_selector"):
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, CONFIG["racecard_selector"])))
+    
     def fetch_racecard(self, track: str, date: str) -> Dict:
         """جلب بطاقة السباق"""
         print(f"🔍 جلب بيانات السباق: {track} - {date}")
         
-        # محاولة استخدام Selenium
-        if self.init_driver():
-            try:
-                url = f"https://www.emiratesracing.com/racecard/{track}/{date}"
-                self.driver.get(url)
-                time.sleep(3)
-                
-                # استخراج البيانات الأساسية
-                data = self._parse_racecard_page()
-                self.close_driver()
+        with span("fetch", track=track, date=date) as stage:
+            data = self._fetch_racecard(track, date, stage)
+            stage.set("source", data.get("source", ""))
+            return data
+    
+    def _fetch_racecard(self, track: str, date: str, stage) -> Dict:
+        """الذاكرة المحلية ثم المصادر ثم المحاكاة (stage: مرحلة التتبع للعدادات)"""
+        source_ids = sources_for(track, RACETRACKS, CONFIG["racecard_sources"])
+        cache = self.get_racecard_cache() if self.use_cache else None
+        
+        # 1. الذاكرة المحلية (المصادر الحقيقية فقط)
+        if cache is not None and not self.refresh:
+            data = cache.lookup(source_ids, track, date, self.pool)
+            if data is not None:
+                stage.add("cache_hits")
+                print(f"💾 من الذاكرة المحلية ({data['source']})")
                 return data
-            except Exception as e:
-                print(f"⚠️ خطأ في جلب البيانات: {e}")
-                self.close_driver()
+            stage.add("cache_misses")
         
-        # استخدام البيانات المحاكاة
-        return self._generate_simulated_data(track, date)
+        # 2. المصادر
+        for source_id in source_ids:
+            with span("fetch.provider", provider=source_id) as provider:
+                data = self._fetch_from_source(source_id, track, date)
+                provider.set("success", bool(data.get("success")))
+            if data.get("success"):
+                self._store(cache, source_id, data)
+                return data
+        
+        # 3. البيانات المحاكاة: بطاقة المحاكاة المحفوظة (نفس الخيول بين المحاولات) بعد فشل
+        # المصادر الحقيقية فقط - فشل عابر لا يمنع إعادة المحاولة في الطلب التالي
+        if cache is not None and not self.refresh:
+            data = cache.get(SIMULATED_SOURCE, track, date, self.pool)
+            if data is not None:
+                stage.add("cache_hits")
+                print("💾 من الذاكرة المحلية (simulated)")
+                return data
+        with span("fetch.provider", provider=SIMULATED_SOURCE) as provider:
+            data = self._generate_simulated_data(track, date)
+            provider.set("success", bool(data.get("success")))
+        self._store(cache, SIMULATED_SOURCE, data)
+        return data
+    
+    @staticmethod
+    def _store(cache: Optional[RacecardCache], source_id: str, data: Dict):
+        """حفظ البطاقة في الذاكرة (الفشل هنا لا يوقف التحليل)"""
+        if cache is None:
+            return
+        try:
+            cache.put(source_id, data["track"], data["date"], data["card"])
+        except Exception as e:
+            print(f"⚠️ فشل حفظ البطاقة في الذاكرة: {e}")
+    
+    def _fetch_from_source(self, source_id: str, track: str, date: str) -> Dict:
+        """جلب من مصدر واحد: HTTP أولاً ثم المتصفح إن كان المصدر يحتاج JavaScript"""
+        source = CONFIG["racecard_sources"][source_id]
+        url = source["url"].format(track=track, date=date)
+        data = {"success": False, "message": "لا توجد طريقة جلب متاحة"}
+        
+        # 1. طلب HTTP عادي
+        http = self.get_http_fetcher()
+        if http.available:
+            start = time.perf_counter()
+            data = parse_racecard_html(http.fetch_page(url), track, date, self.pool)
+            self.source_stats.record(source_id, "http", data["success"], time.perf_counter() - start)
+            if data["success"]:
+                data["source"] = source_id
+                return data
+        
+        # 2. المتصفح (فقط للمصادر التي تحتاج JavaScript)
+        if source.get("needs_js"):
+            if not SELENIUM_AVAILABLE:
+                print("⚠️ Selenium غير متاح - استخدام وضع المحاكاة")
+                return data
+            start = time.perf_counter()
+            data = self._fetch_with_browser(url, track, date)
+            self.source_stats.record(source_id, "browser", data["success"], time.perf_counter() - start)
+            if data["success"]:
+                data["source"] = source_id
+        
+        return data
     
-    def _parse_racecard_page(self) -> Dict:
-        """تحليل صفحة السباق"""
-        # هذا سيُستكمل لاحقاً مع التحليل الفعلي
-        return {"success": False, "message": "Parsing not implemented"}
+    def _fetch_with_browser(self, url: str, track: str, date: str) -> Dict:
+        """جلب الصفحة عبر متصفح جاهز من المجمع"""
+        try:
+            pool = self.get_browser_pool(self.headless)
+            with pool.session(timeout=CONFIG["browser_acquire_timeout"]) as driver:
+                driver.get(url)
+                self._wait_until_ready(driver)
+                
+                # استخراج البيانات الأساسية
+                return self._parse_racecard_page(driver, track, date)
+        except Exception as e:
+            print(f"⚠️ خطأ في جلب البيانات: {e}")
+            return {"success": False, "message": str(e)}
+    
+    def _parse_racecard_page(self, driver, track: str, date: str) -> Dict:
+        """تحليل صفحة السباق بعد تنفيذ JavaScript"""
+        return parse_racecard_html(driver.page_source, track, date, self.pool)
     
     def _generate_simulated_data(self, track: str, date: str) -> Dict:
         """توليد بيانات محاكاة للسباق"""
         print("📊 توليد بيانات محاكاة...")
         
         num_races = random.randint(5, 7)
-        races = []
+        builder = RaceCardBuilder(track, date, self.pool)
         
         for r in range(1, num_races + 1):
-            race = Race(
+            builder.add_race(
                 race_number=r,
                 race_name=f"Race {r}",
                 race_time=f"{13 + r}:{'00' if r % 2 == 0 else '30'}",
@@ -265,7 +443,7 @@ class DataEngine:
             
             num_horses = random.randint(6, 12)
             for h in range(1, num_horses + 1):
-                horse = Horse(
+                builder.add_runner(
                     number=h,
                     name=random.choice(HORSE_NAMES) + (f" {h}" if h > 1 else ""),
                     draw=random.randint(1, num_horses),
@@ -275,19 +453,20 @@ class DataEngine:
                     weight=random.randint(52, 62),
                     form="".join([random.choice(["1", "2", "3", "4", "0", "-"]) for _ in range(5)])
                 )
-                race.add_horse(horse)
-            
-            races.append(race)
         
         return {
             "success": True,
             "track": track,
             "date": date,
-            "races": [r.to_dict() for r in races],
+            "card": builder.build(),
             "total_races": num_races
         }
 
 
+# إغلاق المتصفحات عند انتهاء البرنامج
+atexit.register(DataEngine.close_browser_pools)
+
+
 # ===============================
 # محرك التحليل والتقييم
 # ===============================
@@ -305,90 +484,201 @@ class PowerRatingEngine:
         "draw": 0.05         # بوابة الانطلاق
     }
     
+    # نسخة الأوزان المدربة المحملة (None = الأوزان الافتراضية أعلاه) وعدد تحديثات التعلم المستمر فوقها
+    WEIGHTS_VERSION: Optional[int] = None
+    ONLINE_UPDATES = 0
+    _weights_checked = float("-inf")
+    _online_mtime: Optional[int] = None
+    
+    # فهرس قوة الفرسان والمدربين (يُحمّل عند أول استخدام)
+    _strength_index: Optional[StrengthIndex] = None
+    
+    # إحصائيات المتسابقين المنكمشة (تُحمّل عند أول استخدام وتُعاد قراءتها عند تغير الملف)
+    _runner_stats: Optional[RunnerStats] = None
+    _stats_checked = float("-inf")
+    _stats_mtime: Optional[int] = None
+    
+    # نسبة الفوز إلى متوسط المجتمع التي تعطي 90 نقطة (مثل 25% مقابل 10% في فهرس القوة)
+    STATS_SCALE = 2.5
+    
     @staticmethod
-    def calculate_power_score(horse: Horse, race: Race) -> int:
-        """حساب نقاط القوة للحصان"""
-        score = 0
+    def load_weights(weights_dir: Optional[str] = None, version: Optional[int] = None) -> bool:
+        """تحميل مجموعة أوزان مدربة (الأوزان + درجة حرارة Softmax) - آخر نسخة افتراضياً
         
-        # 1. التقييم الرسمي (25%)
-        rating_score = min(horse.rating / 120 * 100, 100)
-        score += rating_score * PowerRatingEngine.WEIGHTS["rating"]
+        ذاكرة التقييم لا تحتاج مسحاً: الأوزان ودرجة الحرارة جزء من بصمة النموذج
+        """
+        published = load_published_weights(weights_dir or CONFIG["weights_dir"], version)
+        if published is None:
+            return False
+        if set(published["weights"]) != set(PowerRatingEngine.WEIGHTS):
+            print(f"⚠️ عوامل الأوزان المنشورة (نسخة {published['version']}) لا تطابق عوامل النموذج")
+            return False
+        PowerRatingEngine.WEIGHTS = {name: published["weights"][name] for name in PowerRatingEngine.WEIGHTS}
+        CONFIG["softmax_temperature"] = published["softmax_temperature"]
+        PowerRatingEngine.WEIGHTS_VERSION = published["version"]
+        PowerRatingEngine.ONLINE_UPDATES = 0
+        # نقطة حفظ التعلم المستمر تُقرأ من جديد مقابل النسخة المحملة
+        PowerRatingEngine._online_mtime = None
+        PowerRatingEngine._weights_checked = float("-inf")
+        return True
+    
+    @staticmethod
+    def refresh_weights() -> bool:
+        """التقاط أوزان التعلم المستمر الأحدث (online.json) - يُستدعى قبل كل تقييم
         
-        # 2. الفورمة الأخيرة (20%)
-        form_score = PowerRatingEngine._calculate_form_score(horse.form)
-        score += form_score * PowerRatingEngine.WEIGHTS["form"]
+        فحص وقت تعديل الملف فقط (مرة كل poll_seconds على الأكثر)، والقراءة عند تغيره.
+        نقطة الحفظ المبنية على نسخة أوزان غير المحملة تُتجاهل
+        """
+        settings = CONFIG["online_weights"]
+        if not settings["enabled"] or CONFIG["weights_version"] == 0:
+            return False
+        now = time.monotonic()
+        if now - PowerRatingEngine._weights_checked < settings["poll_seconds"]:
+            return False
+        PowerRatingEngine._weights_checked = now
         
-        # 3. الفارس (15%)
-        jockey_score = PowerRatingEngine._calculate_jockey_score(horse.jockey)
-        score += jockey_score * PowerRatingEngine.WEIGHTS["jockey"]
+        try:
+            mtime = os.stat(os.path.join(CONFIG["weights_dir"], ONLINE_FILE)).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == PowerRatingEngine._online_mtime:
+            return False
+        PowerRatingEngine._online_mtime = mtime
+        
+        state = load_online_weights(CONFIG["weights_dir"])
+        if state is None or state.get("base_version") != PowerRatingEngine.WEIGHTS_VERSION \
+                or set(state.get("weights", ())) != set(PowerRatingEngine.WEIGHTS):
+            return False
+        PowerRatingEngine.WEIGHTS = {name: state["weights"][name] for name in PowerRatingEngine.WEIGHTS}
+        CONFIG["softmax_temperature"] = state["softmax_temperature"]
+        PowerRatingEngine.ONLINE_UPDATES = state["updates"]
+        return True
+    
+    @staticmethod
+    def get_strength_index() -> StrengthIndex:
+        """فهرس القوة المشترك"""
+        if PowerRatingEngine._strength_index is None:
+            PowerRatingEngine._strength_index = StrengthIndex.load(CONFIG["strength_index_path"])
+        return PowerRatingEngine._strength_index
+    
+    @staticmethod
+    def get_runner_stats() -> RunnerStats:
+        """إحصائيات المتسابقين المشتركة - الملف الذي يكتبه كل من يسجل نتائج (المحلل و LearningEngine)
         
-        # 4. المدرب (15%)
-        trainer_score = PowerRatingEngine._calculate_trainer_score(horse.trainer)
-        score += trainer_score * PowerRatingEngine.WEIGHTS["trainer"]
+        فحص وقت تعديل الملف مرة كل poll_seconds على الأكثر، وإعادة القراءة عند تغيره
+        """
+        settings = CONFIG["runner_stats"]
+        now = time.monotonic()
+        if PowerRatingEngine._runner_stats is None or now - PowerRatingEngine._stats_checked >= settings["poll_seconds"]:
+            PowerRatingEngine._stats_checked = now
+            try:
+                mtime = os.stat(settings["path"]).st_mtime_ns
+            except OSError:
+                mtime = None
+            if PowerRatingEngine._runner_stats is None or mtime != PowerRatingEngine._stats_mtime:
+                PowerRatingEngine._set_runner_stats(RunnerStats.load(settings["path"], settings["prior_rides"]))
+        return PowerRatingEngine._runner_stats
+    
+    @staticmethod
+    def update_runner_stats(apply) -> RunnerStats:
+        """تعديل الملف المشترك تحت قفل (انظر RunnerStats.update_file) واعتماد النسخة الجديدة"""
+        settings = CONFIG["runner_stats"]
+        stats = RunnerStats.update_file(settings["path"], apply, settings["prior_rides"])
+        PowerRatingEngine._set_runner_stats(stats)
+        return stats
+    
+    @staticmethod
+    def _set_runner_stats(stats: RunnerStats):
+        """استبدال الإحصائيات المشتركة (مرجع واحد: التقييم الجاري يكمل بالنسخة التي بدأ بها)"""
+        try:
+            PowerRatingEngine._stats_mtime = os.stat(CONFIG["runner_stats"]["path"]).st_mtime_ns
+        except OSError:
+            PowerRatingEngine._stats_mtime = None
+        PowerRatingEngine.fit_runner_stats(stats)
+        PowerRatingEngine._runner_stats = stats
+    
+    @staticmethod
+    def fit_runner_stats(stats: Optional[RunnerStats] = None):
+        """تقدير κ للأنواع غير المثبتة في CONFIG (يغير بصمة الإحصائيات، فذاكرة التقييم تتجدد تلقائياً)"""
+        settings = CONFIG["runner_stats"]
+        if settings["fit_prior"]:
+            kinds = [kind for kind in settings["factors"].values() if kind not in settings["prior_rides"]]
+            stats = PowerRatingEngine.get_runner_stats() if stats is None else stats
+            stats.fit_prior_rides(kinds)
+    
+    @staticmethod
+    def _apply_runner_stats(factors: Dict[str, "np.ndarray"], columns: Dict[str, "np.ndarray"],
+                            track: Optional[str] = None):
+        """تعديل العوامل بإحصائيات المتسابقين (بحث واحد لكل البطاقة أو الشوط)
         
-        # 5. ملاءمة المسافة (10%)
-        distance_score = PowerRatingEngine._calculate_distance_score(horse, race.distance)
-        score += distance_score * PowerRatingEngine.WEIGHTS["distance"]
+        قيمة العامل الحالية = المتوسط المسبق (كمعدل فوز) بوزن κ مشاركة، ثم المعدل المنكمش نحوه
+        يعود إلى نقاط 50-90 - بدون مشاركات يبقى العامل كما هو
+        """
+        settings = CONFIG["runner_stats"]
+        if not settings["enabled"]:
+            return
+        stats = PowerRatingEngine.get_runner_stats()
+        if not any(stats.totals[kind][0] for kind in settings["factors"].values()):
+            return
         
-        # 6. ملاءمة الأرضية (10%)
-        surface_score = PowerRatingEngine._calculate_surface_score(horse, race.surface)
-        score += surface_score * PowerRatingEngine.WEIGHTS["surface"]
+        rows = stats.card_rows(columns, track)
+        for factor, kind in settings["factors"].items():
+            if factor not in factors or not (rows[kind] >= 0).any():
+                continue
+            # نقاط 50-90 ↔ معدل فوز 0 حتى STATS_SCALE × متوسط المجتمع
+            scale = PowerRatingEngine.STATS_SCALE * stats.mean(kind)
+            prior = (np.clip(factors[factor], 50, 90) - 50) / 40 * scale
+            rate, rides = stats.shrink(kind, rows[kind], prior=prior)
+            factors[factor] = np.where(rides > 0, 50 + 40 * np.minimum(rate / scale, 1.0), factors[factor])
+    
+    @staticmethod
+    def calculate_power_score(horse: Horse, race: Race, track: Optional[str] = None) -> int:
+        """حساب نقاط القوة للحصان (track: المضمار لإحصائيات الحصان × المضمار)"""
+        factors = {
+            # 1. التقييم الرسمي (25%)
+            "rating": min(horse.rating / 120 * 100, 100),
+            # 2. الفورمة الأخيرة (20%)
+            "form": PowerRatingEngine._calculate_form_score(horse.form),
+            # 3. الفارس (15%)
+            "jockey": PowerRatingEngine._calculate_jockey_score(horse.jockey),
+            # 4. المدرب (15%)
+            "trainer": PowerRatingEngine._calculate_trainer_score(horse.trainer),
+            # 5. ملاءمة المسافة (10%)
+            "distance": PowerRatingEngine._calculate_distance_score(horse, race.distance),
+            # 6. ملاءمة الأرضية (10%)
+            "surface": PowerRatingEngine._calculate_surface_score(horse, race.surface),
+            # 7. بوابة الانطلاق (5%)
+            "draw": PowerRatingEngine._calculate_draw_score(horse.draw, len(race.horses))
+        }
         
-        # 7. بوابة الانطلاق (5%)
-        draw_score = PowerRatingEngine._calculate_draw_score(horse.draw, len(race.horses))
-        score += draw_score * PowerRatingEngine.WEIGHTS["draw"]
+        # إحصائيات المتسابقين المنكمشة (نفس تعديل وضع الدفعات على عمود من متسابق واحد)
+        if CONFIG["runner_stats"]["enabled"]:
+            columns = {"name": np.array([horse.name]), "jockey": np.array([horse.jockey]),
+                       "trainer": np.array([horse.trainer]), "distance": np.array([race.distance])}
+            arrays = {factor: np.array([value], dtype=np.float64) for factor, value in factors.items()}
+            PowerRatingEngine._apply_runner_stats(arrays, columns, track)
+            factors = {factor: float(values[0]) for factor, values in arrays.items()}
         
+        # نفس ترتيب الجمع في combine_factors
+        score = 0
+        for factor, weight in PowerRatingEngine.WEIGHTS.items():
+            score += factors[factor] * weight
         return int(score)
     
     @staticmethod
     def _calculate_form_score(form: str) -> float:
-        """حساب نقاط الفورمة"""
-        if not form:
-            return 50
-        
-        score = 0
-        weights = [5, 4, 3, 2, 1]  # وزن كل نتيجة (الأحدث أعلى)
-        
-        for i, result in enumerate(form[:5]):
-            if i < len(weights):
-                if result == '1':
-                    score += 100 * weights[i]
-                elif result == '2':
-                    score += 70 * weights[i]
-                elif result == '3':
-                    score += 50 * weights[i]
-                elif result == '4':
-                    score += 30 * weights[i]
-                elif result == '0':
-                    score += 10 * weights[i]
-        
-        return min(score / 15, 100)  # تطبيع النتيجة
+        """حساب نقاط الفورمة (من وحدة form_features المشتركة)"""
+        return form_score(form)
     
     @staticmethod
     def _calculate_jockey_score(jockey: str) -> float:
         """حساب نقاط الفارس"""
-        top_jockeys = ["W. Buick", "L. Dettori", "R. Moore", "C. Soumillon", 
-                      "James Doyle", "Silvestre De Sousa", "Mickael Barzalona"]
-        
-        if jockey in top_jockeys:
-            return 90
-        elif any(name in jockey for name in ["Buick", "Dettori", "Moore"]):
-            return 85
-        else:
-            return random.randint(50, 75)
+        return PowerRatingEngine.get_strength_index().jockey_score(jockey)
     
     @staticmethod
     def _calculate_trainer_score(trainer: str) -> float:
         """حساب نقاط المدرب"""
-        top_trainers = ["C. Appleby", "A. O'Brien", "J. Gosden", "Doug Watson",
-                       "S. bin Suroor", "Simon & Ed Crisford"]
-        
-        if trainer in top_trainers:
-            return 90
-        elif any(name in trainer for name in ["Appleby", "Gosden", "Watson"]):
-            return 85
-        else:
-            return random.randint(50, 75)
+        return PowerRatingEngine.get_strength_index().trainer_score(trainer)
     
     @staticmethod
     def _calculate_distance_score(horse: Horse, race_distance: int) -> float:
@@ -424,25 +714,141 @@ class PowerRatingEngine:
             return 65
         else:
             return 55
+    
+    # ---------- وضع الدفعات (Vectorized) ----------
+    
+    @staticmethod
+    def build_columns(races: List[Dict]) -> Dict[str, "np.ndarray"]:
+        """تحويل أشواط بطاقة (أو عدة بطاقات) إلى أعمدة NumPy لكل المتسابقين"""
+        return RaceCard.from_races(races).columns()
+    
+    @staticmethod
+    def _score_unique(values: "np.ndarray", scorer) -> "np.ndarray":
+        """تطبيق دالة تقييم على القيم الفريدة فقط ثم توزيعها على كل المتسابقين"""
+        table = {v: scorer(v) for v in set(values.tolist())}
+        return np.fromiter(map(table.__getitem__, values.tolist()), dtype=np.float64, count=len(values))
+    
+    @staticmethod
+    def calculate_factor_scores(columns: Dict[str, "np.ndarray"], rng=None,
+                                random_factors: Optional[Dict[str, "np.ndarray"]] = None,
+                                track: Optional[str] = None) -> Dict[str, "np.ndarray"]:
+        """حساب جميع العوامل السبعة لكل المتسابقين دفعة واحدة
+        
+        rng: مولد NumPy للأجزاء العشوائية (اختياري)
+        random_factors: قيم محددة مسبقاً لعوامل معينة (لتثبيت الأجزاء العشوائية) - قيم خام
+            قبل تعديل إحصائيات المتسابقين، مثل المسار الفردي
+        track: المضمار (لإحصائيات الحصان × المضمار)
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        fixed = random_factors or {}
+        n = len(columns["rating"])
+        factors = {}
+        
+        # 1. التقييم الرسمي
+        factors["rating"] = np.minimum(columns["rating"] / 120 * 100, 100)
+        
+        # 2. الفورمة (تُحلل مرة واحدة لكل فورمة فريدة مع ذاكرة LRU)
+        factors["form"] = form_scores(columns["form"])
+        
+        # 3-4. الفارس والمدرب (من فهرس القوة)
+        index = PowerRatingEngine.get_strength_index()
+        factors["jockey"] = PowerRatingEngine._score_unique(columns["jockey"], index.jockey_score)
+        factors["trainer"] = PowerRatingEngine._score_unique(columns["trainer"], index.trainer_score)
+        
+        # 5. ملاءمة المسافة
+        if "distance" not in fixed:
+            distance = columns["distance"]
+            low = np.select([distance <= 1200, distance <= 1600], [60, 55], 50)
+            high = np.select([distance <= 1200, distance <= 1600], [95, 90], 85)
+            factors["distance"] = rng.integers(low, high + 1, size=n).astype(np.float64)
+        
+        # 6. ملاءمة الأرضية
+        if "surface" not in fixed:
+            surface = columns["surface"]
+            low = np.where(surface == "Dirt", 60, 55)
+            high = np.select([surface == "Dirt", surface == "Turf"], [95, 90], 85)
+            factors["surface"] = rng.integers(low, high + 1, size=n).astype(np.float64)
+        
+        # 7. بوابة الانطلاق
+        draw = columns["draw"]
+        factors["draw"] = np.select([draw <= 3, draw <= 6, draw <= 10], [85, 75, 65], 55).astype(np.float64)
+        
+        for factor, values in fixed.items():
+            factors[factor] = np.asarray(values, dtype=np.float64)
+        
+        # إحصائيات المتسابقين المنكمشة (الثنائي، المضمار، فئة المسافة)
+        PowerRatingEngine._apply_runner_stats(factors, columns, track)
+        
+        return factors
+    
+    @staticmethod
+    def combine_factors(factors: Dict[str, "np.ndarray"]) -> "np.ndarray":
+        """جمع العوامل الموزونة (بنفس ترتيب المسار الفردي للحصول على نفس النتيجة بالضبط)"""
+        score = np.zeros(len(factors["rating"]), dtype=np.float64)
+        for factor, weight in PowerRatingEngine.WEIGHTS.items():
+            score += factors[factor] * weight
+        return score.astype(np.int64)
+    
+    @staticmethod
+    def calculate_power_scores(columns: Dict[str, "np.ndarray"], rng=None,
+                               random_factors: Optional[Dict[str, "np.ndarray"]] = None,
+                               track: Optional[str] = None) -> "np.ndarray":
+        """حساب نقاط القوة لكل المتسابقين في تمريرة واحدة (نفس نتيجة calculate_power_score)"""
+        factors = PowerRatingEngine.calculate_factor_scores(columns, rng, random_factors, track)
+        return PowerRatingEngine.combine_factors(factors)
+    
+    @staticmethod
+    def score_card(card: RaceCard, rng=None) -> RaceCard:
+        """حساب نقاط القوة لكل متسابقي البطاقة وتخزينها في card.power_score (والعوامل في card.factors)"""
+        if card.num_runners:
+            card.factors = PowerRatingEngine.calculate_factor_scores(card.columns(), rng, track=card.track)
+            card.power_score = PowerRatingEngine.combine_factors(card.factors).astype(np.int32)
+        return card
+    
+    @staticmethod
+    def rescore_race(card: RaceCard, r: int, factors: Tuple[str, ...] = (), rng=None) -> RaceCard:
+        """إعادة حساب عوامل محددة لشوط واحد فقط ثم نقاط القوة لهذا الشوط
+        
+        بقية العوامل (ومنها الأجزاء العشوائية) تبقى كما هي
+        """
+        if not card.factors:
+            return PowerRatingEngine.score_card(card, rng)
+        
+        sl = card.race_slice(r)
+        if factors:
+            keep = {f: card.factors[f][sl] for f in ("distance", "surface") if f not in factors}
+            fresh = PowerRatingEngine.calculate_factor_scores(card.columns(r), rng, keep, card.track)
+            for f in factors:
+                card.factors[f][sl] = fresh[f]
+        
+        race_factors = {f: values[sl] for f, values in card.factors.items()}
+        card.power_score[sl] = PowerRatingEngine.combine_factors(race_factors)
+        return card
 
 
 # ===============================
 # محرك الاحتمالات
 # ===============================
 class ProbabilityEngine:
-    """محرك حساب احتمالات الفوز"""
+    """محرك حساب الاحتمالات: Softmax لنقاط القوة ثم توسيع Harville/Henery
+    للمراكز (Place / Top-N) والرهانات المركبة (Exacta / Trifecta)"""
+    
+    # حدود تصنيف القيمة حسب نسبة الفوز
+    VALUE_THRESHOLDS = np.array([12, 18, 25])
     
     @staticmethod
     def calculate_probabilities(horses: List[Horse]) -> List[Horse]:
-        """حساب احتمالات الفوز لجميع الخيول"""
-        total_score = sum(h.power_score for h in horses)
+        """حساب احتمالات الفوز والمراكز لجميع الخيول"""
+        if not horses:
+            return horses
         
-        if total_score == 0:
-            total_score = 1
+        probs = race_probabilities([h.power_score for h in horses], CONFIG["softmax_temperature"],
+                                   CONFIG["exotic_depth"])
         
-        for horse in horses:
-            # نسبة الفوز الأساسية
-            horse.win_probability = round((horse.power_score / total_score) * 100, 1)
+        for horse, win, place in zip(horses, probs["win"], probs["place"]):
+            horse.win_probability = round(float(win) * 100, 1)
+            horse.place_probability = round(float(place) * 100, 1)
             
             # تصنيف القيمة
             if horse.win_probability >= 25:
@@ -455,6 +861,97 @@ class ProbabilityEngine:
                 horse.value_rating = "−"
         
         return horses
+    
+    @staticmethod
+    def allocate(card: RaceCard) -> RaceCard:
+        """تهيئة أعمدة الاحتمالات والترتيبات في البطاقة (قبل الحساب أو الملء من الذاكرة)"""
+        n = card.num_runners
+        depth = CONFIG["exotic_depth"]
+        card.win_probability = np.zeros(n, dtype=np.float64)
+        card.place_probability = np.zeros(n, dtype=np.float64)
+        card.value_code = np.zeros(n, dtype=np.int8)
+        card.position_probability = np.zeros((n, depth), dtype=np.float64)
+        card.exotics = {bet: [None] * card.num_races for bet in ("exacta", "trifecta")[:depth - 1]}
+        return card
+    
+    @staticmethod
+    def calculate_card_probabilities(card: RaceCard) -> RaceCard:
+        """حساب كل الاحتمالات وتصنيف القيمة لكل البطاقة (دفعات من الأشواط)"""
+        ProbabilityEngine.allocate(card)
+        depth = CONFIG["exotic_depth"]
+        
+        # حجم الدفعة حسب أكبر موتر (أشواط × n^depth)
+        width = int(card.field_sizes.max()) if card.num_races else 0
+        chunk = max(1, MAX_TENSOR_CELLS // max(width, 1) ** depth)
+        for start in range(0, card.num_races, chunk):
+            stop = min(start + chunk, card.num_races)
+            with span("probability.chunk", first_race=start + 1, last_race=stop) as stage:
+                ProbabilityEngine._calculate_races(card, start, stop)
+                stage.add("runners_scored", int(card.offsets[stop] - card.offsets[start]))
+        
+        if CONFIG["place_model"] == "simulation":
+            with span("probability.simulation"):
+                ProbabilityEngine.simulate_card_probabilities(card)
+        return card
+    
+    @staticmethod
+    def simulate_card_probabilities(card: RaceCard, n_sims: Optional[int] = None, seed=None,
+                                    workers: Optional[int] = None) -> List[Dict]:
+        """احتمالات المراكز والـ Place بمحاكاة مونت كارلو (تحل محل توسيع Harville)
+        
+        تُعيد مصفوفات المراكز الكاملة (n × n) لكل شوط
+        """
+        spread = CONFIG["simulation_spread"] or CONFIG["softmax_temperature"]
+        results = simulate_card(card, n_sims or CONFIG["simulation_sims"], spread,
+                                CONFIG["simulation_distribution"], seed,
+                                CONFIG["simulation_workers"] if workers is None else workers)
+        
+        depth = card.position_probability.shape[1]
+        for r, result in enumerate(results):
+            sl = card.race_slice(r)
+            positions = result["positions"]
+            n = len(positions)
+            card.position_probability[sl, :min(depth, n)] = positions[:, :depth]
+            card.place_probability[sl] = np.round(positions[:, :int(place_terms(n))].sum(axis=1) * 100, 1)
+        return results
+    
+    @staticmethod
+    def calculate_race_probabilities(card: RaceCard, r: int) -> RaceCard:
+        """إعادة حساب احتمالات شوط واحد (بعد سحب حصان أو تغيير نقاطه)"""
+        if not card.exotics and card.num_runners:
+            return ProbabilityEngine.calculate_card_probabilities(card)
+        ProbabilityEngine._calculate_races(card, r, r + 1)
+        return card
+    
+    @staticmethod
+    def _calculate_races(card: RaceCard, start: int, stop: int):
+        """احتمالات أشواط متتالية [start, stop) كموترات NumPy وكتابتها في أعمدة البطاقة"""
+        scores, mask = card.pad_races(card.power_score, start, stop)
+        depth = card.position_probability.shape[1]
+        probs = race_probabilities(scores, CONFIG["softmax_temperature"], depth,
+                                   card.field_sizes[start:stop], mask)
+        
+        sl = slice(int(card.offsets[start]), int(card.offsets[stop]))
+        card.win_probability[sl] = np.round(probs["win"][mask] * 100, 1)
+        card.place_probability[sl] = np.round(probs["place"][mask] * 100, 1)
+        positions = probs["positions"][mask]
+        card.position_probability[sl, :positions.shape[1]] = positions
+        card.position_probability[sl, positions.shape[1]:] = 0
+        
+        # تصنيف القيمة (كود في VALUE_LABELS)
+        card.value_code[sl] = np.searchsorted(ProbabilityEngine.VALUE_THRESHOLDS, card.win_probability[sl],
+                                              side="right").astype(np.int8)
+        
+        # أعلى ترتيبات Exacta / Trifecta لكل شوط
+        for order, bet in enumerate(card.exotics, 2):
+            if order <= len(probs["tensors"]):
+                combos, top = top_combinations(probs["tensors"][order - 1], order, CONFIG["exotic_top"])
+            else:
+                combos, top = np.zeros((stop - start, 0, order), dtype=np.int64), np.zeros((stop - start, 0))
+            for j in range(stop - start):
+                # حذف الترتيبات ذات الاحتمال صفر (أشواط صغيرة)
+                keep = top[j] > 0
+                card.exotics[bet][start + j] = (combos[j][keep], top[j][keep])
 
 
 # ===============================
@@ -469,55 +966,135 @@ class PredictionEngine:
         if not race_data.get("success"):
             return race_data
         
-        races = race_data.get("races", [])
-        all_races = []
+        card = race_data.get("card")
+        if card is None:
+            card = RaceCard.from_races(race_data.get("races", []),
+                                       race_data.get("track"), race_data.get("date"))
         
-        for race_dict in races:
-            race = Race(
-                race_number=race_dict["race_number"],
-                race_name=race_dict["race_name"],
-                race_time=race_dict["race_time"],
-                distance=race_dict["distance"],
-                surface=race_dict["surface"],
-                going=race_dict.get("going", "")
-            )
-            
-            for h in race_dict.get("predictions", []):
-                horse = Horse(
-                    number=h["number"],
-                    name=h["name"],
-                    draw=h.get("draw", 0),
-                    jockey=h.get("jockey", ""),
-                    trainer=h.get("trainer", ""),
-                    rating=h.get("rating", 0),
-                    weight=h.get("weight", 0),
-                    form=h.get("form", "")
-                )
-                
-                # حساب نقاط القوة
-                horse.power_score = PowerRatingEngine.calculate_power_score(horse, race)
-                race.add_horse(horse)
-            
-            # حساب الاحتمالات
-            race.horses = ProbabilityEngine.calculate_probabilities(race.horses)
-            
-            # ترتيب حسب نقاط القوة
-            race.horses.sort(key=lambda x: x.power_score, reverse=True)
-            
-            # أخذ أفضل 5 فقط
-            race.horses = race.horses[:5]
-            
-            all_races.append(race.to_dict())
+        # حساب نقاط القوة والاحتمالات لكل البطاقة دفعة واحدة (الأشواط المحسوبة سابقاً من الذاكرة)
+        PredictionEngine.score_card(card)
+        
+        with span("predictions", races=card.num_races):
+            return PredictionEngine.build_predictions(card, race_data.get("track"), race_data.get("date"))
+    
+    # ذاكرة نتائج التقييم المشتركة (تُنشأ عند أول استخدام وتُعاد عند تغيير الإعدادات)
+    _score_cache: Optional[ScoreCache] = None
+    _score_cache_settings: Optional[Tuple] = None
+    _score_cache_lock = threading.Lock()
+    
+    # إعدادات تغير نتيجة التقييم (جزء من بصمة النموذج)
+    SCORING_SETTINGS = ("softmax_temperature", "exotic_depth", "exotic_top", "place_model",
+                        "simulation_sims", "simulation_distribution", "simulation_spread", "runner_stats")
+    
+    @staticmethod
+    def get_score_cache() -> Optional[ScoreCache]:
+        """ذاكرة التقييم (None إن كانت معطلة)"""
+        settings = CONFIG["score_cache"]
+        if not settings["enabled"]:
+            return None
+        key = (settings["max_races"], settings["disk_dir"], settings["disk_max_mb"])
+        with PredictionEngine._score_cache_lock:
+            if PredictionEngine._score_cache is None or PredictionEngine._score_cache_settings != key:
+                PredictionEngine._score_cache = ScoreCache(settings["max_races"], settings["disk_dir"],
+                                                           int(settings["disk_max_mb"] * 1024 * 1024))
+                PredictionEngine._score_cache_settings = key
+            return PredictionEngine._score_cache
+    
+    @staticmethod
+    def model_key() -> bytes:
+        """بصمة النموذج الحالي: أي تغيير في الأوزان أو الإعدادات أو فهرس القوة أو الإحصائيات يغير كل المفاتيح"""
+        return model_key(PowerRatingEngine.WEIGHTS, PowerRatingEngine.get_strength_index().fingerprint(),
+                         {name: CONFIG[name] for name in PredictionEngine.SCORING_SETTINGS},
+                         PowerRatingEngine.get_runner_stats().fingerprint())
+    
+    @staticmethod
+    def _score_fresh(card: RaceCard) -> RaceCard:
+        """نقاط القوة والاحتمالات بدون الذاكرة"""
+        with span("power_rating", races=card.num_races) as stage:
+            PowerRatingEngine.score_card(card)
+            stage.add("runners_scored", card.num_runners)
+        with span("probability", races=card.num_races):
+            ProbabilityEngine.calculate_card_probabilities(card)
+        return card
+    
+    @staticmethod
+    def score_card(card: RaceCard) -> RaceCard:
+        """نقاط القوة والاحتمالات لكل البطاقة: الأشواط بنفس المحتوى والنموذج تُملأ من الذاكرة،
+        والباقي فقط يُقيّم (كبطاقة فرعية) ثم يُحفظ"""
+        # أوزان التعلم المستمر الأحدث قبل حساب بصمة النموذج
+        PowerRatingEngine.refresh_weights()
+        cache = PredictionEngine.get_score_cache()
+        if cache is None or not card.num_races:
+            return PredictionEngine._score_fresh(card)
         
-        # اختيار NAP
-        top_horse = all_races[0]["predictions"][0] if all_races else None
+        with span("score_cache", races=card.num_races) as stage:
+            keys = race_keys(card, PredictionEngine.model_key())
+            cached = [cache.get(key) for key in keys]
+            missing = [r for r, value in enumerate(cached) if value is None]
+            stage.add("cache_hits", card.num_races - len(missing))
+            stage.add("cache_misses", len(missing))
         
-        return {
+        if len(missing) == card.num_races:
+            scored = PredictionEngine._score_fresh(card)
+        else:
+            # أعمدة البطاقة كاملة ثم ملؤها من الذاكرة ومن تقييم الأشواط الناقصة
+            card.power_score = np.zeros(card.num_runners, dtype=np.int32)
+            card.factors = {factor: np.zeros(card.num_runners) for factor in PowerRatingEngine.WEIGHTS}
+            ProbabilityEngine.allocate(card)
+            scored = PredictionEngine._score_fresh(card.select(missing)) if missing else None
+        
+        for j, r in enumerate(missing):
+            value = extract_race(scored, j)
+            cache.put(keys[r], value)
+            if scored is not card:
+                restore_race(card, r, value)
+        for r, value in enumerate(cached):
+            if value is not None:
+                restore_race(card, r, value)
+        return card
+    
+    @staticmethod
+    def race_dict(card: RaceCard, r: int, top_n: Optional[int] = None, full_field: Optional[bool] = None,
+                  factors: Optional[bool] = None) -> Dict:
+        """شوط واحد بصيغة الوثيقة: أفضل top_n (اختيار جزئي) أو الحقل كاملاً مرتباً
+        
+        القيم None تُؤخذ من CONFIG["predictions"]
+        """
+        settings = CONFIG["predictions"]
+        top_n = settings["top_n"] if top_n is None else top_n
+        full_field = settings["full_field"] if full_field is None else full_field
+        factors = settings["factors"] if factors is None else factors
+        ranked = card.race_ranking(r, None if full_field else top_n)
+        return card.race_view(r, ranked, factors).to_dict()
+    
+    @staticmethod
+    def build_predictions(card: RaceCard, track: str, date: str, **expand) -> Dict:
+        """بناء وثيقة الترشيحات من بطاقة محسوبة مسبقاً
+        
+        expand: top_n / full_field / factors (انظر race_dict)
+        """
+        all_races = []
+        for r in range(card.num_races):
+            with span("predictions.race", race_number=int(card.races["race_number"][r])) as stage:
+                all_races.append(PredictionEngine.race_dict(card, r, **expand))
+                stage.add("runners", int(card.field_sizes[r]))
+        
+        predictions = {
             "success": True,
-            "track": race_data.get("track"),
-            "date": race_data.get("date"),
+            "track": track,
+            "date": date,
             "total_races": len(all_races),
-            "races": all_races,
+            "races": all_races
+        }
+        predictions.update(PredictionEngine._headline_picks(all_races))
+        return predictions
+    
+    @staticmethod
+    def _headline_picks(all_races: List[Dict]) -> Dict:
+        """اختيار NAP والترشيحات البارزة"""
+        top_horse = all_races[0]["predictions"][0] if all_races and all_races[0]["predictions"] else None
+        
+        return {
             "nap_of_the_day": {
                 "horse_name": top_horse["name"] if top_horse else "",
                 "race": "Race 1",
@@ -525,16 +1102,23 @@ class PredictionEngine:
                 "confidence": top_horse["power_score"] if top_horse else 0
             } if top_horse else {},
             "next_best": {
-                "horse_name": all_races[1]["predictions"][0]["name"] if len(all_races) > 1 else "",
+                "horse_name": all_races[1]["predictions"][0]["name"] if len(all_races) > 1 and all_races[1]["predictions"] else "",
                 "race": "Race 2",
                 "reason": "قيمة ممتازة مع احتمالات جيدة"
             },
             "value_pick": {
-                "horse_name": all_races[2]["predictions"][1]["name"] if len(all_races) > 2 else "",
+                "horse_name": all_races[2]["predictions"][1]["name"] if len(all_races) > 2 and len(all_races[2]["predictions"]) > 1 else "",
                 "race": "Race 3",
                 "reason": "احتمالات عالية مع إمكانية مفاجأة"
             }
         }
+    
+    @staticmethod
+    def update_race(predictions: Dict, card: RaceCard, r: int) -> Dict:
+        """تحديث شوط واحد في وثيقة الترشيحات (في مكانها) بعد إعادة تقييمه"""
+        predictions["races"][r] = PredictionEngine.race_dict(card, r)
+        predictions.update(PredictionEngine._headline_picks(predictions["races"]))
+        return predictions
 
 
 # ===============================
@@ -544,59 +1128,396 @@ class BettingEngine:
     """محرك توصيات المراهنات"""
     
     @staticmethod
-    def generate_bet_recommendations(predictions: Dict) -> Dict:
-        """توليد توصيات المراهنات"""
+    def _ranked_race(card: RaceCard, r: int, top) -> Dict:
+        """أفضل حصانين في شوط واحد مباشرة من أعمدة البطاقة"""
+        return {
+            "race_number": int(card.races["race_number"][r]),
+            "predictions": [
+                {"name": card.pool.lookup(card.runners["name"][i]),
+                 "win_probability": float(card.win_probability[i])}
+                for i in top
+            ]
+        }
+    
+    @staticmethod
+    def _ranked_races(card: RaceCard):
+        """أفضل حصانين في كل شوط مباشرة من أعمدة البطاقة"""
+        # ترتيب واحد للبطاقة كاملة أسرع من اختيار جزئي لكل شوط على حدة
+        ranking = card.ranking()
+        for r in range(card.num_races):
+            yield BettingEngine._ranked_race(card, r, ranking[card.race_slice(r)][:2])
+    
+    @staticmethod
+    def generate_bet_recommendations(predictions, odds=None, bankroll: Optional[float] = None) -> Dict:
+        """توليد توصيات المراهنات (من قاموس الترشيحات أو من RaceCard مباشرة)
+        
+        odds: أسعار السوق (انظر odds_column) - مع RaceCard تُضاف رهانات كيلي في "staking"
+        """
         recommendations = {
             "balanced_bets": [],   # رهانات متوازنة
             "aggressive_bets": [],  # رهانات عالية المخاطرة
             "no_bet_races": []      # سباقات بدون قيمة
         }
         
-        for race in predictions.get("races", []):
-            horses = race.get("predictions", [])
-            if not horses:
+        if isinstance(predictions, RaceCard):
+            races = BettingEngine._ranked_races(predictions)
+        else:
+            races = predictions.get("races", [])
+        
+        for race in races:
+            BettingEngine._add_race_bets(recommendations, race)
+        
+        if odds is not None and isinstance(predictions, RaceCard):
+            with span("betting.staking") as stage:
+                recommendations["staking"] = BettingEngine.stake_card(predictions, odds, bankroll)
+                stage.add("bets", len(recommendations["staking"]["bets"]))
+        
+        return recommendations
+    
+    @staticmethod
+    def odds_column(card: RaceCard, odds) -> "np.ndarray":
+        """أسعار السوق العشرية لكل متسابق (NaN = بدون سعر)
+        
+        odds: مصفوفة بطول عدد المتسابقين أو {race_number: {horse_number: odds}}
+        """
+        if not isinstance(odds, dict):
+            return np.asarray(odds, dtype=np.float64)
+        
+        column = np.full(card.num_runners, np.nan)
+        for r in range(card.num_races):
+            race_number = int(card.races["race_number"][r])
+            race_odds = odds.get(race_number) or odds.get(str(race_number))
+            if not race_odds:
                 continue
-            
-            top_horse = horses[0]
-            
-            # رهان متوازن (أعلى احتمال)
-            if top_horse["win_probability"] >= 20:
-                recommendations["balanced_bets"].append({
-                    "race_number": race["race_number"],
-                    "horse": top_horse["name"],
-                    "win_probability": top_horse["win_probability"],
-                    "bet_type": "Win",
-                    "confidence": "High" if top_horse["win_probability"] >= 30 else "Medium"
+            sl = card.race_slice(r)
+            for i, number in enumerate(card.runners["number"][sl].tolist(), sl.start):
+                price = race_odds.get(number, race_odds.get(str(number)))
+                if price:
+                    column[i] = float(price)
+        return column
+    
+    @staticmethod
+    def stake_card(card: RaceCard, odds, bankroll: Optional[float] = None, with_risk: bool = True,
+                   seed=None, **limits) -> Dict:
+        """رهانات كيلي الجزئي لكل البطاقة معاً مع حدود الشوط والتعرض الكلي
+        
+        تُعيد الرهانات مع النمو المتوقع وخطر الإفلاس
+        """
+        settings = dict(CONFIG["staking"], **limits)
+        bankroll = settings["bankroll"] if bankroll is None else bankroll
+        
+        p, mask = card.pad_races(card.win_probability / 100)
+        prices, _ = card.pad_races(BettingEngine.odds_column(card, odds), fill=np.nan)
+        solved = solve_card(p, prices, bankroll, settings, with_risk, settings["risk_horizon"],
+                            settings["risk_paths"], settings["ruin_level"], seed)
+        
+        stakes = solved["stakes"][mask]
+        race_index = card.race_index
+        bets = []
+        for i in np.flatnonzero(stakes):
+            r = race_index[i]
+            price = float(prices[mask][i])
+            probability = float(card.win_probability[i])
+            bets.append({
+                "race_number": int(card.races["race_number"][r]),
+                "horse": card.pool.lookup(card.runners["name"][i]),
+                "number": int(card.runners["number"][i]),
+                "odds": price,
+                "win_probability": probability,
+                "edge": round((probability / 100 * price - 1) * 100, 1),
+                "stake": float(stakes[i]),
+                "bankroll_pct": round(float(stakes[i]) / bankroll * 100, 2)
+            })
+        
+        staking = {
+            "bankroll": bankroll,
+            "kelly_fraction": settings["kelly_fraction"],
+            "bets": bets,
+            "total_stake": round(solved["total_stake"], 2),
+            "exposure_pct": round(solved["exposure"] * 100, 2),
+            "expected_growth": round(solved["expected_growth"], 6)
+        }
+        for key in ("simulated_growth", "risk_of_ruin", "median_wealth"):
+            if key in solved:
+                staking[key] = round(solved[key], 6)
+        return staking
+    
+    @staticmethod
+    def _add_race_bets(recommendations: Dict, race: Dict):
+        """توصيات شوط واحد"""
+        horses = race.get("predictions", [])
+        if not horses:
+            return
+        
+        top_horse = horses[0]
+        
+        # رهان متوازن (أعلى احتمال)
+        if top_horse["win_probability"] >= 20:
+            recommendations["balanced_bets"].append({
+                "race_number": race["race_number"],
+                "horse": top_horse["name"],
+                "win_probability": top_horse["win_probability"],
+                "bet_type": "Win",
+                "confidence": "High" if top_horse["win_probability"] >= 30 else "Medium"
+            })
+        
+        # رهان عالي المخاطرة (ثاني أو ثالث)
+        if len(horses) > 1 and horses[1]["win_probability"] >= 15:
+            recommendations["aggressive_bets"].append({
+                "race_number": race["race_number"],
+                "horse": horses[1]["name"],
+                "win_probability": horses[1]["win_probability"],
+                "bet_type": "Each Way",
+                "confidence": "Medium"
+            })
+        
+        # لا رهان (احتمالات متساوية)
+        elif top_horse["win_probability"] < 15:
+            recommendations["no_bet_races"].append(race["race_number"])
+    
+    @staticmethod
+    def _ticket_legs(predictions, race_numbers=None, odds=None) -> List[Dict]:
+        """أشواط التذكرة: الخيول واحتمالات الفوز والمراكز (كل المتسابقين من RaceCard أو أفضل 5 من الترشيحات)"""
+        legs = []
+        if isinstance(predictions, RaceCard):
+            card = predictions
+            prices = BettingEngine.odds_column(card, odds) if odds is not None else None
+            for r in range(card.num_races):
+                sl = card.race_slice(r)
+                legs.append({
+                    "race_number": int(card.races["race_number"][r]),
+                    "horses": [{"number": int(n), "name": name} for n, name in zip(
+                        card.runners["number"][sl].tolist(), card.pool.decode(card.runners["name"][sl]))],
+                    "win": card.win_probability[sl] / 100,
+                    "place": card.place_probability[sl] / 100,
+                    "odds": prices[sl] if prices is not None else None
                 })
-            
-            # رهان عالي المخاطرة (ثاني أو ثالث)
-            if len(horses) > 1 and horses[1]["win_probability"] >= 15:
-                recommendations["aggressive_bets"].append({
+        else:
+            for race in predictions.get("races", []):
+                horses = race.get("predictions", [])
+                race_odds = (odds or {}).get(race["race_number"]) or (odds or {}).get(str(race["race_number"])) or {}
+                legs.append({
                     "race_number": race["race_number"],
-                    "horse": horses[1]["name"],
-                    "win_probability": horses[1]["win_probability"],
-                    "bet_type": "Each Way",
-                    "confidence": "Medium"
+                    "horses": [{"number": h.get("number"), "name": h["name"]} for h in horses],
+                    "win": np.array([h.get("win_probability", 0) for h in horses], dtype=np.float64) / 100,
+                    "place": np.array([h.get("place_probability", 0) for h in horses], dtype=np.float64) / 100,
+                    "odds": np.array([race_odds.get(h.get("number"), race_odds.get(str(h.get("number")), np.nan))
+                                      for h in horses], dtype=np.float64) if odds is not None else None
                 })
-            
-            # لا رهان (احتمالات متساوية)
-            elif top_horse["win_probability"] < 15:
-                recommendations["no_bet_races"].append(race["race_number"])
         
+        if race_numbers is None:
+            return legs[:CONFIG["tickets"]["legs"]]
+        by_number = {leg["race_number"]: leg for leg in legs}
+        missing = [number for number in race_numbers if int(number) not in by_number]
+        if missing:
+            raise KeyError(f"الشوط {missing[0]} غير موجود في البطاقة")
+        return [by_number[int(number)] for number in race_numbers]
+    
+    @staticmethod
+    def iter_race_tickets(predictions, kind: str = "placepot", race_numbers=None, max_lines: Optional[int] = None,
+                          budget: Optional[float] = None, unit_stake: Optional[float] = None,
+                          odds=None) -> Iterator[Dict]:
+        """تذاكر الأشواط المتعددة بترتيب تنازلي للقيمة (مولد كسول - لا تُولد كل التركيبات)
+        
+        kind: placepot (الحصان ضمن المراكز في كل شوط) | pick6 (الفائز في كل شوط) |
+              accumulator (حصان واحد لكل شوط - مع odds الترتيب حسب العائد المتوقع)
+        budget: الميزانية (تحدد أقصى عدد خطوط = budget ÷ unit_stake)
+        """
+        settings = CONFIG["tickets"]
+        unit_stake = settings["unit_stake"] if unit_stake is None else unit_stake
+        if budget is not None:
+            max_lines = int(budget // unit_stake)
+        max_lines = settings["max_lines"] if max_lines is None else max_lines
+        legs = BettingEngine._ticket_legs(predictions, race_numbers, odds)
+        
+        if kind == "accumulator":
+            priced = odds is not None
+            values = [leg["win"] * np.nan_to_num(leg["odds"]) if priced else leg["win"] for leg in legs]
+            for ticket in iter_accumulators(values, [leg["win"] for leg in legs]):
+                chosen = [leg["horses"][i] for leg, i in zip(legs, ticket["selections"])]
+                entry = {
+                    "kind": kind,
+                    "legs": [{"race_number": leg["race_number"], "selections": [horse]}
+                             for leg, horse in zip(legs, chosen)],
+                    "lines": 1,
+                    "cost": unit_stake,
+                    "probability": round(ticket["probability"] * 100, 4)
+                }
+                if priced:
+                    entry["odds"] = round(float(np.prod([leg["odds"][i] for leg, i in zip(legs, ticket["selections"])])), 2)
+                    entry["expected_return"] = round(ticket["value"] * unit_stake, 2)
+                yield entry
+            return
+        
+        if kind not in ("placepot", "pick6"):
+            raise ValueError(f"نوع تذكرة غير معروف: {kind}")
+        coverage_kind = "place" if kind == "placepot" else "win"
+        orders, coverages = [], []
+        for leg in legs:
+            order, coverage = race_coverage(leg[coverage_kind], coverage_kind)
+            orders.append(order)
+            coverages.append(coverage)
+        for ticket in iter_tickets(coverages, max_lines):
+            yield {
+                "kind": kind,
+                "legs": [{"race_number": leg["race_number"],
+                          "selections": [leg["horses"][i] for i in order[:m]]}
+                         for leg, order, m in zip(legs, orders, ticket["counts"])],
+                "lines": ticket["lines"],
+                "cost": round(ticket["lines"] * unit_stake, 2),
+                "probability": round(ticket["probability"] * 100, 4)
+            }
+    
+    @staticmethod
+    def multi_race_tickets(predictions, kind: str = "placepot", top: Optional[int] = None, **options) -> List[Dict]:
+        """أفضل top تذاكر (انظر iter_race_tickets)"""
+        top = CONFIG["tickets"]["top"] if top is None else top
+        return top_k(BettingEngine.iter_race_tickets(predictions, kind, **options), top)
+    
+    @staticmethod
+    def update_race(recommendations: Dict, card: RaceCard, r: int) -> Dict:
+        """استبدال توصيات شوط واحد فقط (في مكانها) مع الحفاظ على ترتيب الأشواط"""
+        race_number = int(card.races["race_number"][r])
+        lists = {key: entries for key, entries in recommendations.items() if isinstance(entries, list)}
+        fresh = {key: [] for key in lists}
+        BettingEngine._add_race_bets(fresh, BettingEngine._ranked_race(card, r, card.race_ranking(r, 2)))
+        
+        for key, entries in lists.items():
+            number = (lambda e: e) if key == "no_bet_races" else (lambda e: e["race_number"])
+            entries[:] = sorted([e for e in entries if number(e) != race_number] + fresh[key], key=number)
         return recommendations
 
 
+# ===============================
+# محرك التعديلات المتأخرة
+# ===============================
+class LateChangeEngine:
+    """تطبيق تعديل متأخر على شوط واحد دون إعادة تحليل الاجتماع كاملاً
+    
+    الحدث: {"type": "withdrawal", "race_number": 3, "horse_number": 7}
+           {"type": "jockey_change", "race_number": 3, "horse_number": 7, "jockey": "W. Buick"}
+           {"type": "going_change", "race_number": 3, "going": "Soft"}
+    """
+    
+    # العوامل التي يجب إعادة حسابها لكل نوع حدث
+    # (سحب حصان لا يغير عوامل البقية - فقط إعادة توزيع الاحتمالات)
+    # (حالة الأرض ليست ضمن العوامل حالياً - تُحدث بيانات الشوط فقط)
+    EVENT_FACTORS = {
+        "withdrawal": (),
+        "jockey_change": ("jockey",),
+        "going_change": (),
+    }
+    
+    @staticmethod
+    def apply(card: RaceCard, predictions: Dict, event: Dict, odds=None) -> Dict:
+        """تطبيق الحدث على البطاقة المحسوبة وتحديث وثيقة الترشيحات في مكانها
+        
+        odds: أسعار السوق - رهانات كيلي تُعاد للبطاقة كاملة (حد التعرض يربط كل الأشواط)
+        """
+        kind = event.get("type")
+        if kind not in LateChangeEngine.EVENT_FACTORS:
+            raise ValueError(f"نوع تعديل غير معروف: {kind}")
+        
+        r = card.find_race(int(event["race_number"]))
+        if kind == "withdrawal":
+            card.withdraw(r, int(event["horse_number"]))
+        elif kind == "jockey_change":
+            card.set_runner(card.find_runner(r, int(event["horse_number"])), jockey=event["jockey"])
+        elif kind == "going_change":
+            card.set_race(r, going=event["going"])
+        
+        # إعادة تقييم هذا الشوط فقط (بأحدث أوزان التعلم المستمر)
+        PowerRatingEngine.refresh_weights()
+        with span("late_change", race_number=int(event["race_number"]), type=kind) as stage:
+            PowerRatingEngine.rescore_race(card, r, LateChangeEngine.EVENT_FACTORS[kind])
+            ProbabilityEngine.calculate_race_probabilities(card, r)
+            stage.add("runners_scored", int(card.field_sizes[r]))
+            PredictionEngine.update_race(predictions, card, r)
+            recommendations = predictions.get("betting_recommendations")
+            if recommendations is not None:
+                BettingEngine.update_race(recommendations, card, r)
+                if odds is not None and "staking" in recommendations:
+                    recommendations["staking"] = BettingEngine.stake_card(
+                        card, odds, recommendations["staking"]["bankroll"])
+        
+        predictions.setdefault("changes", []).append(
+            dict(event, applied_at=datetime.now().isoformat(timespec="seconds")))
+        return predictions
+
+
+def score_meeting(race_data: Dict) -> Dict:
+    """تحليل وترشيح اجتماع واحد مع توصيات المراهنات (قابلة للتشغيل في عملية منفصلة)"""
+    with span("score", track=race_data.get("track"), date=race_data.get("date")):
+        predictions = PredictionEngine.generate_predictions(race_data)
+        
+        # توصيات المراهنات (من البطاقة المحسوبة مباشرة إن وجدت) + رهانات كيلي إن وُجدت أسعار
+        with span("betting"):
+            predictions["betting_recommendations"] = BettingEngine.generate_bet_recommendations(
+                race_data.get("card", predictions), race_data.get("odds"))
+    return predictions
+
+
+def _init_scoring_worker(config: Dict, weights: Dict[str, float], weights_version: Optional[int],
+                         online_updates: int):
+    """تهيئة عملية تحليل: نفس CONFIG والأوزان الفعلية للعملية الأم
+    
+    مع spawn (العمال دائماً) تُستورد race_bot من جديد بالقيم الافتراضية، والأوزان المنشورة/المستمرة
+    وتعديلات سطر الأوامر تُطبق فقط في HorseAIPredictor.__init__ للعملية الأم.
+    التقاط أوزان التعلم المستمر معطل في العامل: كل الاجتماعات تُقيّم بنفس نموذج الأم
+    """
+    CONFIG.clear()
+    CONFIG.update(config)
+    CONFIG["online_weights"] = dict(CONFIG["online_weights"], enabled=False)
+    PowerRatingEngine.WEIGHTS = dict(weights)
+    PowerRatingEngine.WEIGHTS_VERSION = weights_version
+    PowerRatingEngine.ONLINE_UPDATES = online_updates
+
+
+def _score_meeting_worker(race_data: Dict) -> Tuple[Dict, Optional[RaceCard]]:
+    """تحليل اجتماع في عملية منفصلة مع إعادة البطاقة المحسوبة (لحفظها في العملية الأم)"""
+    predictions = score_meeting(race_data)
+    return predictions, race_data.get("card")
+
+
 # ===============================
 # النظام الرئيسي
 # ===============================
 class HorseAIPredictor:
     """النظام الرئيسي للترشيحات"""
     
-    def __init__(self):
-        self.data_engine = DataEngine()
+    # عدد الاجتماعات المحسوبة المحفوظة في الذاكرة للتعديلات المتأخرة
+    MAX_LIVE_MEETINGS = 32
+    
+    def __init__(self, use_cache: bool = True, refresh: bool = False,
+                 store: Optional[PredictionStore] = None, load_model: bool = True):
+        """store: مخزن ترشيحات مشترك (None = يُفتح عند أول استخدام)
+        load_model=False: الأوزان والتتبع محملة مسبقاً (load_model مرة واحدة للعملية، مثل الواجهة)
+        """
+        self.data_engine = DataEngine(use_cache=use_cache, refresh=refresh)
         self.prediction_engine = PredictionEngine()
         self.betting_engine = BettingEngine()
         self.results_history = []
+        # (track, date) -> (البطاقة المحسوبة، وثيقة الترشيحات)
+        self._meetings: "OrderedDict[Tuple[str, str], Tuple[RaceCard, Dict, Optional[Dict]]]" = OrderedDict()
+        self._meetings_lock = threading.Lock()
+        # (track, date) -> دفتر الأسعار المباشر
+        self._price_books: Dict[Tuple[str, str], PriceBook] = {}
+        self._store = store
+        
+        if load_model:
+            HorseAIPredictor.load_model()
+    
+    @staticmethod
+    def load_model():
+        """الأوزان المدربة والتعلم المستمر والتتبع - حالة عامة مشتركة بين كل المحللين في العملية"""
+        if CONFIG["weights_version"] != 0 and PowerRatingEngine.load_weights(version=CONFIG["weights_version"]):
+            print(f"🧠 أوزان مدربة: نسخة {PowerRatingEngine.WEIGHTS_VERSION}")
+        if PowerRatingEngine.refresh_weights():
+            print(f"🧠 تعلم مستمر: {PowerRatingEngine.ONLINE_UPDATES} تحديث")
+        
+        tracing = CONFIG["tracing"]
+        if tracing["enabled"] and not TRACER.enabled:
+            TRACER.configure(True, tracing["path"], tracing["format"])
     
     def predict(self, track: str, date: str) -> Dict:
         """الحصول على الترشيحات"""
@@ -605,36 +1526,317 @@ class HorseAIPredictor:
         print(f"📅 التاريخ: {date}")
         print("=" * 50)
         
-        # 1. جمع البيانات
-        race_data = self.data_engine.fetch_racecard(track, date)
+        with span("predict", track=track, date=date) as stage:
+            # 1. جمع البيانات
+            race_data = self.data_engine.fetch_racecard(track, date)
+            
+            if not race_data.get("success"):
+                stage.set("success", False)
+                return race_data
+            
+            # 2-3. تحليل وترشيح + توصيات المراهنات
+            predictions = score_meeting(race_data)
+            self._remember(race_data, predictions)
+            
+            # 4. حفظ النتائج
+            self._save_predictions(predictions)
+            
+            return predictions
+    
+    def _fetch_timed(self, track: str, date: str) -> Tuple[Dict, float]:
+        """جلب بطاقة اجتماع واحد مع قياس الزمن (محرك مستقل لكل خيط)"""
+        start = time.perf_counter()
+        try:
+            engine = self.data_engine
+            race_data = DataEngine(engine.headless, use_cache=engine.use_cache,
+                                   refresh=engine.refresh).fetch_racecard(track, date)
+        except Exception as e:
+            race_data = {"success": False, "message": str(e)}
+        race_data.setdefault("track", track)
+        race_data.setdefault("date", date)
+        return race_data, time.perf_counter() - start
+    
+    def iter_predict_many(self, requests: List[Tuple[str, str]], io_workers: int = 4,
+                          cpu_workers: Optional[int] = None) -> Iterator[Dict]:
+        """ترشيحات عدة اجتماعات معاً - تُعاد كل نتيجة فور اكتمالها
+        
+        requests: [(track, date), ...]
+        io_workers: عدد خيوط الجلب (I/O)
+        cpu_workers: عدد عمليات التحليل (0 = التحليل في نفس العملية، وكذلك لاجتماع واحد)
+        """
+        # concurrent.futures (ومعه multiprocessing و logging) فقط لوضع الاجتماعات المتعددة
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
         
-        if not race_data.get("success"):
-            return race_data
+        requests = list(dict.fromkeys(requests))
+        cpu_pool = None
+        if cpu_workers != 0 and len(requests) >= 2:
+            import multiprocessing
+            # أوزان التعلم المستمر الأحدث قبل نسخ النموذج إلى العمليات
+            PowerRatingEngine.refresh_weights()
+            # spawn وليس fork: العمال تُنشأ عند أول إرسال وخيوط الجلب (والمتصفحات والتتبع) تعمل،
+            # وfork مع خيوط جارية قد يورث أقفالاً محجوزة. التهيئة تنقل CONFIG والأوزان صراحة
+            cpu_pool = ProcessPoolExecutor(
+                max_workers=cpu_workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_scoring_worker,
+                initargs=(CONFIG, PowerRatingEngine.WEIGHTS, PowerRatingEngine.WEIGHTS_VERSION,
+                          PowerRatingEngine.ONLINE_UPDATES))
         
-        # 2. تحليل وترشيح
-        predictions = self.prediction_engine.generate_predictions(race_data)
+        with ThreadPoolExecutor(max_workers=io_workers) as io_pool:
+            try:
+                # كل خيط جلب يرث المرحلة الجارية (لربط مراحل الجلب بها في التتبع)
+                fetches = {io_pool.submit(contextvars.copy_context().run, self._fetch_timed, track, date):
+                           (track, date) for track, date in requests}
+                scoring = {}
+                pending = set(fetches)
+                
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in fetches:
+                            track, date = fetches[future]
+                            race_data, fetch_time = future.result()
+                            timing = {"track": track, "date": date, "fetch_s": round(fetch_time, 4),
+                                      "cache_hit": bool(race_data.get("cache", {}).get("hit"))}
+                            
+                            if not race_data.get("success"):
+                                race_data["timing"] = timing
+                                yield race_data
+                                continue
+                            
+                            if cpu_pool is None:
+                                start = time.perf_counter()
+                                predictions = score_meeting(race_data)
+                                timing["score_s"] = round(time.perf_counter() - start, 4)
+                                self._remember(race_data, predictions)
+                                yield self._finish_meeting(predictions, timing)
+                            else:
+                                scored = cpu_pool.submit(_score_meeting_worker, race_data)
+                                scoring[scored] = (race_data, timing, time.perf_counter())
+                                pending.add(scored)
+                        else:
+                            race_data, timing, start = scoring.pop(future)
+                            timing["score_s"] = round(time.perf_counter() - start, 4)
+                            try:
+                                predictions, card = future.result()
+                            except Exception as e:
+                                predictions = {"success": False, "message": str(e),
+                                               "track": timing["track"], "date": timing["date"]}
+                            else:
+                                # البطاقة المحسوبة في العامل (للتعديلات المتأخرة بدون إعادة جلب وتحليل)
+                                race_data["card"] = card
+                                self._remember(race_data, predictions)
+                            yield self._finish_meeting(predictions, timing)
+            finally:
+                if cpu_pool is not None:
+                    cpu_pool.shutdown(cancel_futures=True)
+    
+    def _finish_meeting(self, predictions: Dict, timing: Dict) -> Dict:
+        """حفظ نتيجة اجتماع مكتمل وإرفاق التوقيت"""
+        if predictions.get("success"):
+            start = time.perf_counter()
+            self._save_predictions(predictions)
+            timing["save_s"] = round(time.perf_counter() - start, 4)
+        timing["total_s"] = round(sum(v for k, v in timing.items() if k.endswith("_s")), 4)
+        predictions["timing"] = timing
+        return predictions
+    
+    def predict_many(self, requests: List[Tuple[str, str]], io_workers: int = 4,
+                     cpu_workers: Optional[int] = None, on_result=None) -> Dict:
+        """ترشيحات عدة اجتماعات مع ملخص التوقيت لكل اجتماع
         
-        # 3. توصيات المراهنات
-        bet_recommendations = self.betting_engine.generate_bet_recommendations(predictions)
-        predictions["betting_recommendations"] = bet_recommendations
+        on_result: دالة تُستدعى مع كل اجتماع فور اكتماله
+        """
+        start = time.perf_counter()
+        meetings = []
+        for predictions in self.iter_predict_many(requests, io_workers, cpu_workers):
+            meetings.append(predictions)
+            if on_result:
+                on_result(predictions)
         
-        # 4. حفظ النتائج
-        self._save_predictions(predictions)
+        return {
+            "success": any(m.get("success") for m in meetings),
+            "meetings": meetings,
+            "timing": {
+                "meetings": [m["timing"] for m in meetings],
+                "wall_s": round(time.perf_counter() - start, 4),
+                "failed": [f"{m['timing']['track']} {m['timing']['date']}" for m in meetings if not m.get("success")]
+            }
+        }
+    
+    def _remember(self, race_data: Dict, predictions: Dict):
+        """الاحتفاظ بالبطاقة المحسوبة لتطبيق التعديلات المتأخرة لاحقاً"""
+        card = race_data.get("card")
+        if card is None or not predictions.get("success"):
+            return
+        key = (predictions["track"], predictions["date"])
+        with self._meetings_lock:
+            self._meetings[key] = (card, predictions, race_data.get("odds"))
+            self._meetings.move_to_end(key)
+            # بطاقة جديدة: دفتر الأسعار القديم لم يعد مربوطاً بها
+            self._price_books.pop(key, None)
+            while len(self._meetings) > self.MAX_LIVE_MEETINGS:
+                evicted, _ = self._meetings.popitem(last=False)
+                self._price_books.pop(evicted, None)
+    
+    def _live_meeting(self, track: str, date: str):
+        """البطاقة المحسوبة للاجتماع (تحليل كامل مرة واحدة إن لم تكن في الذاكرة)
+        
+        تُعيد (card, predictions, odds) أو وثيقة الفشل
+        """
+        with self._meetings_lock:
+            meeting = self._meetings.get((track, date))
+        if meeting is not None:
+            return meeting
+        
+        predictions = self.predict(track, date)
+        if not predictions.get("success"):
+            return predictions
+        with self._meetings_lock:
+            return self._meetings[(track, date)]
+    
+    def suggest_tickets(self, track: str, date: str, kind: str = "placepot", top: Optional[int] = None,
+                        **options) -> Dict:
+        """أفضل تذاكر Placepot / Pick 6 / Accumulator لاجتماع (انظر BettingEngine.iter_race_tickets)"""
+        meeting = self._live_meeting(track, date)
+        if isinstance(meeting, dict):
+            return meeting
         
+        card, _, odds = meeting
+        options.setdefault("odds", odds)
+        try:
+            tickets = BettingEngine.multi_race_tickets(card, kind, top, **options)
+        except (KeyError, ValueError) as e:
+            return {"success": False, "message": str(e).strip("'\"")}
+        return {"success": True, "track": track, "date": date, "kind": kind, "tickets": tickets}
+    
+    def race_field(self, track: str, date: str, race_number: Optional[int] = None, factors: bool = False,
+                   top_n: Optional[int] = None) -> Dict:
+        """الحقل الكامل (أو أفضل top_n) لشوط أو لكل الأشواط من البطاقة المحسوبة - بدون إعادة التحليل
+        
+        factors: تفصيل العوامل لكل حصان
+        """
+        meeting = self._live_meeting(track, date)
+        if isinstance(meeting, dict):
+            return meeting
+        
+        card, _, _ = meeting
+        if race_number is None:
+            indices = range(card.num_races)
+        else:
+            try:
+                indices = [card.find_race(race_number)]
+            except KeyError as e:
+                return {"success": False, "message": str(e).strip("'\"")}
+        races = [PredictionEngine.race_dict(card, r, top_n, top_n is None, factors) for r in indices]
+        return {"success": True, "track": track, "date": date, "races": races}
+    
+    def price_book(self, track: str, date: str, bankroll: Optional[float] = None) -> Optional[PriceBook]:
+        """دفتر أسعار الاجتماع (يُنشأ مرة واحدة، وأسعاره تصبح أسعار الاجتماع للتذاكر والتعديلات)"""
+        key = (track, date)
+        with self._meetings_lock:
+            book = self._price_books.get(key)
+        if book is not None:
+            return book
+        
+        meeting = self._live_meeting(track, date)
+        if isinstance(meeting, dict):
+            print(f"❌ فشل: {meeting.get('message', 'خطأ غير معروف')}")
+            return None
+        
+        card, predictions, odds = meeting
+        settings = CONFIG["staking"]
+        book = PriceBook(card, odds, settings["bankroll"] if bankroll is None else bankroll, settings,
+                         CONFIG["odds_stream"]["stake_tolerance"])
+        with self._meetings_lock:
+            self._price_books[key] = book
+            if key in self._meetings:
+                self._meetings[key] = (card, predictions, book.odds)
+        return book
+    
+    def stream_odds(self, track: str, date: str, source: Iterable[Dict],
+                    batch: Optional[int] = None) -> Iterator[Dict]:
+        """تيار فروقات الأسعار والقيمة والرهانات من مصدر أسعار (بدون إعادة الترشيحات)"""
+        book = self.price_book(track, date)
+        if book is None:
+            return iter(())
+        return book.stream(source, CONFIG["odds_stream"]["batch"] if batch is None else batch)
+    
+    def apply_change(self, track: str, date: str, event: Dict) -> Dict:
+        """تطبيق تعديل متأخر (سحب حصان، تغيير فارس، تغيير حالة الأرض) على شوط واحد
+        
+        يُعاد تقييم الشوط المتأثر فقط وتُحدث وثيقة الترشيحات المحفوظة في مكانها
+        """
+        meeting = self._live_meeting(track, date)
+        if isinstance(meeting, dict):
+            return meeting
+        
+        card, predictions, odds = meeting
+        try:
+            LateChangeEngine.apply(card, predictions, event, odds)
+        except (KeyError, ValueError) as e:
+            return {"success": False, "message": str(e).strip("'\"")}
+        
+        book = self._price_books.get((track, date))
+        if book is not None:
+            book.rebind()
+        
+        self._save_predictions(predictions)
         return predictions
     
-    def _save_predictions(self, predictions: Dict):
-        """حفظ الترشيحات في ملف"""
-        output_dir = CONFIG["output_dir"]
-        os.makedirs(output_dir, exist_ok=True)
+    def record_results(self, track: str, date: str, results: List[Dict]) -> int:
+        """تسجيل نتائج اجتماع وتحديث فهرس قوة الفرسان والمدربين وإحصائيات المتسابقين تدريجياً
         
-        filename = f"predictions_{predictions.get('track', 'unknown')}_{predictions.get('date', 'today')}.json"
-        filepath = os.path.join(output_dir, filename)
+        results: [{"race_number": 1, "runners": [{"name", "jockey", "trainer", "position"}, ...]}]
+        مسافة الشوط (لفئة المسافة) من النتيجة أو من بطاقة الاجتماع إن كانت في الذاكرة
+        """
+        index = PowerRatingEngine.get_strength_index()
+        added = index.add_results(track, date, results)
+        if added:
+            index.save()
+            print(f"✅ تم تحديث فهرس القوة: {added} شوط")
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(predictions, f, ensure_ascii=False, indent=2)
+        distances = {}
+        with self._meetings_lock:
+            meeting = self._meetings.get((track, date))
+        if meeting is not None:
+            card = meeting[0]
+            distances = dict(zip(card.races["race_number"].tolist(), card.races["distance"].tolist()))
+        PowerRatingEngine.update_runner_stats(lambda stats: stats.add_results(track, date, results, distances))
+        return added
+    
+    @property
+    def store(self) -> PredictionStore:
+        """مخزن الترشيحات (يُفتح عند أول استخدام أو عند تغيير المجلد في CONFIG)"""
+        if self._store is None or self._store.store_dir != CONFIG["store_dir"]:
+            self._store = PredictionStore(CONFIG["store_dir"], CONFIG["store_codec"])
+        return self._store
+    
+    def _save_predictions(self, predictions: Dict):
+        """حفظ نسخة جديدة من الترشيحات في المخزن (النسخ السابقة تبقى)"""
+        with span("save", track=predictions.get("track"), date=predictions.get("date")) as stage:
+            version = self.store.put(predictions)
+            predictions["version"] = version
+            stage.set("version", version)
+            
+            if CONFIG["export_json"]:
+                output_dir = CONFIG["output_dir"]
+                os.makedirs(output_dir, exist_ok=True)
+                filename = f"predictions_{predictions.get('track', 'unknown')}_{predictions.get('date', 'today')}.json"
+                path = os.path.join(output_dir, filename)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(predictions, f, ensure_ascii=False, indent=2)
+                stage.add("bytes_written", os.path.getsize(path))
         
-        print(f"✅ تم حفظ الترشيحات: {filepath}")
+        print(f"✅ تم حفظ الترشيحات: {predictions.get('track')} {predictions.get('date')} (النسخة {version})")
+    
+    def load_predictions(self, track: str, date: str, race: Optional[int] = None,
+                         version: Optional[int] = None) -> Optional[Dict]:
+        """قراءة ترشيحات محفوظة (آخر نسخة افتراضياً، أو شوط واحد)"""
+        return self.store.get(track, date, race, version)
+    
+    def prediction_versions(self, track: str, date: str) -> List[Dict]:
+        """كل النسخ المحفوظة لاجتماع"""
+        return self.store.versions(track, date)
     
     def display_predictions(self, predictions: Dict):
         """عرض الترشيحات بشكل جميل"""
@@ -683,6 +1885,96 @@ class HorseAIPredictor:
 # ===============================
 # نقطة الدخول
 # ===============================
+def _date_range(value: str) -> List[str]:
+    """تحويل "FROM:TO" إلى قائمة تواريخ (شاملة)"""
+    start, _, end = value.partition(":")
+    first = datetime.strptime(start, "%Y-%m-%d")
+    last = datetime.strptime(end or start, "%Y-%m-%d")
+    return [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((last - first).days + 1)]
+
+
+def run_many(predictor: HorseAIPredictor, args):
+    """وضع الاجتماعات المتعددة من سطر الأوامر"""
+    if not args.tracks or args.tracks == "all":
+        tracks = [t["id"] for country in RACETRACKS.values() for t in country]
+    else:
+        tracks = [t.strip().lower() for t in args.tracks.split(",") if t.strip()]
+    
+    if args.date_range:
+        dates = _date_range(args.date_range)
+    else:
+        dates = [args.date or datetime.now().strftime("%Y-%m-%d")]
+    
+    requests = [(track, date) for date in dates for track in tracks]
+    print(f"🏇 {len(requests)} اجتماع ({len(tracks)} مضمار × {len(dates)} يوم)")
+    
+    def show(predictions: Dict):
+        timing = predictions["timing"]
+        if predictions.get("success"):
+            nap = predictions.get("nap_of_the_day", {}).get("horse_name", "N/A")
+            print(f"✅ {timing['track']} {timing['date']} | {predictions['total_races']} أشواط | "
+                  f"NAP: {nap} | {timing['total_s']:.2f}s")
+        else:
+            print(f"❌ {timing['track']} {timing['date']}: {predictions.get('message', 'خطأ غير معروف')}")
+    
+    summary = predictor.predict_many(requests, io_workers=args.workers,
+                                     cpu_workers=args.cpu_workers, on_result=show)
+    
+    print("\n" + "=" * 60)
+    print("⏱️ ملخص التوقيت")
+    print("=" * 60)
+    for t in summary["timing"]["meetings"]:
+        print(f"   {t['track']:<15} {t['date']}  جلب: {t['fetch_s']:.3f}s  تحليل: {t.get('score_s', 0):.3f}s  "
+              f"حفظ: {t.get('save_s', 0):.3f}s{'  💾' if t.get('cache_hit') else ''}")
+    print(f"   ⏱️ الزمن الكلي: {summary['timing']['wall_s']:.2f}s")
+    if predictor.data_engine.use_cache:
+        stats = DataEngine.cache_stats()
+        print(f"   💾 الذاكرة المحلية: {stats['hits']} إصابة / {stats['misses']} إخفاق | "
+              f"{stats['files']} ملف ({stats['size_bytes'] / 1024:.0f} KB)")
+
+
+def print_trace_summary():
+    """ملخص زمن المراحل: كل مرحلة ثم التفصيل حسب المصدر والشوط"""
+    if not TRACER.enabled:
+        return
+    
+    def show(summary: Dict):
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+            counters = "  ".join(f"{key}={value:g}" for key, value in entry["counters"].items())
+            print(f"   {name:<40} ×{entry['count']:<4} {entry['total_ms']:>10.2f}ms "
+                  f"(متوسط {entry['mean_ms']:.3f}ms)  {counters}")
+    
+    print("\n" + "=" * 60)
+    print("⏱️ زمن المراحل")
+    print("=" * 60)
+    show(TRACER.summary())
+    for attribute in ("provider", "race_number"):
+        summary = TRACER.summary(by=attribute)
+        if summary:
+            print(f"\n   حسب {attribute}:")
+            show(summary)
+    TRACER.close()
+
+
+def replay_odds(predictor: HorseAIPredictor, track: str, date: str, path: str, speed: float = 0.0):
+    """إعادة تشغيل ملف أسعار وعرض تيار الفروقات"""
+    print(f"\n📈 إعادة تشغيل الأسعار: {path}")
+    for diff in predictor.stream_odds(track, date, ReplaySource(path, speed, track, date)):
+        if diff["type"] == "price":
+            print(f"   💱 الشوط {diff['race_number']}: {diff['horse']} {diff['previous']} ← {diff['odds']} "
+                  f"(أفضلية {diff['edge']}% {diff['value_rating']})")
+        else:
+            print(f"   💰 الشوط {diff['race_number']}: {diff['horse']} رهان {diff['previous']} ← {diff['stake']}")
+    
+    book = predictor.price_book(track, date)
+    if book is not None:
+        stats = book.stats
+        print(f"✅ {stats['ticks']} تحديث → {stats['diffs']} فرق "
+              f"({stats['unchanged']} بدون تغيير، {stats['unknown']} غير معروف، {stats['rejected']} مرفوض، "
+              f"{stats['invalid_odds']} سعر غير صالح)")
+        print(f"   إجمالي الرهانات: {book.snapshot()['total_stake']}")
+
+
 def main():
     """الدالة الرئيسية"""
     import argparse
@@ -691,10 +1983,48 @@ def main():
     parser.add_argument("--track", "-t", type=str, help="اسم المضمار (مثل: meydan, wolverhampton)")
     parser.add_argument("--date", "-d", type=str, help="تاريخ السباق (YYYY-MM-DD)")
     parser.add_argument("--interactive", "-i", action="store_true", help="الوضع التفاعلي")
+    parser.add_argument("--tracks", type=str, help="عدة مضامير مفصولة بفواصل (مثل: meydan,jebel_ali) أو all")
+    parser.add_argument("--date-range", type=str, help="نطاق التواريخ FROM:TO (YYYY-MM-DD:YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=4, help="عدد خيوط الجلب المتوازية")
+    parser.add_argument("--cpu-workers", type=int, default=None, help="عدد عمليات التحليل (0 = بدون عمليات)")
+    parser.add_argument("--no-cache", action="store_true", help="عدم استخدام ذاكرة البطاقات المحلية")
+    parser.add_argument("--refresh", action="store_true", help="إعادة جلب البطاقات وتحديث الذاكرة المحلية")
+    parser.add_argument("--odds-replay", type=str, help="إعادة تشغيل ملف أسعار (JSONL) بعد الترشيحات")
+    parser.add_argument("--compact-store", action="store_true", help="ضغط مخزن الترشيحات ثم الخروج")
+    parser.add_argument("--keep-versions", type=int, default=None, help="عدد النسخ المحفوظة لكل اجتماع عند الضغط")
+    parser.add_argument("--replay-speed", type=float, default=0.0, help="سرعة إعادة التشغيل (0 = فوراً، 1 = زمن حقيقي)")
+    parser.add_argument("--trace", nargs="?", const="", default=None,
+                        help="قياس زمن المراحل مع ملخص في النهاية (وملف JSON lines إن حُدد)")
+    parser.add_argument("--trace-format", choices=("jsonl", "otlp"), default="jsonl",
+                        help="صيغة ملف التتبع (otlp = سجلات OpenTelemetry)")
+    parser.add_argument("--top-n", type=int, default=None, help="عدد الخيول في كل شوط بالوثيقة (افتراضي 5)")
+    parser.add_argument("--full-field", action="store_true", help="كل المتسابقين في الوثيقة")
+    parser.add_argument("--factors", action="store_true", help="تفصيل العوامل لكل حصان في الوثيقة")
     
     args = parser.parse_args()
     
-    predictor = HorseAIPredictor()
+    if args.top_n is not None:
+        CONFIG["predictions"]["top_n"] = args.top_n
+    if args.full_field or args.factors:
+        CONFIG["predictions"].update(full_field=args.full_field or CONFIG["predictions"]["full_field"],
+                                     factors=args.factors or CONFIG["predictions"]["factors"])
+    
+    if args.trace is not None:
+        CONFIG["tracing"].update(enabled=True, path=args.trace or None, format=args.trace_format)
+        atexit.register(print_trace_summary)
+    
+    predictor = HorseAIPredictor(use_cache=not args.no_cache, refresh=args.refresh)
+    
+    if args.compact_store:
+        stats = predictor.store.compact(args.keep_versions)
+        print(f"🗜️ ضغط المخزن: {stats['segments_before']} → {stats['segments_after']} مقطع، "
+              f"{stats['bytes_before'] / 1024:.1f} → {stats['bytes_after'] / 1024:.1f} KB، "
+              f"حذف {stats['versions_dropped']} نسخة")
+        return
+    
+    if args.tracks or args.date_range:
+        run_many(predictor, args)
+        return
     
     if args.interactive or (not args.track and not args.date):
         # الوضع التفاعلي
@@ -723,6 +2053,8 @@ def main():
     # عرض النتائج
     if predictions.get("success"):
         predictor.display_predictions(predictions)
+        if args.odds_replay:
+            replay_odds(predictor, track, date, args.odds_replay, args.replay_speed)
     else:
         print(f"❌ فشل: {predictions.get('message', 'خطأ غير معروف')}")
 
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Race Simulator - محاكاة مونت كارلو لترتيب الوصول
+كل حصان له توزيع أداء: الموقع = نقاط القوة، والانتشار (spread) يُعاير من النتائج السابقة
+في كل محاكاة يُسحب أداء كل المتسابقين ويُرتبون، ثم تُعد مرات وصول كل حصان في كل مركز
+
+- gumbel: احتمالات الفوز تطابق Softmax بدرجة حرارة = spread (نفس نموذج harville)
+- normal: نموذج Thurstone (أداء طبيعي)
+
+كل شوط له مولد عشوائي مستقل مشتق من البذرة، لذلك النتيجة نفسها مع أو بدون عمليات متوازية
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from harville import DEFAULT_TEMPERATURE, calibrate_temperature
+
+DISTRIBUTIONS = ("gumbel", "normal")
+
+# عدد المحاكاة في كل دفعة (للتحكم في الذاكرة)
+SIM_BLOCK = 50_000
+
+
+# ===============================
+# شوط واحد
+# ===============================
+def _draw_noise(rng: "np.random.Generator", shape, distribution: str) -> np.ndarray:
+    """ضوضاء الأداء القياسية (float32 للسرعة)"""
+    if distribution == "gumbel":
+        # Gumbel(0, 1) = -log(Exp(1))
+        noise = rng.standard_exponential(shape, dtype=np.float32)
+        np.maximum(noise, np.finfo(np.float32).tiny, out=noise)
+        np.log(noise, out=noise)
+        np.negative(noise, out=noise)
+        return noise
+    if distribution == "normal":
+        return rng.standard_normal(shape, dtype=np.float32)
+    raise ValueError(f"توزيع غير معروف: {distribution}")
+
+
+def simulate_race(scores, n_sims: int = 100_000, spread=DEFAULT_TEMPERATURE,
+                  distribution: str = "gumbel", seed=None, exotics: bool = False) -> Dict[str, np.ndarray]:
+    """محاكاة شوط واحد
+
+    scores: نقاط القوة (n)
+    spread: انتشار الأداء (رقم واحد أو مصفوفة لكل حصان)
+    تُعيد positions (n × n): احتمال وصول الحصان i في المركز k
+    ومع exotics=True أيضاً exacta (n × n) و trifecta (n × n × n)
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    n = len(scores)
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    spread = np.broadcast_to(np.asarray(spread, dtype=np.float32), (n,))
+
+    counts = np.zeros(n * n, dtype=np.int64)
+    exacta = np.zeros(n * n, dtype=np.int64) if exotics and n >= 2 else None
+    trifecta = np.zeros(n ** 3, dtype=np.int64) if exotics and n >= 3 else None
+    # رقم المركز لكل عمود بعد الترتيب التصاعدي (الأعلى أداءً في الأخير)
+    position = np.arange(n - 1, -1, -1)
+
+    done = 0
+    while done < n_sims and n:
+        block = min(SIM_BLOCK, n_sims - done)
+        perf = _draw_noise(rng, (block, n), distribution)
+        perf *= spread
+        perf += scores
+        order = np.argsort(perf, axis=1)
+
+        counts += np.bincount((order * n + position).ravel(), minlength=n * n)
+        if exacta is not None:
+            exacta += np.bincount(order[:, -1] * n + order[:, -2], minlength=n * n)
+        if trifecta is not None:
+            trifecta += np.bincount((order[:, -1] * n + order[:, -2]) * n + order[:, -3], minlength=n ** 3)
+        done += block
+
+    total = max(n_sims, 1)
+    result = {"positions": counts.reshape(n, n) / total}
+    if exotics:
+        result["exacta"] = exacta.reshape(n, n) / total if exacta is not None else np.zeros((n, n))
+        result["trifecta"] = trifecta.reshape(n, n, n) / total if trifecta is not None else np.zeros((n,) * 3)
+    return result
+
+
+def _simulate_races(jobs: List[tuple]) -> List[Dict[str, np.ndarray]]:
+    """مجموعة أشواط (تُشغل داخل عملية منفصلة)"""
+    return [simulate_race(*job) for job in jobs]
+
+
+# ===============================
+# بطاقة كاملة
+# ===============================
+def simulate_card(card, n_sims: int = 100_000, spread=DEFAULT_TEMPERATURE, distribution: str = "gumbel",
+                  seed=None, workers: int = 0, exotics: bool = False) -> List[Dict[str, np.ndarray]]:
+    """محاكاة كل أشواط بطاقة RaceCard محسوبة (card.power_score)
+
+    spread: رقم واحد أو مصفوفة لكل متسابق في البطاقة
+    workers: عدد العمليات المتوازية (0 = في نفس العملية)
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"توزيع غير معروف: {distribution}")
+
+    spreads = np.broadcast_to(np.asarray(spread, dtype=np.float64), (card.num_runners,))
+    streams = np.random.SeedSequence(seed).spawn(card.num_races)
+    jobs = []
+    for r in range(card.num_races):
+        sl = card.race_slice(r)
+        jobs.append((card.power_score[sl], n_sims, spreads[sl], distribution, streams[r], exotics))
+
+    if workers and workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        groups = [jobs[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_races, groups))
+        results = [None] * len(jobs)
+        for i, part in enumerate(parts):
+            results[i::workers] = part
+        return results
+
+    return _simulate_races(jobs)
+
+
+# ===============================
+# معايرة الانتشار
+# ===============================
+def fit_spread(scores, winners, mask=None, distribution: str = "gumbel",
+               grid: Optional[Sequence[float]] = None, n_sims: int = 500, seed: int = 0) -> float:
+    """معايرة الانتشار من نتائج سابقة (أشواط × متسابقين، عمود الفائز لكل شوط)
+
+    gumbel: مطابق تماماً لمعايرة درجة حرارة Softmax
+    normal: أعلى احتمال تقريبي بالمحاكاة مع أرقام عشوائية مشتركة لكل قيم الشبكة
+    """
+    if distribution == "gumbel":
+        return calibrate_temperature(scores, winners, mask, grid)
+
+    scores = np.asarray(scores, dtype=np.float32)
+    winners = np.asarray(winners, dtype=np.int64)
+    if mask is None:
+        mask = np.ones(scores.shape, dtype=bool)
+    grid = np.geomspace(1, 100, 30) if grid is None else np.asarray(grid, dtype=np.float64)
+
+    rng = np.random.default_rng(seed)
+    ll = np.zeros(len(grid))
+    chunk = max(1, 4_000_000 // (n_sims * max(scores.shape[1], 1)))
+    for start in range(0, len(scores), chunk):
+        block, block_mask = scores[start:start + chunk], mask[start:start + chunk]
+        noise = _draw_noise(rng, (n_sims,) + block.shape, distribution)
+        for g, sigma in enumerate(grid):
+            perf = np.where(block_mask, block + noise * np.float32(sigma), -np.inf)
+            wins = (perf.argmax(axis=-1) == winners[start:start + chunk]).sum(axis=0)
+            # تنعيم لتجنب log(0) في الأشواط التي لم يفز فيها الحصان في أي محاكاة
+            ll[g] += np.log((wins + 0.5) / (n_sims + 1)).sum()
+    return float(grid[int(np.argmax(ll))])
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RaceCard - بطاقة السباق العمودية
+تمثيل مضغوط (Struct-of-Arrays) لكل المتسابقين في بطاقة أو أكثر:
+مصفوفة NumPy لكل حقل، والنصوص المكررة (أسماء، فرسان، مدربين) تُخزن كأرقام
+كائنات Horse/Race تُبنى فقط عند التحويل إلى JSON
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# تصنيف القيمة حسب الكود المخزن في value_code
+VALUE_LABELS = ("−", "⭐", "⭐⭐", "⭐⭐⭐")
+
+
+# ===============================
+# فئة الحصان
+# ===============================
+class Horse:
+    """فئة الحصان مع جميع بياناته"""
+    
+    def __init__(self, number: int, name: str, draw: int = 0, 
+                 jockey: str = "", trainer: str = "", rating: int = 0,
+                 weight: int = 0, form: str = "", surface: str = "",
+                 distance: int = 0, pedigree: str = ""):
+        self.number = number
+        self.name = name
+        self.draw = draw
+        self.jockey = jockey
+        self.trainer = trainer
+        self.rating = rating
+        self.weight = weight
+        self.form = form
+        self.surface = surface
+        self.distance = distance
+        self.pedigree = pedigree
+        
+        # النتائج المحسوبة
+        self.power_score = 0
+        self.win_probability = 0.0
+        self.place_probability = 0.0
+        self.value_rating = ""
+        self.strengths = []
+        self.concerns = []
+        self.factors = {}
+        
+    def to_dict(self) -> Dict:
+        """تحويل إلى قاموس (factors فقط إن طُلبت)"""
+        data = {
+            "number": self.number,
+            "name": self.name,
+            "draw": self.draw,
+            "jockey": self.jockey,
+            "trainer": self.trainer,
+            "rating": self.rating,
+            "weight": self.weight,
+            "form": self.form,
+            "power_score": self.power_score,
+            "win_probability": self.win_probability,
+            "place_probability": self.place_probability,
+            "value_rating": self.value_rating,
+            "strengths": self.strengths,
+            "concerns": self.concerns
+        }
+        if self.factors:
+            data["factors"] = self.factors
+        return data
+
+
+# ===============================
+# فئة السباق
+# ===============================
+class Race:
+    """فئة السباق"""
+    
+    def __init__(self, race_number: int, race_name: str, race_time: str,
+                 distance: int, surface: str, going: str = ""):
+        self.race_number = race_number
+        self.race_name = race_name
+        self.race_time = race_time
+        self.distance = distance
+        self.surface = surface
+        self.going = going
+        self.horses: List[Horse] = []
+        self.analysis = ""
+        self.withdrawals = []
+        self.exotics = {}
+        self.field_size = 0
+        
+    def add_horse(self, horse: Horse):
+        """إضافة حصان للسباق"""
+        self.horses.append(horse)
+        
+    def to_dict(self) -> Dict:
+        """تحويل إلى قاموس"""
+        return {
+            "race_number": self.race_number,
+            "race_name": self.race_name,
+            "race_time": self.race_time,
+            "distance": self.distance,
+            "surface": self.surface,
+            "going": self.going,
+            "field_size": self.field_size or len(self.horses),
+            "predictions": [h.to_dict() for h in self.horses],
+            "analysis": self.analysis,
+            "withdrawals": self.withdrawals,
+            "exotics": self.exotics
+        }
+
+
+# ===============================
+# مخزن النصوص
+# ===============================
+class StringPool:
+    """مخزن النصوص الموحدة (Interning) - كل نص يُخزن مرة واحدة برقم ثابت"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._values: List[str] = []
+        self._array_cache: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, value: str) -> int:
+        """الحصول على رقم النص (وإضافته إن لم يكن موجوداً)"""
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self._values)
+            self._ids[value] = idx
+            self._values.append(value)
+            self._array_cache = None
+        return idx
+
+    def intern_many(self, values: Iterable[str]) -> np.ndarray:
+        """توحيد مجموعة نصوص دفعة واحدة"""
+        return np.fromiter((self.intern(v) for v in values), dtype=np.int32)
+
+    def lookup(self, idx: int) -> str:
+        """استرجاع النص من رقمه"""
+        return self._values[idx]
+
+    def decode(self, ids: np.ndarray) -> np.ndarray:
+        """تحويل مصفوفة أرقام إلى مصفوفة نصوص"""
+        if self._array_cache is None or len(self._array_cache) != len(self._values):
+            self._array_cache = np.asarray(self._values, dtype=object)
+        return self._array_cache[ids]
+
+
+# ===============================
+# البطاقة العمودية
+# ===============================
+class RaceCard:
+    """بطاقة سباق عمودية - مصفوفة لكل حقل بدلاً من كائن لكل حصان
+
+    حقول المتسابقين مرتبة شوطاً بعد شوط، و offsets[r]:offsets[r+1]
+    تحدد متسابقي الشوط r
+    """
+
+    # حقول المتسابقين (الاسم، النوع)
+    RUNNER_FIELDS = (
+        ("number", np.int16),
+        ("name", np.int32),
+        ("draw", np.int16),
+        ("jockey", np.int32),
+        ("trainer", np.int32),
+        ("rating", np.int16),
+        ("weight", np.int16),
+        ("form", np.int32),
+    )
+
+    # حقول الأشواط
+    RACE_FIELDS = (
+        ("race_number", np.int16),
+        ("race_name", np.int32),
+        ("race_time", np.int32),
+        ("distance", np.int32),
+        ("surface", np.int32),
+        ("going", np.int32),
+    )
+
+    # الحقول النصية (أرقام في StringPool)
+    STRING_FIELDS = frozenset(["name", "jockey", "trainer", "form",
+                               "race_name", "race_time", "surface", "going"])
+
+    def __init__(self, track: str, date: str, runners: Dict[str, np.ndarray],
+                 races: Dict[str, np.ndarray], offsets: np.ndarray,
+                 pool: StringPool, withdrawals: Optional[List[List]] = None):
+        self.track = track
+        self.date = date
+        self.runners = runners
+        self.races = races
+        self.offsets = offsets
+        self.pool = pool
+        self.withdrawals = withdrawals if withdrawals is not None else [[] for _ in range(len(offsets) - 1)]
+
+        # النتائج المحسوبة
+        n = self.num_runners
+        self.power_score = np.zeros(n, dtype=np.int32)
+        self.win_probability = np.zeros(n, dtype=np.float64)
+        self.value_code = np.zeros(n, dtype=np.int8)
+        self.place_probability = np.zeros(n, dtype=np.float64)
+        # احتمال كل مركز (متسابقين × عدد المراكز) - انظر harville
+        self.position_probability = np.zeros((n, 0), dtype=np.float64)
+        # أعلى ترتيبات Exacta/Trifecta لكل شوط: (أعمدة محلية داخل الشوط، الاحتمالات)
+        self.exotics: Dict[str, List] = {}
+        # نقاط كل عامل لكل متسابق (تُملأ عند التقييم وتُستخدم لإعادة التقييم الجزئي)
+        self.factors: Dict[str, np.ndarray] = {}
+
+    # ---------- البناء ----------
+
+    @classmethod
+    def from_races(cls, races: List[Dict], track: str = None, date: str = None,
+                   pool: StringPool = None) -> "RaceCard":
+        """بناء بطاقة من قائمة أشواط بصيغة القاموس (race.to_dict())"""
+        builder = RaceCardBuilder(track, date, pool)
+        for race in races:
+            builder.add_race(race["race_number"], race.get("race_name", ""), race.get("race_time", ""),
+                             race.get("distance", 0), race.get("surface", ""), race.get("going", ""),
+                             withdrawals=race.get("withdrawals"))
+            for h in race.get("predictions", []):
+                builder.add_runner(h["number"], h["name"], h.get("draw", 0), h.get("jockey", ""),
+                                   h.get("trainer", ""), h.get("rating", 0), h.get("weight", 0),
+                                   h.get("form", ""))
+        return builder.build()
+
+    @classmethod
+    def concat(cls, cards: List["RaceCard"], pool: StringPool = None) -> "RaceCard":
+        """دمج عدة بطاقات في بطاقة واحدة (لتقييم عدة اجتماعات معاً)"""
+        if pool is None:
+            pool = cards[0].pool if cards and all(c.pool is cards[0].pool for c in cards) else StringPool()
+
+        tables = {}
+
+        def remap(card: "RaceCard", name: str, values: np.ndarray) -> np.ndarray:
+            if name not in cls.STRING_FIELDS or card.pool is pool:
+                return values
+            if id(card) not in tables:
+                tables[id(card)] = pool.intern_many(card.pool.decode(np.arange(len(card.pool))))
+            return tables[id(card)][values]
+
+        runners = {name: np.concatenate([remap(c, name, c.runners[name]) for c in cards]).astype(dtype)
+                   for name, dtype in cls.RUNNER_FIELDS}
+        races = {name: np.concatenate([remap(c, name, c.races[name]) for c in cards]).astype(dtype)
+                 for name, dtype in cls.RACE_FIELDS}
+        offsets = [0]
+        for c in cards:
+            offsets.extend((c.offsets[1:] + offsets[-1]).tolist())
+        card = cls(cards[0].track if len(cards) == 1 else "multi", cards[0].date if cards else None,
+                   runners, races, np.asarray(offsets, dtype=np.int64), pool,
+                   [w for c in cards for w in c.withdrawals])
+        card.power_score = np.concatenate([c.power_score for c in cards])
+        card.win_probability = np.concatenate([c.win_probability for c in cards])
+        card.value_code = np.concatenate([c.value_code for c in cards])
+        card.place_probability = np.concatenate([c.place_probability for c in cards])
+        if cards and len({c.position_probability.shape[1] for c in cards}) == 1:
+            card.position_probability = np.concatenate([c.position_probability for c in cards])
+        if cards and all(c.exotics.keys() == cards[0].exotics.keys() for c in cards):
+            card.exotics = {name: [e for c in cards for e in c.exotics[name]] for name in cards[0].exotics}
+        if cards and all(c.factors.keys() == cards[0].factors.keys() for c in cards):
+            card.factors = {f: np.concatenate([c.factors[f] for c in cards]) for f in cards[0].factors}
+        return card
+
+    def runner_rows(self, race_indices: Iterable[int]) -> np.ndarray:
+        """فهارس متسابقي أشواط محددة (بالترتيب)"""
+        race_indices = np.asarray(list(race_indices), dtype=np.int64)
+        sizes = self.field_sizes[race_indices]
+        starts = np.repeat(self.offsets[race_indices] - np.concatenate([[0], np.cumsum(sizes)[:-1]]), sizes)
+        return np.arange(int(sizes.sum()), dtype=np.int64) + starts
+
+    def select(self, race_indices: Iterable[int]) -> "RaceCard":
+        """بطاقة جديدة بأشواط محددة فقط (نفس مخزن النصوص، بدون النتائج المحسوبة)"""
+        race_indices = np.asarray(list(race_indices), dtype=np.int64)
+        rows = self.runner_rows(race_indices)
+        runners = {name: values[rows] for name, values in self.runners.items()}
+        races = {name: values[race_indices] for name, values in self.races.items()}
+        offsets = np.concatenate([[0], np.cumsum(self.field_sizes[race_indices])]).astype(np.int64)
+        return RaceCard(self.track, self.date, runners, races, offsets, self.pool,
+                        [list(self.withdrawals[r]) for r in race_indices])
+
+    # ---------- الخصائص ----------
+
+    @property
+    def num_races(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def num_runners(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def race_index(self) -> np.ndarray:
+        """رقم الشوط (ترتيبه في البطاقة) لكل متسابق"""
+        return np.repeat(np.arange(self.num_races, dtype=np.int32), np.diff(self.offsets))
+
+    @property
+    def field_sizes(self) -> np.ndarray:
+        """عدد المتسابقين في كل شوط"""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self) -> int:
+        """الحجم التقريبي للمصفوفات في الذاكرة"""
+        arrays = list(self.runners.values()) + list(self.races.values())
+        arrays += [self.offsets, self.power_score, self.win_probability, self.value_code,
+                   self.place_probability, self.position_probability]
+        arrays += list(self.factors.values())
+        return sum(a.nbytes for a in arrays)
+
+    def race_slice(self, r: int) -> slice:
+        """نطاق متسابقي الشوط r"""
+        return slice(int(self.offsets[r]), int(self.offsets[r + 1]))
+
+    def pad_races(self, values: np.ndarray, start: int = 0, stop: Optional[int] = None,
+                  fill: float = 0.0):
+        """قيم أشواط متتالية كمصفوفة (أشواط × أكبر عدد متسابقين) مع قناع المتسابقين الحقيقيين
+
+        matrix[mask] يعيد القيم بنفس ترتيب المتسابقين في البطاقة
+        """
+        stop = self.num_races if stop is None else stop
+        offsets = self.offsets[start:stop + 1]
+        sizes = np.diff(offsets)
+        width = int(sizes.max()) if len(sizes) else 0
+        rows = np.repeat(np.arange(stop - start), sizes)
+        cols = np.arange(offsets[0], offsets[-1]) - offsets[:-1][rows]
+
+        matrix = np.full((stop - start, width), fill, dtype=np.float64)
+        matrix[rows, cols] = values[offsets[0]:offsets[-1]]
+        mask = np.zeros((stop - start, width), dtype=bool)
+        mask[rows, cols] = True
+        return matrix, mask
+
+    def find_race(self, race_number: int) -> int:
+        """ترتيب الشوط في البطاقة من رقمه"""
+        matches = np.flatnonzero(self.races["race_number"] == race_number)
+        if not len(matches):
+            raise KeyError(f"الشوط {race_number} غير موجود في البطاقة")
+        return int(matches[0])
+
+    def find_runner(self, r: int, number: int) -> int:
+        """فهرس المتسابق في البطاقة من رقمه داخل الشوط r"""
+        sl = self.race_slice(r)
+        matches = np.flatnonzero(self.runners["number"][sl] == number)
+        if not len(matches):
+            raise KeyError(f"الحصان رقم {number} غير موجود في الشوط {int(self.races['race_number'][r])}")
+        return sl.start + int(matches[0])
+
+    def columns(self, r: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """أعمدة التقييم لكل متسابق (نفس صيغة PowerRatingEngine.build_columns)
+
+        r: أعمدة شوط واحد فقط (لإعادة التقييم الجزئي)
+        """
+        if r is None:
+            sl = slice(None)
+            race_index = self.race_index
+        else:
+            sl = self.race_slice(r)
+            race_index = np.full(sl.stop - sl.start, r, dtype=np.int32)
+        return {
+            "race_index": race_index,
+            "rating": self.runners["rating"][sl].astype(np.float64),
+            "name": self.pool.decode(self.runners["name"][sl]),
+            "form": self.pool.decode(self.runners["form"][sl]),
+            "jockey": self.pool.decode(self.runners["jockey"][sl]),
+            "trainer": self.pool.decode(self.runners["trainer"][sl]),
+            "draw": self.runners["draw"][sl].astype(np.int32),
+            "field_size": self.field_sizes[race_index].astype(np.int32),
+            "distance": self.races["distance"][race_index],
+            "surface": self.pool.decode(self.races["surface"])[race_index]
+        }
+
+    def ranking(self) -> np.ndarray:
+        """ترتيب المتسابقين داخل كل شوط حسب نقاط القوة (تنازلياً، ترتيب ثابت)"""
+        return np.lexsort((-self.power_score.astype(np.int64), self.race_index))
+
+    def race_ranking(self, r: int, top: Optional[int] = None) -> np.ndarray:
+        """ترتيب متسابقي شوط واحد (نفس نتيجة ranking() لهذا الشوط)
+
+        top: أفضل top فقط - اختيار جزئي (argpartition) ثم ترتيب المختارين وحدهم
+        """
+        sl = self.race_slice(r)
+        n = sl.stop - sl.start
+        # مفتاح فريد: النقاط تنازلياً ثم موضع المتسابق (نفس الترتيب الثابت)
+        key = -self.power_score[sl].astype(np.int64) * max(n, 1) + np.arange(n)
+        if top is not None and top < n:
+            if top <= 0:
+                return np.zeros(0, dtype=np.int64)
+            chosen = np.argpartition(key, top - 1)[:top]
+            return sl.start + chosen[np.argsort(key[chosen])]
+        return sl.start + np.argsort(key)
+
+    # ---------- التعديلات المتأخرة ----------
+
+    def remove_runner(self, i: int):
+        """حذف متسابق من كل الأعمدة (والنتائج المحسوبة)"""
+        r = int(np.searchsorted(self.offsets, i, side="right")) - 1
+        for name in self.runners:
+            self.runners[name] = np.delete(self.runners[name], i)
+        for name in self.factors:
+            self.factors[name] = np.delete(self.factors[name], i)
+        self.power_score = np.delete(self.power_score, i)
+        self.win_probability = np.delete(self.win_probability, i)
+        self.value_code = np.delete(self.value_code, i)
+        self.place_probability = np.delete(self.place_probability, i)
+        self.position_probability = np.delete(self.position_probability, i, axis=0)
+        for per_race in self.exotics.values():
+            combos, _ = per_race[r]
+            per_race[r] = (combos[:0], np.zeros(0))
+        self.offsets = self.offsets.copy()
+        self.offsets[r + 1:] -= 1
+
+    def withdraw(self, r: int, number: int) -> int:
+        """سحب حصان (غير مشارك) من الشوط r وتسجيله في withdrawals"""
+        i = self.find_runner(r, number)
+        self.remove_runner(i)
+        self.withdrawals[r].append(number)
+        return i
+
+    def set_runner(self, i: int, **fields):
+        """تعديل حقول متسابق (النصوص تُوحد عبر StringPool)"""
+        for name, value in fields.items():
+            self.runners[name][i] = self.pool.intern(value) if name in self.STRING_FIELDS else value
+
+    def set_race(self, r: int, **fields):
+        """تعديل حقول شوط"""
+        for name, value in fields.items():
+            self.races[name][r] = self.pool.intern(value) if name in self.STRING_FIELDS else value
+
+    # ---------- العرض (Views) ----------
+
+    def race_info(self, r: int) -> Dict:
+        """بيانات الشوط بدون المتسابقين"""
+        lookup = self.pool.lookup
+        return {
+            "race_number": int(self.races["race_number"][r]),
+            "race_name": lookup(self.races["race_name"][r]),
+            "race_time": lookup(self.races["race_time"][r]),
+            "distance": int(self.races["distance"][r]),
+            "surface": lookup(self.races["surface"][r]),
+            "going": lookup(self.races["going"][r])
+        }
+
+    def horse_view(self, i: int, factors: bool = False) -> Horse:
+        """بناء كائن Horse لمتسابق واحد (factors: مع قيم العوامل)"""
+        lookup = self.pool.lookup
+        runners = self.runners
+        horse = Horse(
+            number=int(runners["number"][i]),
+            name=lookup(runners["name"][i]),
+            draw=int(runners["draw"][i]),
+            jockey=lookup(runners["jockey"][i]),
+            trainer=lookup(runners["trainer"][i]),
+            rating=int(runners["rating"][i]),
+            weight=int(runners["weight"][i]),
+            form=lookup(runners["form"][i])
+        )
+        horse.power_score = int(self.power_score[i])
+        horse.win_probability = float(self.win_probability[i])
+        horse.place_probability = float(self.place_probability[i])
+        horse.value_rating = VALUE_LABELS[self.value_code[i]]
+        if factors:
+            horse.factors = {name: round(float(values[i]), 4) for name, values in self.factors.items()}
+        return horse
+
+    def race_view(self, r: int, runner_indices: Optional[Iterable[int]] = None, factors: bool = False) -> Race:
+        """بناء كائن Race لشوط واحد (كل المتسابقين أو المحددين فقط)
+
+        factors: إضافة تفصيل العوامل لكل حصان
+        """
+        race = Race(**self.race_info(r))
+        race.withdrawals = list(self.withdrawals[r])
+        race.exotics = self.race_exotics(r)
+        race.field_size = int(self.field_sizes[r])
+        if runner_indices is None:
+            runner_indices = range(self.race_slice(r).start, self.race_slice(r).stop)
+        for i in runner_indices:
+            race.add_horse(self.horse_view(int(i), factors))
+        return race
+
+    def race_exotics(self, r: int) -> Dict[str, List[Dict]]:
+        """أعلى ترتيبات Exacta/Trifecta للشوط r (بالأسماء والنسبة المئوية)"""
+        start = int(self.offsets[r])
+        names = self.runners["name"]
+        exotics = {}
+        for bet, per_race in self.exotics.items():
+            combos, probs = per_race[r]
+            exotics[bet] = [
+                {"horses": [self.pool.lookup(names[start + int(c)]) for c in combo],
+                 "probability": round(float(prob) * 100, 2)}
+                for combo, prob in zip(combos, probs)
+            ]
+        return exotics
+
+    def to_races(self) -> List[Dict]:
+        """تحويل البطاقة كاملة إلى قائمة أشواط بصيغة القاموس"""
+        return [self.race_view(r).to_dict() for r in range(self.num_races)]
+
+
+# ===============================
+# بناء البطاقة
+# ===============================
+class RaceCardBuilder:
+    """بناء RaceCard تدريجياً (شوط ثم متسابقيه)"""
+
+    def __init__(self, track: str = None, date: str = None, pool: StringPool = None):
+        self.track = track
+        self.date = date
+        self.pool = pool if pool is not None else StringPool()
+        self._runners = {name: [] for name, _ in RaceCard.RUNNER_FIELDS}
+        self._races = {name: [] for name, _ in RaceCard.RACE_FIELDS}
+        self._offsets = [0]
+        self._withdrawals = []
+
+    def add_race(self, race_number: int, race_name: str, race_time: str,
+                 distance: int, surface: str, going: str = "", withdrawals: List = None):
+        """إضافة شوط جديد (المتسابقون التاليون يتبعون له)"""
+        intern = self.pool.intern
+        self._races["race_number"].append(race_number)
+        self._races["race_name"].append(intern(race_name))
+        self._races["race_time"].append(intern(race_time))
+        self._races["distance"].append(distance)
+        self._races["surface"].append(intern(surface))
+        self._races["going"].append(intern(going))
+        self._offsets.append(self._offsets[-1])
+        self._withdrawals.append(list(withdrawals or []))
+
+    def add_runner(self, number: int, name: str, draw: int = 0, jockey: str = "",
+                   trainer: str = "", rating: int = 0, weight: int = 0, form: str = ""):
+        """إضافة متسابق للشوط الأخير"""
+        intern = self.pool.intern
+        runners = self._runners
+        runners["number"].append(number)
+        runners["name"].append(intern(name))
+        runners["draw"].append(draw)
+        runners["jockey"].append(intern(jockey))
+        runners["trainer"].append(intern(trainer))
+        runners["rating"].append(rating)
+        runners["weight"].append(weight)
+        runners["form"].append(intern(form))
+        self._offsets[-1] += 1
+
+    def build(self) -> RaceCard:
+        """تحويل القوائم إلى مصفوفات مضغوطة"""
+        runners = {name: np.asarray(self._runners[name], dtype=dtype) for name, dtype in RaceCard.RUNNER_FIELDS}
+        races = {name: np.asarray(self._races[name], dtype=dtype) for name, dtype in RaceCard.RACE_FIELDS}
+        return RaceCard(self.track, self.date, runners, races,
+                        np.asarray(self._offsets, dtype=np.int64), self.pool, self._withdrawals)
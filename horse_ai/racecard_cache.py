@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RaceCard Cache - ذاكرة البطاقات على القرص
+كل بطاقة تُحفظ مضغوطة (gzip JSON) بمفتاح (المصدر، المضمار، التاريخ)
+- الأيام الماضية ثابتة لا تنتهي صلاحيتها
+- بطاقات اليوم تُحدّث بسرعة أكبر كلما اقترب موعد الشوط التالي (بالتوقيت المحلي للمضمار)
+- الحجم الكلي محدود ويُحذف الأقدم استخداماً (LRU)
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, time as dtime
+from typing import Dict, List, Optional
+
+from racecard import RaceCard, StringPool
+from tracks import track_timezone
+
+
+# مدة الصلاحية بالثواني
+DEFAULT_TTL = {
+    "future": 6 * 3600,         # تاريخ قادم (ليس اليوم)
+    "today_far": 30 * 60,       # اليوم - أكثر من 3 ساعات على الشوط التالي
+    "today_near": 10 * 60,      # اليوم - بين ساعة و3 ساعات
+    "today_imminent": 2 * 60,   # اليوم - أقل من ساعة
+    "today_finished": 3600,     # اليوم - انتهت كل الأشواط
+    "simulated": 3600,          # بيانات المحاكاة لا تُعتبر ثابتة أبداً
+}
+
+# مفتاح المصدر لبطاقات المحاكاة
+SIMULATED_SOURCE = "simulated"
+
+SAFE_RE = re.compile(r"[^\w.-]+")
+
+
+def track_tz(track: str):
+    """المنطقة الزمنية لمضمار (None = غير معروف أو بيانات المناطق غير مثبتة: توقيت الجهاز)"""
+    name = track_timezone(track)
+    if name is None:
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except (ImportError, KeyError):
+        # ZoneInfoNotFoundError (Windows بدون حزمة tzdata) مشتق من KeyError
+        return None
+
+
+def ttl_for(date: str, race_times: List[str], now: datetime = None,
+            ttl: Dict[str, float] = None, tz=None) -> Optional[float]:
+    """مدة صلاحية البطاقة حسب الوقت المتبقي على الشوط التالي (None = لا تنتهي)
+
+    tz: المنطقة الزمنية للمضمار - أوقات الأشواط و"اليوم" بتوقيته المحلي وليس توقيت الجهاز
+    """
+    ttl = ttl or DEFAULT_TTL
+    now = now or datetime.now(tz)
+    if tz is not None:
+        now = now.astimezone(tz)
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return ttl["today_imminent"]
+
+    if day < now.date():
+        return None
+    if day > now.date():
+        return ttl["future"]
+
+    posts = []
+    for race_time in race_times:
+        try:
+            hour, minute = (int(x) for x in race_time.split(":")[:2])
+            posts.append(datetime.combine(day, dtime(hour, minute), tzinfo=now.tzinfo))
+        except (ValueError, AttributeError):
+            continue
+    upcoming = [p for p in posts if p > now]
+
+    if posts and not upcoming:
+        return ttl["today_finished"]
+    if not upcoming:
+        return ttl["today_imminent"]
+
+    minutes_to_post = (min(upcoming) - now).total_seconds() / 60
+    if minutes_to_post > 180:
+        return ttl["today_far"]
+    if minutes_to_post > 60:
+        return ttl["today_near"]
+    return ttl["today_imminent"]
+
+
+class RacecardCache:
+    """ذاكرة البطاقات على القرص مع حد أقصى للحجم (LRU حسب آخر استخدام)"""
+
+    def __init__(self, cache_dir: str, max_bytes: int = 200 * 1024 * 1024, ttl: Dict[str, float] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[str, int]] = None
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0, "evictions": 0}
+
+    # ---------- المسارات ----------
+
+    def _path(self, source: str, track: str, date: str) -> str:
+        name = "__".join(SAFE_RE.sub("_", str(part)) for part in (source, track, date))
+        return os.path.join(self.cache_dir, name + ".json.gz")
+
+    def _index(self) -> Dict[str, int]:
+        """أحجام الملفات المخزنة (يُبنى مرة واحدة من المجلد)"""
+        if self._sizes is None:
+            self._sizes = {}
+            if os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(".json.gz"):
+                        self._sizes[entry.path] = entry.stat().st_size
+        return self._sizes
+
+    # ---------- القراءة والكتابة ----------
+
+    def _load(self, source: str, track: str, date: str, pool: StringPool,
+              now: datetime) -> Optional[Dict]:
+        """قراءة ملف واحد إن وُجد وكان صالحاً (بدون تحديث العدادات)"""
+        path = self._path(source, track, date)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        meta = payload["meta"]
+        ttl = ttl_for(date, meta.get("race_times", []), now, self.ttl, track_tz(track))
+        if source == SIMULATED_SOURCE:
+            ttl = self.ttl["simulated"] if ttl is None else min(ttl, self.ttl["simulated"])
+        if ttl is not None and now.timestamp() - meta["fetched_at"] > ttl:
+            with self._lock:
+                self.stats["expired"] += 1
+            return None
+
+        # تحديث وقت الاستخدام (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        card = RaceCard.from_races(payload["races"], track, date, pool)
+        return {
+            "success": True,
+            "track": track,
+            "date": date,
+            "card": card,
+            "total_races": card.num_races,
+            "source": source,
+            "cache": {"hit": True, "fetched_at": meta["fetched_at"], "ttl": ttl}
+        }
+
+    def lookup(self, sources: List[str], track: str, date: str, pool: StringPool = None,
+               now: datetime = None) -> Optional[Dict]:
+        """أول بطاقة صالحة من المصادر بالترتيب (إصابة أو إخفاق واحد لكل بحث)"""
+        # وقت بمنطقة زمنية: يُحوّل لتوقيت المضمار عند مقارنته بأوقات الأشواط
+        now = now or datetime.now().astimezone()
+        for source in sources:
+            data = self._load(source, track, date, pool, now)
+            if data is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return data
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def get(self, source: str, track: str, date: str, pool: StringPool = None,
+            now: datetime = None) -> Optional[Dict]:
+        """قراءة بطاقة صالحة من الذاكرة (None عند عدم وجودها أو انتهاء صلاحيتها)"""
+        return self.lookup([source], track, date, pool, now)
+
+    def put(self, source: str, track: str, date: str, card: RaceCard):
+        """حفظ بطاقة (كتابة ذرية) ثم تطبيق حد الحجم"""
+        races = card.to_races()
+        payload = {
+            "meta": {
+                "source": source,
+                "track": track,
+                "date": date,
+                "fetched_at": time.time(),
+                "race_times": [r["race_time"] for r in races]
+            },
+            "races": races
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(source, track, date)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._index()[path] = os.path.getsize(path)
+            self.stats["writes"] += 1
+            self._evict()
+
+    def invalidate(self, source: str = None, track: str = None, date: str = None) -> int:
+        """حذف بطاقات مطابقة (أي قيمة None تطابق الكل)"""
+        removed = 0
+        with self._lock:
+            for path in list(self._index()):
+                parts = os.path.basename(path)[:-len(".json.gz")].split("__")
+                if len(parts) != 3:
+                    continue
+                if all(want is None or SAFE_RE.sub("_", want) == got
+                       for want, got in zip((source, track, date), parts)):
+                    self._remove(path)
+                    removed += 1
+        return removed
+
+    # ---------- الحجم ----------
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self._index().pop(path, None)
+
+    def _evict(self):
+        """حذف الأقدم استخداماً حتى يصبح الحجم ضمن الحد"""
+        sizes = self._index()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(path):
+            try:
+                return os.stat(path).st_mtime
+            except OSError:
+                return 0
+
+        for path in sorted(sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= sizes[path]
+            self._remove(path)
+            self.stats["evictions"] += 1
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(self._index().values())
+
+    def summary(self) -> Dict:
+        """عدادات الذاكرة"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats,
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+                        size_bytes=sum(self._index().values()),
+                        files=len(self._index()))
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Runner Stats - إحصائيات الفوز المنكمشة (Beta-Binomial) للفرسان والمدربين والمضامير
+عدادات تراكمية (مشاركات، انتصارات، مراكز أولى ثلاثة) لكل مفتاح من خمسة أنواع:
+jockey، trainer، jockey_trainer (الثنائي)، course (الحصان × المضمار)، distance_band (الحصان × فئة المسافة)
+
+- التحديث لكل نتيجة O(1): صف ثابت لكل مفتاح في مصفوفة عدادات (تتضاعف عند الامتلاء)
+- المعدل المنكمش = (انتصارات + κ·μ) / (مشاركات + κ)
+  μ = متوسط المجتمع للنوع (مجاميع تراكمية)، κ = عدد المشاركات الوهمية للنوع (PRIOR_RIDES أو مقدّر
+  من تباين المعدلات بين المفاتيح عبر fit_prior_rides)
+  مفتاح جديد ← μ، ومع تراكم المشاركات يقترب من المعدل الفعلي
+- البحث لكل البطاقة دفعة واحدة: المفاتيح الفريدة فقط تُبحث في القاموس ثم فهرسة NumPy
+- البصمة سلسلة blake2b للمشاركات المضافة (O(1) لكل نتيجة، ومتطابقة بين العمليات) - جزء من مفتاح ذاكرة التقييم
+- ملف واحد مشترك (data/runner_stats.json) يقرأه PowerRatingEngine ويكتبه كل من يسجل نتائج
+  (HorseAIPredictor.record_results و LearningEngine) عبر update_file: قراءة-تعديل-حفظ تحت قفل
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from file_lock import file_lock
+from strength_index import normalize_name
+
+
+# الملف المشترك (نفس CONFIG["runner_stats"]["path"] في race_bot)
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "runner_stats.json")
+
+KINDS = ("jockey", "trainer", "jockey_trainer", "course", "distance_band")
+OUTCOMES = ("rides", "wins", "places")
+
+# المشاركات الوهمية لكل نوع (κ): الأنواع الأدق (ثنائي، حصان × مضمار) عيناتها أصغر فتنكمش أسرع
+PRIOR_RIDES = {"jockey": 50, "trainer": 50, "jockey_trainer": 20, "course": 10, "distance_band": 10}
+
+# متوسط المجتمع قبل وجود أي نتيجة (حقل من 10 متسابقين)
+DEFAULT_RATES = {"wins": 0.10, "places": 0.30}
+
+# حدود فئات المسافة بالمتر: sprint ≤ 1200 < mile ≤ 1600 < middle ≤ 2400 < staying
+DISTANCE_BANDS = (1200, 1600, 2400)
+BAND_NAMES = ("sprint", "mile", "middle", "staying")
+
+
+def distance_band(distance) -> np.ndarray:
+    """فئة المسافة (0-3) لمسافة أو مصفوفة مسافات"""
+    return np.searchsorted(DISTANCE_BANDS, np.asarray(distance), side="left")
+
+
+def _horse_key(name: str) -> str:
+    return " ".join((name or "").lower().split())
+
+
+class RunnerStats:
+    """عدادات الفوز لكل نوع ومفتاح مع انكماش نحو متوسط المجتمع"""
+
+    def __init__(self, path: str = None, prior_rides: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.prior_rides = dict(PRIOR_RIDES, **(prior_rides or {}))
+        self.slots: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        self.keys: Dict[str, List[str]] = {kind: [] for kind in KINDS}
+        self.counts: Dict[str, np.ndarray] = {kind: np.zeros((64, len(OUTCOMES)), dtype=np.int64)
+                                              for kind in KINDS}
+        self.totals: Dict[str, np.ndarray] = {kind: np.zeros(len(OUTCOMES), dtype=np.int64) for kind in KINDS}
+        self.processed: set = set()
+        self.chain = ""
+
+    # ---------- التحميل والحفظ ----------
+
+    def state(self) -> Dict:
+        """الحالة كقاموس JSON"""
+        return {
+            "kinds": {kind: {"keys": self.keys[kind], "counts": self.counts[kind][:len(self.keys[kind])].tolist()}
+                      for kind in KINDS},
+            "processed": sorted(self.processed),
+            "chain": self.chain
+        }
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict], path: str = None,
+                   prior_rides: Optional[Dict[str, float]] = None) -> "RunnerStats":
+        stats = cls(path, prior_rides)
+        if not state:
+            return stats
+        for kind in KINDS:
+            data = state.get("kinds", {}).get(kind)
+            if not data or not data["keys"]:
+                continue
+            counts = np.asarray(data["counts"], dtype=np.int64).reshape(-1, len(OUTCOMES))
+            stats.keys[kind] = list(data["keys"])
+            stats.slots[kind] = {key: slot for slot, key in enumerate(stats.keys[kind])}
+            stats.counts[kind] = np.zeros((max(64, 2 * len(counts)), len(OUTCOMES)), dtype=np.int64)
+            stats.counts[kind][:len(counts)] = counts
+            stats.totals[kind] = counts.sum(axis=0)
+        stats.processed = set(state.get("processed", []))
+        stats.chain = state.get("chain", "")
+        return stats
+
+    @classmethod
+    def load(cls, path: str, prior_rides: Optional[Dict[str, float]] = None) -> "RunnerStats":
+        """تحميل الإحصائيات من ملف (أو إحصائيات فارغة إن لم يوجد)"""
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    return cls.from_state(json.load(f), path, prior_rides)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ تعذر تحميل إحصائيات المتسابقين: {e}")
+        return cls(path, prior_rides)
+
+    @classmethod
+    def update_file(cls, path: str, apply, prior_rides: Optional[Dict[str, float]] = None) -> "RunnerStats":
+        """قراءة أحدث نسخة من الملف وتعديلها وحفظها تحت قفل الملف - تُعيد النسخة المحدثة
+
+        apply(stats) -> bool: تعديل الإحصائيات (True = تغيرت فتُحفظ). النتائج والأحداث المكررة
+        تُتجاهل (processed)، فإعادة تطبيق نفس التحديثات على نسخة كاتب آخر آمنة
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with file_lock(path + ".lock"):
+            stats = cls.load(path, prior_rides)
+            if apply(stats):
+                stats.save()
+        return stats
+
+    def save(self, path: str = None):
+        """حفظ الإحصائيات (كتابة ذرية عبر ملف مؤقت)"""
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ---------- المفاتيح ----------
+
+    @staticmethod
+    def runner_keys(runner: Dict, track: Optional[str] = None, distance: Optional[int] = None) -> Dict[str, str]:
+        """مفاتيح متسابق واحد لكل نوع متاح (الحصان من name أو horse)"""
+        keys = {}
+        jockey = normalize_name(runner.get("jockey") or "")
+        trainer = normalize_name(runner.get("trainer") or "")
+        horse = _horse_key(runner.get("name") or runner.get("horse") or "")
+        if jockey:
+            keys["jockey"] = jockey
+        if trainer:
+            keys["trainer"] = trainer
+        if jockey and trainer:
+            keys["jockey_trainer"] = f"{jockey}|{trainer}"
+        if horse and track:
+            keys["course"] = f"{horse}|{track.lower()}"
+        if horse and distance:
+            keys["distance_band"] = f"{horse}|{BAND_NAMES[int(distance_band(distance))]}"
+        return keys
+
+    def _slot(self, kind: str, key: str) -> int:
+        slot = self.slots[kind].get(key)
+        if slot is None:
+            slot = len(self.keys[kind])
+            if slot == len(self.counts[kind]):
+                grown = np.zeros((2 * slot, len(OUTCOMES)), dtype=np.int64)
+                grown[:slot] = self.counts[kind]
+                self.counts[kind] = grown
+            self.slots[kind][key] = slot
+            self.keys[kind].append(key)
+        return slot
+
+    # ---------- التحديث ----------
+
+    def update(self, kind: str, key: str, position: int = 0):
+        """مشاركة واحدة لمفتاح (position: 1 = فوز، 2-3 = مركز، 0 = غير معروف/خارج المراكز)"""
+        slot = self._slot(kind, key)
+        counts, totals = self.counts[kind], self.totals[kind]
+        counts[slot, 0] += 1
+        totals[0] += 1
+        if 1 <= position <= 3:
+            counts[slot, 2] += 1
+            totals[2] += 1
+            if position == 1:
+                counts[slot, 1] += 1
+                totals[1] += 1
+
+    def _chain(self, *payload):
+        """إضافة حلقة إلى سلسلة البصمة"""
+        text = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        self.chain = hashlib.blake2b((self.chain + text).encode("utf-8"), digest_size=8).hexdigest()
+
+    def _add_runner(self, runner: Dict, track: Optional[str], distance: Optional[int]):
+        position = runner.get("position") or 0
+        for kind, key in self.runner_keys(runner, track, distance).items():
+            self.update(kind, key, position)
+
+    def add_runner(self, runner: Dict, track: Optional[str] = None, distance: Optional[int] = None,
+                   event_id: Optional[str] = None) -> bool:
+        """مشاركة متسابق في كل الأنواع المتاحة من بياناته
+
+        event_id: معرف فريد للمشاركة (تُتجاهل إن سبق تسجيلها، مثل نتائج الأشواط)
+        """
+        if event_id is not None:
+            if event_id in self.processed:
+                return False
+            self.processed.add(event_id)
+        self._add_runner(runner, track, distance)
+        self._chain(track, distance, runner)
+        return True
+
+    def add_result(self, track: str, date: str, race_number: int, runners: List[Dict],
+                   distance: Optional[int] = None) -> bool:
+        """إضافة نتيجة شوط واحد (تُتجاهل إن سبق تسجيلها)
+
+        runners: [{"name", "jockey", "trainer", "position"}, ...]
+        distance: مسافة الشوط (لفئة المسافة - بدونها لا يُحدث distance_band)
+        """
+        result_id = f"{track}|{date}|{race_number}"
+        if result_id in self.processed:
+            return False
+        for runner in runners:
+            self._add_runner(runner, track, distance)
+        self.processed.add(result_id)
+        self._chain(result_id, distance, runners)
+        return True
+
+    def add_results(self, track: str, date: str, results: Iterable[Dict],
+                    distances: Optional[Dict[int, int]] = None) -> int:
+        """إضافة نتائج اجتماع كامل (فقط الأشواط التي تحتوي على runners)
+
+        distances: {race_number: distance} للأشواط التي لا تحمل distance في النتيجة
+        """
+        distances = distances or {}
+        added = 0
+        for result in results:
+            number = result.get("race_number")
+            distance = result.get("distance") or distances.get(number)
+            if result.get("runners") and self.add_result(track, date, number, result["runners"], distance):
+                added += 1
+        return added
+
+    # ---------- المعدلات ----------
+
+    def fingerprint(self) -> str:
+        """بصمة النتائج المضافة والمشاركات الوهمية"""
+        payload = json.dumps([self.chain, self.prior_rides], sort_keys=True)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+    def mean(self, kind: str, outcome: str = "wins") -> float:
+        """متوسط المجتمع للنوع (μ)"""
+        rides = self.totals[kind][0]
+        if rides == 0:
+            return DEFAULT_RATES[outcome]
+        return float(self.totals[kind][OUTCOMES.index(outcome)] / rides)
+
+    def fit_prior_rides(self, kinds: Iterable[str] = KINDS, min_keys: int = 30,
+                        outcome: str = "wins") -> Dict[str, float]:
+        """تقدير κ لكل نوع من البيانات (Empirical Bayes بطريقة العزوم)
+
+        تباين المعدلات الخام بين المفاتيح = τ² (تباين حقيقي) + μ(1-μ)·متوسط(1/n) (ضجيج العينة)
+        و Beta بمتوسط μ وتباين τ² ⟸ κ = μ(1-μ)/τ² - 1
+        الأنواع بأقل من min_keys مفتاحاً تبقى على قيمتها الحالية
+        """
+        fitted = {}
+        for kind in kinds:
+            size = len(self.keys[kind])
+            if size < min_keys:
+                continue
+            counts = self.counts[kind][:size]
+            rides = counts[:, 0]
+            raw = counts[:, OUTCOMES.index(outcome)] / rides
+            mean = self.mean(kind, outcome)
+            noise = mean * (1 - mean) * np.mean(1 / rides)
+            spread = np.mean((raw - mean) ** 2) - noise
+            kappa = mean * (1 - mean) / spread - 1 if spread > 0 else 1000.0
+            self.prior_rides[kind] = fitted[kind] = round(float(np.clip(kappa, 1.0, 1000.0)), 1)
+        return fitted
+
+    def shrink(self, kind: str, rows: np.ndarray, outcome: str = "wins",
+               prior: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """المعدل المنكمش وعدد المشاركات لصفوف (-1 = مفتاح غير معروف)
+
+        prior: متوسط مسبق لكل صف بدلاً من متوسط المجتمع (نفس κ)
+        """
+        known = rows >= 0
+        counts = self.counts[kind][np.where(known, rows, 0)]
+        rides = np.where(known, counts[:, 0], 0)
+        hits = np.where(known, counts[:, OUTCOMES.index(outcome)], 0)
+        kappa = self.prior_rides[kind]
+        mean = self.mean(kind, outcome) if prior is None else prior
+        return (hits + kappa * mean) / (rides + kappa), rides
+
+    def rows(self, kind: str, keys) -> np.ndarray:
+        """صفوف مصفوفة مفاتيح (كل مفتاح فريد يُبحث مرة واحدة، -1 = غير معروف)"""
+        unique, inverse = np.unique(np.asarray(keys, dtype=object).astype(str), return_inverse=True)
+        table = self.slots[kind]
+        found = np.fromiter((table.get(key, -1) for key in unique.tolist()), dtype=np.int64, count=len(unique))
+        return found[inverse]
+
+    def rate(self, kind: str, key: str, outcome: str = "wins") -> float:
+        """المعدل المنكمش لمفتاح واحد (المفتاح بعد التوحيد كما في runner_keys)"""
+        rate, _ = self.shrink(kind, np.array([self.slots[kind].get(key, -1)]), outcome)
+        return float(rate[0])
+
+    def runner_rates(self, runner: Dict, track: Optional[str] = None, distance: Optional[int] = None,
+                     outcome: str = "wins") -> Dict[str, float]:
+        """المعدلات المنكمشة لمتسابق واحد لكل نوع متاح من بياناته"""
+        return {kind: self.rate(kind, key, outcome) for kind, key in self.runner_keys(runner, track, distance).items()}
+
+    def lookup(self, kind: str, keys, outcome: str = "wins") -> Tuple[np.ndarray, np.ndarray]:
+        """المعدلات المنكمشة وعدد المشاركات لمصفوفة مفاتيح"""
+        return self.shrink(kind, self.rows(kind, keys), outcome)
+
+    def card_rows(self, columns: Dict[str, np.ndarray], track: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """صفوف كل الأنواع لمتسابقي بطاقة أو شوط في استدعاء واحد: {kind: rows}
+
+        columns: أعمدة RaceCard.columns() (name، jockey، trainer، distance)
+        """
+        def normalized(values, normalize):
+            unique, inverse = np.unique(values.astype(str), return_inverse=True)
+            return np.array([normalize(v) for v in unique.tolist()], dtype=object)[inverse]
+
+        jockey = normalized(columns["jockey"], normalize_name)
+        trainer = normalized(columns["trainer"], normalize_name)
+        horse = normalized(columns["name"], _horse_key)
+        bands = np.array(BAND_NAMES, dtype=object)[distance_band(columns["distance"])]
+
+        keys = {"jockey": jockey, "trainer": trainer, "jockey_trainer": jockey + "|" + trainer,
+                "course": horse + "|" + (track or "").lower(), "distance_band": horse + "|" + bands}
+        return {kind: self.rows(kind, values) for kind, values in keys.items()}
+
+    def card_lookup(self, columns: Dict[str, np.ndarray], track: Optional[str] = None,
+                    outcome: str = "wins") -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """المعدلات المنكمشة لكل الأنواع لمتسابقي بطاقة أو شوط: {kind: (rate, rides)}"""
+        return {kind: self.shrink(kind, rows, outcome) for kind, rows in self.card_rows(columns, track).items()}
+
+    def top(self, kind: str, limit: int = 10, min_rides: int = 0, outcome: str = "wins") -> List[Dict]:
+        """أعلى المفاتيح حسب المعدل المنكمش"""
+        size = len(self.keys[kind])
+        rate, rides = self.shrink(kind, np.arange(size), outcome)
+        order = [i for i in np.argsort(-rate, kind="stable").tolist() if rides[i] >= min_rides][:limit]
+        return [{"key": self.keys[kind][i], "rate": round(float(rate[i]), 4), "rides": int(rides[i])}
+                for i in order]
+
+    def summary(self) -> Dict:
+        return {kind: {"keys": len(self.keys[kind]), "rides": int(self.totals[kind][0]),
+                       "win_rate": round(self.mean(kind), 4)} for kind in KINDS}
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Score Cache - ذاكرة نتائج التقييم لكل شوط بمفتاح محتوى الشوط
+نفس الاجتماع يُطلب مراراً من الواجهات، فالشوط الذي لم يتغير لا يُعاد تقييمه:
+- المفتاح = بصمة (blake2b) لمدخلات الشوط الموحدة (المتسابقون بكل حقولهم، المسافة، الأرضية، الحالة)
+  + المضمار + بصمة النموذج (الأوزان، إعدادات الاحتمالات، فهرس القوة، إحصائيات المتسابقين، MODEL_VERSION)
+  أي تغيير في النموذج يغير كل المفاتيح، فلا حاجة لمسح يدوي (القديم يخرج بالـ LRU)
+- طبقتان: LRU في الذاكرة + مجلد مشترك اختياري على القرص (ملف لكل شوط: رأس JSON ثم
+  بيانات المصفوفات الخام - بدون pickle وبدون كلفة zip الخاصة بـ .npz)
+- القيمة المخزنة: العوامل ونقاط القوة والاحتمالات وتصنيف القيمة و Exacta/Trifecta للشوط
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from racecard import RaceCard
+
+
+# يُزاد عند تغيير منطق التقييم نفسه (وليس الأوزان أو الإعدادات - هذه جزء من البصمة تلقائياً)
+MODEL_VERSION = 2
+
+# حقول الشوط التي تؤثر على التقييم (رقم الشوط واسمه ووقته لا تؤثر)
+RACE_INPUT_FIELDS = ("distance", "surface", "going")
+
+FILE_SUFFIX = ".race"
+
+
+# ===============================
+# المفاتيح
+# ===============================
+def model_key(weights: Dict[str, float], strength_fingerprint: str, settings: Dict,
+              stats_fingerprint: str = "") -> bytes:
+    """بصمة النموذج: الأوزان + فهرس القوة + إعدادات الاحتمالات + إحصائيات المتسابقين + MODEL_VERSION"""
+    payload = json.dumps({"version": MODEL_VERSION, "weights": weights, "strength": strength_fingerprint,
+                          "settings": settings, "stats": stats_fingerprint}, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
+
+def _string_digests(card: RaceCard, ids: np.ndarray) -> np.ndarray:
+    """بصمة 64-bit لكل نص (مستقلة عن ترتيب مخزن النصوص، فتتطابق بين العمليات)"""
+    unique, inverse = np.unique(ids, return_inverse=True)
+    table = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+         for text in card.pool.decode(unique).tolist()),
+        dtype=np.int64, count=len(unique))
+    return table[inverse].reshape(ids.shape)
+
+
+def _encode(card: RaceCard, table: Dict[str, np.ndarray], fields) -> np.ndarray:
+    """أعمدة الحقول كمصفوفة int64 (النصوص كبصمات)"""
+    columns = []
+    for name in fields:
+        values = table[name]
+        columns.append(_string_digests(card, values) if name in RaceCard.STRING_FIELDS
+                       else values.astype(np.int64))
+    return np.stack(columns, axis=1) if columns else np.zeros((0, 0), dtype=np.int64)
+
+
+def race_keys(card: RaceCard, model: bytes) -> List[str]:
+    """مفتاح المحتوى لكل شوط في البطاقة (المضمار جزء منه: إحصائيات الحصان × المضمار)"""
+    runners = _encode(card, card.runners, [name for name, _ in RaceCard.RUNNER_FIELDS])
+    races = _encode(card, card.races, RACE_INPUT_FIELDS)
+    track = (card.track or "").lower().encode("utf-8")
+    keys = []
+    for r in range(card.num_races):
+        digest = hashlib.blake2b(model, digest_size=16)
+        digest.update(track + b"\0")
+        digest.update(races[r].tobytes())
+        digest.update(np.ascontiguousarray(runners[card.race_slice(r)]).tobytes())
+        keys.append(digest.hexdigest())
+    return keys
+
+
+# ===============================
+# نتيجة الشوط
+# ===============================
+def extract_race(card: RaceCard, r: int) -> Dict[str, np.ndarray]:
+    """نسخة من نتائج الشوط r المحسوبة في البطاقة"""
+    sl = card.race_slice(r)
+    value = {
+        "power_score": card.power_score[sl].copy(),
+        "win_probability": card.win_probability[sl].copy(),
+        "place_probability": card.place_probability[sl].copy(),
+        "value_code": card.value_code[sl].copy(),
+        "position_probability": card.position_probability[sl].copy(),
+    }
+    for factor, values in card.factors.items():
+        value[f"factor.{factor}"] = values[sl].copy()
+    for bet, races in card.exotics.items():
+        combos, top = races[r]
+        value[f"{bet}.combos"] = np.asarray(combos).copy()
+        value[f"{bet}.top"] = np.asarray(top).copy()
+    return value
+
+
+def restore_race(card: RaceCard, r: int, value: Dict[str, np.ndarray]):
+    """كتابة نتيجة محفوظة في الشوط r (أعمدة البطاقة مُهيأة مسبقاً بنفس الأبعاد)"""
+    sl = card.race_slice(r)
+    card.power_score[sl] = value["power_score"]
+    card.win_probability[sl] = value["win_probability"]
+    card.place_probability[sl] = value["place_probability"]
+    card.value_code[sl] = value["value_code"]
+    card.position_probability[sl] = value["position_probability"]
+    for factor, values in card.factors.items():
+        values[sl] = value[f"factor.{factor}"]
+    for bet, races in card.exotics.items():
+        races[r] = (value[f"{bet}.combos"], value[f"{bet}.top"])
+
+
+def pack(value: Dict[str, np.ndarray]) -> bytes:
+    """ترميز نتيجة شوط: سطر JSON (الاسم، النوع، الأبعاد) ثم بيانات كل مصفوفة بالترتيب"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in value.items()}
+    header = [[name, array.dtype.str, list(array.shape)] for name, array in arrays.items()]
+    return b"".join([json.dumps(header).encode("utf-8"), b"\n"] + [a.tobytes() for a in arrays.values()])
+
+
+def unpack(blob: bytes) -> Dict[str, np.ndarray]:
+    """عكس pack (ValueError إن كان الملف مبتوراً)"""
+    end = blob.index(b"\n")
+    offset = end + 1
+    value = {}
+    for name, dtype, shape in json.loads(blob[:end]):
+        dtype = np.dtype(dtype)
+        count = math.prod(shape)
+        value[name] = np.frombuffer(blob, dtype, count, offset).reshape(shape)
+        offset += count * dtype.itemsize
+    if offset != len(blob):
+        raise ValueError("ملف تقييم غير مكتمل")
+    return value
+
+
+# ===============================
+# الذاكرة
+# ===============================
+class ScoreCache:
+    """LRU في الذاكرة (عدد أشواط) + مجلد مشترك اختياري على القرص (حد حجم، الأقدم كتابة يُحذف)
+
+    القراءة من القرص لا تحدّث وقت الملف (كتابة إضافية لكل إصابة)، والشوط المقروء يبقى في الذاكرة
+    """
+
+    def __init__(self, max_races: int = 20000, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 200 * 1024 * 1024):
+        self.max_races = max_races
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sizes: Optional[Dict[str, int]] = None
+        self._disk_bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0,
+                      "disk_evictions": 0}
+
+    # ---------- القرص ----------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key + FILE_SUFFIX)
+
+    def _index(self) -> Dict[str, int]:
+        """أحجام الملفات على القرص (يُبنى مرة واحدة من المجلد)"""
+        if self._sizes is None:
+            self._sizes = {}
+            if os.path.isdir(self.disk_dir):
+                for entry in os.scandir(self.disk_dir):
+                    if entry.name.endswith(FILE_SUFFIX):
+                        self._sizes[entry.path] = entry.stat().st_size
+            self._disk_bytes = sum(self._sizes.values())
+        return self._sizes
+
+    def _load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                return unpack(f.read())
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write(self, key: str, value: Dict[str, np.ndarray]):
+        """كتابة ذرية (عمليات أخرى قد تقرأ نفس المجلد)"""
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        blob = pack(value)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ فشل حفظ التقييم على القرص: {e}")
+            return
+        with self._lock:
+            sizes = self._index()
+            size = len(blob)
+            self._disk_bytes += size - sizes.get(path, 0)
+            sizes[path] = size
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """حذف الأقدم كتابة حتى 90% من الحد (حتى لا يُفحص المجلد مع كل كتابة)"""
+        sizes = self._index()
+        target = self.disk_max_bytes * 0.9
+
+        def written(path):
+            try:
+                return os.stat(path).st_mtime
+            except OSError:
+                return 0
+
+        for path in sorted(sizes, key=written):
+            if self._disk_bytes <= target:
+                break
+            self._disk_bytes -= sizes.pop(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.stats["disk_evictions"] += 1
+
+    # ---------- الواجهة ----------
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """نتيجة الشوط المحفوظة (الذاكرة ثم القرص) أو None"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                return value
+
+        value = self._load(key) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, value: Dict[str, np.ndarray]):
+        """حفظ نتيجة شوط في الطبقتين"""
+        with self._lock:
+            self._remember(key, value)
+            self.stats["writes"] += 1
+        if self.disk_dir:
+            self._write(key, value)
+
+    def _remember(self, key: str, value: Dict[str, np.ndarray]):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_races:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        """مسح طبقة الذاكرة فقط (القرص مشترك مع عمليات أخرى)"""
+        with self._lock:
+            self._memory.clear()
+
+    def summary(self) -> Dict:
+        """عدادات الذاكرة"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["hits"] + self.stats["disk_hits"]
+            return dict(self.stats,
+                        hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                        races=len(self._memory),
+                        disk_files=len(self._index()) if self.disk_dir else 0,
+                        disk_bytes=self._disk_bytes)
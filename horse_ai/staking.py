@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Staking - حساب الرهانات بمعيار كيلي (Kelly) لبطاقة كاملة
+لكل شوط: رهانات متزامنة على نتائج متنافية (حصان واحد فقط يفوز)
+الحل الدقيق (Kelly 1956 / Smoczynski-Tomkins):
+  1. ترتيب الخيول حسب العائد المتوقع p·o تنازلياً
+  2. إضافة الخيول ما دام p·o > R حيث R = (1 - Σp) / (1 - Σ1/o) للمجموعة المختارة
+  3. النسبة من رأس المال f = p - R/o
+ثم كسر كيلي (fractional Kelly) وحدود الشوط والتعرض الكلي
+
+كل الحسابات على مصفوفات (أشواط × أكبر عدد متسابقين) لإعادة الحل مع كل تغيير في الأسعار
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+# الإعدادات الافتراضية
+DEFAULT_LIMITS = {
+    "kelly_fraction": 0.25,   # ربع كيلي
+    "race_cap": 0.05,         # أقصى نسبة من رأس المال في شوط واحد
+    "max_exposure": 0.20,     # أقصى نسبة من رأس المال على البطاقة كاملة
+    "min_stake": 1.0,         # أقل رهان (بعملة رأس المال) - الأقل منه يُحذف
+}
+
+
+# ===============================
+# كيلي لنتائج متنافية
+# ===============================
+def kelly_fractions(p: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    """نسب كيلي الكاملة لكل حصان (أشواط × متسابقين)
+
+    p: احتمالات الفوز (0-1) | odds: الأسعار العشرية (NaN أو ≤ 1 = لا يوجد سعر)
+    """
+    p = np.asarray(p, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    shape = p.shape
+    p = p.reshape(-1, shape[-1]) if p.ndim != 2 else p
+    odds = odds.reshape(p.shape)
+    rows = np.arange(p.shape[0])[:, None]
+
+    priced = np.isfinite(odds) & (odds > 1) & (p > 0)
+    inverse = np.divide(1.0, odds, out=np.zeros(p.shape), where=priced)
+    p_priced = np.where(priced, p, 0.0)
+    expected = np.multiply(p_priced, odds, out=np.zeros(p.shape), where=priced)
+
+    # الترتيب حسب العائد المتوقع (فهرسة مباشرة أسرع من take_along_axis للمصفوفات الصغيرة)
+    order = np.argsort(-expected, axis=-1, kind="stable")
+    p_sorted = p_priced[rows, order]
+    inv_sorted = inverse[rows, order]
+    e_sorted = expected[rows, order]
+    p_cumulative = np.cumsum(p_sorted, axis=-1)
+    inv_cumulative = np.cumsum(inv_sorted, axis=-1)
+
+    # R قبل إضافة كل حصان (المجموعة = كل من سبقه)
+    denom = 1 - (inv_cumulative - inv_sorted)
+    r_before = np.divide(1 - (p_cumulative - p_sorted), denom, out=np.zeros(p.shape), where=denom > 1e-12)
+
+    # أطول بادئة تحقق الشرط
+    included = np.logical_and.accumulate(e_sorted > r_before, axis=-1)
+    count = included.sum(axis=-1)
+
+    # R النهائي للمجموعة المختارة (المجاميع التراكمية عند آخر حصان مختار)
+    last = np.maximum(count - 1, 0)
+    denom = 1 - inv_cumulative[rows[:, 0], last]
+    r_final = np.divide(1 - p_cumulative[rows[:, 0], last], denom, out=np.zeros(len(p)), where=denom > 1e-12)
+    r_final[count == 0] = 1.0
+
+    f_sorted = np.where(included, p_sorted - r_final[:, None] * inv_sorted, 0.0)
+    fractions = np.empty(p.shape)
+    fractions[rows, order] = np.maximum(f_sorted, 0.0)
+    return fractions.reshape(shape)
+
+
+def apply_limits(fractions: np.ndarray, kelly_fraction: float = DEFAULT_LIMITS["kelly_fraction"],
+                 race_cap: float = DEFAULT_LIMITS["race_cap"],
+                 max_exposure: float = DEFAULT_LIMITS["max_exposure"]) -> np.ndarray:
+    """كسر كيلي ثم حد الشوط ثم حد التعرض الكلي (تقليص نسبي)"""
+    f = fractions * kelly_fraction
+
+    race_total = f.sum(axis=-1, keepdims=True)
+    scale = np.divide(race_cap, race_total, out=np.ones_like(race_total), where=race_total > race_cap)
+    f = f * scale
+
+    total = f.sum()
+    if total > max_exposure:
+        f = f * (max_exposure / total)
+    return f
+
+
+# ===============================
+# النمو المتوقع وخطر الإفلاس
+# ===============================
+def race_growth(p: np.ndarray, odds: np.ndarray, fractions: np.ndarray) -> np.ndarray:
+    """النمو اللوغاريتمي المتوقع لكل شوط: Σ p_i · log(1 - F + f_i·o_i)"""
+    p = np.asarray(p, dtype=np.float64)
+    returns = np.where(fractions > 0, fractions * np.nan_to_num(odds, nan=0.0), 0.0)
+    wealth = 1 - fractions.sum(axis=-1, keepdims=True) + returns
+    return (p * np.log(np.maximum(wealth, 1e-12))).sum(axis=-1)
+
+
+def simulate_wealth(p: np.ndarray, odds: np.ndarray, fractions: np.ndarray, horizon: int = 100,
+                    n_paths: int = 5000, ruin_level: float = 0.5, seed=None) -> Dict[str, float]:
+    """محاكاة تكرار نفس البطاقة horizon مرة (كل الأشواط متزامنة من نفس رأس المال)
+
+    تُعيد النمو المتوقع لكل بطاقة (بالمحاكاة) واحتمال نزول رأس المال تحت ruin_level
+    """
+    p = np.asarray(p, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    num_races, width = p.shape
+
+    # ربح/خسارة كل نتيجة ممكنة لكل شوط (كنسبة من رأس المال)
+    payoff = np.where(fractions > 0, fractions * np.nan_to_num(odds, nan=0.0), 0.0) - fractions.sum(axis=-1, keepdims=True)
+    cumulative = np.cumsum(p / np.maximum(p.sum(axis=-1, keepdims=True), 1e-12), axis=-1)
+    rows = np.arange(num_races)
+
+    log_wealth = np.zeros(n_paths)
+    ruined = np.zeros(n_paths, dtype=bool)
+    floor = np.log(ruin_level)
+    card_growth = 0.0
+    for _ in range(horizon):
+        u = rng.random((n_paths, num_races, 1))
+        winners = np.minimum((u > cumulative[None]).sum(axis=-1), width - 1)
+        card_return = 1 + payoff[rows, winners].sum(axis=-1)
+        step = np.log(np.maximum(card_return, 1e-12))
+        card_growth += step.mean()
+        log_wealth += step
+        ruined |= log_wealth < floor
+
+    return {
+        "simulated_growth": float(card_growth / horizon),
+        "risk_of_ruin": float(ruined.mean()),
+        "median_wealth": float(np.exp(np.median(log_wealth)))
+    }
+
+
+# ===============================
+# البطاقة كاملة
+# ===============================
+def solve_card(p: np.ndarray, odds: np.ndarray, bankroll: float, limits: Optional[Dict] = None,
+               with_risk: bool = True, risk_horizon: int = 100, risk_paths: int = 2000,
+               ruin_level: float = 0.5, seed=None) -> Dict:
+    """حل الرهانات لكل البطاقة (مصفوفات أشواط × متسابقين)
+
+    تُعيد stakes بنفس الأبعاد (بعملة رأس المال) مع النمو المتوقع وخطر الإفلاس
+    expected_growth: مجموع نمو الأشواط (كأنها متتالية) | simulated_growth: الأشواط متزامنة
+    """
+    limits = dict(DEFAULT_LIMITS, **(limits or {}))
+    fractions = apply_limits(kelly_fractions(p, odds), limits["kelly_fraction"],
+                             limits["race_cap"], limits["max_exposure"])
+
+    stakes = np.round(fractions * bankroll, 2)
+    stakes[stakes < limits["min_stake"]] = 0.0
+    fractions = stakes / bankroll if bankroll else fractions * 0
+
+    result = {
+        "stakes": stakes,
+        "fractions": fractions,
+        "race_growth": race_growth(p, odds, fractions),
+        "total_stake": float(stakes.sum()),
+        "exposure": float(fractions.sum()),
+    }
+    result["expected_growth"] = float(result["race_growth"].sum())
+    if with_risk and stakes.any():
+        result.update(simulate_wealth(p, odds, fractions, risk_horizon, risk_paths, ruin_level, seed))
+    elif with_risk:
+        result.update({"simulated_growth": 0.0, "risk_of_ruin": 0.0, "median_wealth": 1.0})
+    return result
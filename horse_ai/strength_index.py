@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strength Index - فهرس قوة الفرسان والمدربين
+جدول مفهرس بالاسم الموحد (W. Buick = William Buick) يُبنى من سجل النتائج
+ويُحدّث تدريجياً مع وصول نتائج جديدة، والبحث فيه O(1) وثابت بين التشغيلات
+"""
+
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+
+# النقاط الافتراضية
+TOP_SCORE = 90          # الفرسان/المدربون المميزون
+DEFAULT_SCORE = 62.5    # اسم غير معروف (منتصف النطاق القديم 50-75)
+PRIOR_RIDES = 20        # عدد المشاركات الوهمية لتثبيت النقاط مع العينات الصغيرة
+
+# الأسماء المميزة (البذرة الأولية قبل وجود نتائج)
+SEED_NAMES = {
+    "jockey": ["W. Buick", "L. Dettori", "R. Moore", "C. Soumillon",
+               "James Doyle", "Silvestre De Sousa", "Mickael Barzalona"],
+    "trainer": ["C. Appleby", "A. O'Brien", "J. Gosden", "Doug Watson",
+                "S. bin Suroor", "Simon & Ed Crisford"]
+}
+
+ROLES = ("jockey", "trainer")
+
+
+@lru_cache(maxsize=4096)
+def normalize_name(name: str) -> str:
+    """توحيد الاسم: الحرف الأول من الاسم الأول + اسم العائلة
+
+    "W. Buick" و "William Buick" ← "w buick"
+    "S. bin Suroor" و "Saeed bin Suroor" ← "s bin suroor"
+    """
+    tokens = re.sub(r"[^\w&' ]+", " ", (name or "").lower()).split()
+    if len(tokens) < 2:
+        return " ".join(tokens)
+    return " ".join([tokens[0][0]] + tokens[1:])
+
+
+class StrengthIndex:
+    """فهرس قوة الفرسان والمدربين - قاموس بالاسم الموحد لكل دور"""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Dict]] = {role: {} for role in ROLES}
+        self.aliases: Dict[str, Dict[str, str]] = {role: {} for role in ROLES}
+        self.processed: set = set()
+        self._scores: Dict[str, Dict[str, float]] = {role: {} for role in ROLES}
+        self._fingerprint = None
+
+    # ---------- التحميل والحفظ ----------
+
+    @classmethod
+    def load(cls, path: str) -> "StrengthIndex":
+        """تحميل الفهرس من ملف (أو إنشاء فهرس البذرة إن لم يوجد)"""
+        index = cls(path)
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                for role in ROLES:
+                    index.entries[role] = data.get("entries", {}).get(role, {})
+                    index.aliases[role] = data.get("aliases", {}).get(role, {})
+                index.processed = set(data.get("processed", []))
+                index._rebuild_scores()
+                return index
+            except (OSError, ValueError) as e:
+                print(f"⚠️ تعذر تحميل فهرس القوة: {e}")
+        index.seed()
+        return index
+
+    def save(self, path: str = None):
+        """حفظ الفهرس (كتابة ذرية عبر ملف مؤقت)"""
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({
+                "entries": self.entries,
+                "aliases": self.aliases,
+                "processed": sorted(self.processed)
+            }, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def seed(self):
+        """إضافة الأسماء المميزة كنقاط بداية"""
+        for role, names in SEED_NAMES.items():
+            for name in names:
+                entry = self._entry(role, name)
+                entry["seed"] = TOP_SCORE
+                self._refresh(role, self.key(role, name))
+
+    # ---------- المفاتيح ----------
+
+    def key(self, role: str, name: str) -> str:
+        """المفتاح الموحد للاسم (بعد تطبيق الأسماء البديلة)"""
+        normalized = normalize_name(name)
+        return self.aliases[role].get(normalized, normalized)
+
+    def add_alias(self, role: str, alias: str, canonical: str):
+        """ربط اسم بديل باسم أساسي (مثل لقب أو اسم مختلف التهجئة)"""
+        alias_key = normalize_name(alias)
+        canonical_key = self.key(role, canonical)
+        if alias_key == canonical_key:
+            return
+        self.aliases[role][alias_key] = canonical_key
+        self._fingerprint = None
+
+        # دمج أي سجل سابق للاسم البديل
+        old = self.entries[role].pop(alias_key, None)
+        self._scores[role].pop(alias_key, None)
+        if old:
+            entry = self._entry(role, canonical)
+            for field in ("rides", "wins", "places"):
+                entry[field] += old.get(field, 0)
+            entry["seed"] = max(entry.get("seed", DEFAULT_SCORE), old.get("seed", DEFAULT_SCORE))
+        self._refresh(role, canonical_key)
+
+    def _entry(self, role: str, name: str) -> Dict:
+        key = self.key(role, name)
+        entry = self.entries[role].get(key)
+        if entry is None:
+            entry = {"name": name, "rides": 0, "wins": 0, "places": 0, "seed": DEFAULT_SCORE}
+            self.entries[role][key] = entry
+        return entry
+
+    # ---------- النقاط ----------
+
+    @staticmethod
+    def _compute_score(entry: Dict) -> float:
+        """النقاط = مزيج البذرة ونسبة الفوز الفعلية حسب عدد المشاركات"""
+        rides = entry.get("rides", 0)
+        seed = entry.get("seed", DEFAULT_SCORE)
+        if rides == 0:
+            return seed
+        # نسبة فوز 25% أو أكثر ← 90 نقطة
+        win_rate = entry.get("wins", 0) / rides
+        observed = 50 + 40 * min(win_rate / 0.25, 1.0)
+        return round((PRIOR_RIDES * seed + rides * observed) / (PRIOR_RIDES + rides), 2)
+
+    def _refresh(self, role: str, key: str):
+        self._scores[role][key] = self._compute_score(self.entries[role][key])
+        self._fingerprint = None
+
+    def _rebuild_scores(self):
+        for role in ROLES:
+            self._scores[role] = {k: self._compute_score(e) for k, e in self.entries[role].items()}
+        self._fingerprint = None
+
+    def fingerprint(self) -> str:
+        """بصمة النقاط والأسماء البديلة (تتغير مع أي نتيجة جديدة) - جزء من مفتاح ذاكرة التقييم"""
+        if self._fingerprint is None:
+            payload = json.dumps([self._scores, self.aliases], sort_keys=True, ensure_ascii=False)
+            self._fingerprint = hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+        return self._fingerprint
+
+    def score(self, role: str, name: str) -> float:
+        """نقاط الفارس/المدرب (O(1) وثابتة)"""
+        return self._scores[role].get(self.key(role, name), DEFAULT_SCORE)
+
+    def jockey_score(self, name: str) -> float:
+        return self.score("jockey", name)
+
+    def trainer_score(self, name: str) -> float:
+        return self.score("trainer", name)
+
+    # ---------- التحديث من النتائج ----------
+
+    def add_result(self, track: str, date: str, race_number: int, runners: List[Dict]) -> bool:
+        """إضافة نتيجة شوط واحد (تُتجاهل إن سبق تسجيلها)
+
+        runners: [{"jockey": ..., "trainer": ..., "position": 1}, ...]
+        """
+        result_id = f"{track}|{date}|{race_number}"
+        if result_id in self.processed:
+            return False
+
+        for runner in runners:
+            position = runner.get("position") or 0
+            for role in ROLES:
+                name = runner.get(role)
+                if not name:
+                    continue
+                entry = self._entry(role, name)
+                entry["rides"] += 1
+                if position == 1:
+                    entry["wins"] += 1
+                if 1 <= position <= 3:
+                    entry["places"] += 1
+                self._refresh(role, self.key(role, name))
+
+        self.processed.add(result_id)
+        return True
+
+    def add_results(self, track: str, date: str, results: Iterable[Dict]) -> int:
+        """إضافة نتائج اجتماع كامل (فقط الأشواط التي تحتوي على runners)"""
+        added = 0
+        for result in results:
+            if result.get("runners") and self.add_result(track, date, result.get("race_number"), result["runners"]):
+                added += 1
+        return added
+
+    @classmethod
+    def build(cls, history: Iterable[Dict], path: str = None) -> "StrengthIndex":
+        """إعادة بناء الفهرس بالكامل من سجل النتائج"""
+        index = cls(path)
+        index.seed()
+        for record in history:
+            index.add_results(record.get("track"), record.get("date"), record.get("results", []))
+        return index
+
+    def top(self, role: str, limit: int = 10) -> List[Dict]:
+        """أقوى الأسماء حسب النقاط"""
+        ranked = sorted(self._scores[role].items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [{"name": self.entries[role][k]["name"], "score": s, "rides": self.entries[role][k]["rides"]}
+                for k, s in ranked]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tickets - تذاكر الأشواط المتعددة (Accumulator / Placepot / Pick 6)
+عدد التركيبات عبر 6-8 أشواط ينفجر (14^8 ≈ 1.5 مليار)، لذلك لا تُولد كلها:
+- طابور أولويات (heap) يُخرج التذاكر بترتيب تنازلي للقيمة المتوقعة واحدة تلو الأخرى
+- تقليم (branch-and-bound): أي فرع حده الأعلى أقل من الحد الأدنى أو يتجاوز عدد الخطوط لا يُفتح
+- المولدات كسولة: أخذ أفضل K تذاكر لا يحسب إلا ما يلزم لها
+
+المدخلات متجهات احتمالات لكل شوط (NumPy)، والمخرجات فهارس أعمدة داخل كل شوط
+"""
+
+import heapq
+import math
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+
+# ===============================
+# تغطية كل شوط
+# ===============================
+def race_coverage(p, kind: str = "win"):
+    """ترتيب الخيول تنازلياً واحتمال الإصابة عند اختيار أفضل m خيول (m = 1..n)
+
+    win: الفوز متنافٍ - التغطية = مجموع الاحتمالات (دقيق)
+    place: أكثر من حصان يصل ضمن المراكز - 1 - Π(1 - p) (تقريب باستقلال الخيول)
+    """
+    p = np.clip(np.nan_to_num(np.asarray(p, dtype=np.float64)), 0.0, 1.0)
+    order = np.argsort(-p, kind="stable")
+    sorted_p = p[order]
+    if kind == "win":
+        coverage = np.minimum(np.cumsum(sorted_p), 1.0)
+    elif kind == "place":
+        coverage = 1.0 - np.cumprod(1.0 - sorted_p)
+    else:
+        raise ValueError(f"نوع تغطية غير معروف: {kind}")
+    return order, coverage
+
+
+# ===============================
+# Accumulator: حصان واحد لكل شوط
+# ===============================
+def iter_accumulators(values: Sequence[np.ndarray], probabilities: Optional[Sequence[np.ndarray]] = None,
+                      min_value: float = 0.0) -> Iterator[Dict]:
+    """تركيبات (حصان لكل شوط) بترتيب تنازلي لحاصل ضرب القيم
+
+    values: لكل شوط قيمة كل حصان (احتمال الفوز، أو p × السعر للعائد المتوقع)
+    min_value: التقليم - التركيبات بقيمة ≤ min_value لا تُولد (ولا ما بعدها في نفس الفرع)
+    تُعيد {"selections": (عمود لكل شوط), "value", "probability"}
+    """
+    values = [np.nan_to_num(np.asarray(v, dtype=np.float64)) for v in values]
+    if not values or any(len(v) == 0 for v in values):
+        return
+    probabilities = values if probabilities is None else [
+        np.nan_to_num(np.asarray(p, dtype=np.float64)) for p in probabilities]
+
+    orders = [np.argsort(-v, kind="stable") for v in values]
+    sorted_values = [v[o] for v, o in zip(values, orders)]
+    sizes = [len(v) for v in values]
+
+    def value_of(idx) -> float:
+        return float(np.prod([sv[i] for sv, i in zip(sorted_values, idx)]))
+
+    start = (0,) * len(values)
+    heap = [(-value_of(start), start, 0)]
+    while heap:
+        neg_value, idx, last = heapq.heappop(heap)
+        if -neg_value <= min_value:
+            return
+
+        selections = tuple(int(o[i]) for o, i in zip(orders, idx))
+        yield {
+            "selections": selections,
+            "value": -neg_value,
+            "probability": float(np.prod([p[s] for p, s in zip(probabilities, selections)]))
+        }
+
+        # الأبناء: زيادة بُعد واحد ≥ آخر بُعد زيد (كل تركيبة تُولد مرة واحدة فقط)
+        # القيم مرتبة تنازلياً، فالابن لا يتجاوز أباه
+        for dim in range(last, len(idx)):
+            if idx[dim] + 1 < sizes[dim]:
+                child = idx[:dim] + (idx[dim] + 1,) + idx[dim + 1:]
+                value = value_of(child)
+                if value > min_value:
+                    heapq.heappush(heap, (-value, child, dim))
+
+
+# ===============================
+# Placepot / Pick 6: عدة خيول لكل شوط
+# ===============================
+def iter_tickets(coverages: Sequence[np.ndarray], max_lines: int,
+                 min_probability: float = 0.0) -> Iterator[Dict]:
+    """تذاكر التباديل (أفضل m_r خيول في كل شوط) بترتيب تنازلي لاحتمال الإصابة
+
+    coverages: لكل شوط التغطية عند اختيار أفضل 1..n خيول (انظر race_coverage)
+    max_lines: أقصى عدد خطوط Π m_r (الميزانية ÷ قيمة الخط)
+    تُعيد {"counts": (m لكل شوط), "lines", "probability"}
+
+    بحث best-first: الأولوية = حد أعلى لأفضل تذكرة في الفرع، لذلك أول تذكرة كاملة
+    تخرج من الطابور هي الأفضل من كل ما تبقى (الحد دقيق فلا تُفتح فروع بلا فائدة)
+    """
+    coverages = [np.asarray(c, dtype=np.float64) for c in coverages]
+    if not coverages or max_lines < 1 or any(len(c) == 0 for c in coverages):
+        return
+
+    # ميزانية أكبر من كل التركيبات لا تغير شيئاً
+    max_lines = min(max_lines, math.prod(len(c) for c in coverages))
+
+    # ceiling[d][L]: أفضل احتمال ممكن للأشواط d.. بميزانية L خطوط (برمجة ديناميكية دقيقة)
+    # Π m_r ≤ L  ⇔  m_d × Π(الباقي) ≤ L  ⇔  Π(الباقي) ≤ L // m_d
+    # الميزانيات المطلوبة فعلاً من الشكل max_lines // k فقط: كل ما ≤ √max_lines والقيم max_lines // k
+    # لـ k ≤ √max_lines (~2√max_lines نقطة بدل max_lines + 1، والمجموعة مغلقة تحت // m)
+    root = math.isqrt(max_lines)
+    budgets = np.unique(np.concatenate((np.arange(root + 1), max_lines // np.arange(1, root + 1))))
+    slot = {budget: i for i, budget in enumerate(budgets.tolist())}
+    ceiling = np.zeros((len(coverages) + 1, len(budgets)))
+    ceiling[-1, budgets >= 1] = 1.0
+    for d in range(len(coverages) - 1, -1, -1):
+        c = coverages[d]
+        for m in range(1, min(len(c), max_lines) + 1):
+            below = np.searchsorted(budgets, budgets // m)
+            np.maximum(ceiling[d], c[m - 1] * ceiling[d + 1][below], out=ceiling[d])
+
+    def bound(partial: float, lines: int, depth: int) -> float:
+        return partial * ceiling[depth][slot[max_lines // lines]]
+
+    counter = 0
+    heap = [(-bound(1.0, 1, 0), 1, counter, 0, (), 1.0)]
+    while heap:
+        neg_bound, lines, _, depth, counts, partial = heapq.heappop(heap)
+        if -neg_bound <= min_probability:
+            return
+        if depth == len(coverages):
+            yield {"counts": counts, "lines": lines, "probability": float(partial)}
+            continue
+
+        c = coverages[depth]
+        for m in range(1, min(len(c), max_lines // lines) + 1):
+            child_partial = partial * c[m - 1]
+            child_bound = bound(child_partial, lines * m, depth + 1)
+            if child_bound > min_probability:
+                counter += 1
+                heapq.heappush(heap, (-child_bound, lines * m, counter, depth + 1,
+                                      counts + (m,), child_partial))
+
+
+def top_k(tickets: Iterator[Dict], k: int) -> List[Dict]:
+    """أفضل k تذاكر من مولد كسول"""
+    return list(islice(tickets, k))
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracing - قياس زمن كل مرحلة في مسار الترشيحات (جلب، نقاط قوة، احتمالات، مراهنات، حفظ)
+- span: مدير سياق يقيس مرحلة واحدة ويحمل خصائص (provider, race_number) وعدادات
+  (runners_scored, cache_hits, bytes_written)
+- المراحل المتداخلة ترتبط تلقائياً بالأب (contextvars - كل خيط له سلسلته)
+- التصدير: JSON lines بسيطة أو سجلات متوافقة مع OpenTelemetry (OTLP/JSON span)
+- عند التعطيل (الافتراضي) كل span هو نفس الكائن الفارغ: لا ساعة ولا تخصيص ذاكرة
+
+    with span("fetch", provider="racingpost") as s:
+        s.add("cache_hits")
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+# رموز حالة OpenTelemetry
+STATUS_OK = 1
+STATUS_ERROR = 2
+SPAN_KIND_INTERNAL = 1
+
+FORMATS = ("jsonl", "otlp")
+
+_current = contextvars.ContextVar("horse_ai_span", default=None)
+
+
+# ===============================
+# المراحل
+# ===============================
+class _NoopSpan:
+    """مرحلة فارغة عند تعطيل التتبع (كائن واحد مشترك)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key: str, value):
+        pass
+
+    def add(self, counter: str, amount: float = 1):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """مرحلة واحدة مقاسة: الزمن بالنانو ثانية + الخصائص + العدادات"""
+    __slots__ = ("tracer", "name", "attributes", "counters", "trace_id", "span_id", "parent_id",
+                 "start_ns", "end_ns", "status", "_token", "_clock")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.counters: Dict[str, float] = {}
+        self.trace_id = self.span_id = self.parent_id = None
+        self.start_ns = self.end_ns = 0
+        self.status = STATUS_OK
+        self._token = None
+        self._clock = 0
+
+    def __enter__(self):
+        # المعرفات أعداد صحيحة (تُنسق hex عند التصدير فقط)
+        parent = _current.get()
+        if parent is not None:
+            self.trace_id, self.parent_id = parent.trace_id, parent.span_id
+        else:
+            self.trace_id = random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        self._clock = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # المدة من ساعة رتيبة، ووقت البداية من ساعة النظام (للربط مع السجلات الأخرى)
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._clock
+        if exc_type is not None:
+            self.status = STATUS_ERROR
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current.reset(self._token)
+        self.tracer._finish(self)
+        return False
+
+    def set(self, key: str, value):
+        """خاصية للمرحلة (مثل provider أو race_number)"""
+        self.attributes[key] = value
+
+    def add(self, counter: str, amount: float = 1):
+        """زيادة عداد (runners_scored, cache_hits, bytes_written ...)"""
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        """سجل JSON lines مختصر"""
+        return {
+            "name": self.name,
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": f"{self.parent_id:016x}" if self.parent_id is not None else None,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "counters": self.counters,
+            "status": "error" if self.status == STATUS_ERROR else "ok"
+        }
+
+    def to_otel(self) -> Dict:
+        """سجل span بصيغة OTLP/JSON (العدادات خصائص بالبادئة counter.)"""
+        attributes = [_otel_attribute(key, value) for key, value in self.attributes.items()]
+        attributes += [_otel_attribute(f"counter.{key}", value) for key, value in self.counters.items()]
+        record = {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": attributes,
+            "status": {"code": self.status}
+        }
+        if self.parent_id is not None:
+            record["parentSpanId"] = f"{self.parent_id:016x}"
+        if self.status == STATUS_ERROR:
+            record["status"]["message"] = self.attributes.get("error", "")
+        return record
+
+
+def _otel_attribute(key: str, value) -> Dict:
+    """خاصية OTLP: {"key", "value": {"stringValue" | "intValue" | "doubleValue" | "boolValue"}}"""
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+# ===============================
+# التصدير
+# ===============================
+class JsonLinesExporter:
+    """كتابة كل مرحلة مكتملة كسطر JSON (jsonl أو otlp) في ملف"""
+
+    def __init__(self, path: str, fmt: str = "jsonl"):
+        if fmt not in FORMATS:
+            raise ValueError(f"صيغة تتبع غير معروفة: {fmt}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span):
+        record = span.to_otel() if self.fmt == "otlp" else span.to_dict()
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+# ===============================
+# المتتبع
+# ===============================
+class Tracer:
+    """إنشاء المراحل وتجميعها (آخر keep مرحلة في الذاكرة) وتمريرها للمصدّرين"""
+
+    def __init__(self, enabled: bool = False, keep: int = 10000):
+        self.enabled = enabled
+        self.exporters: List = []
+        self.finished: deque = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool = True, path: Optional[str] = None, fmt: str = "jsonl",
+                  keep: Optional[int] = None) -> "Tracer":
+        """تفعيل/تعطيل التتبع مع ملف تصدير اختياري (يغلق المصدّرين السابقين)"""
+        self.close()
+        self.enabled = enabled
+        if keep is not None:
+            self.finished = deque(maxlen=keep)
+        if enabled and path:
+            self.exporters.append(JsonLinesExporter(path, fmt))
+        return self
+
+    def span(self, name: str, **attributes):
+        """مرحلة جديدة (NOOP_SPAN عند التعطيل)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self.finished.append(span)
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"⚠️ فشل تصدير التتبع: {e}")
+
+    def summary(self, by: Optional[str] = None) -> Dict[str, Dict]:
+        """ملخص المراحل المكتملة حسب الاسم (أو الاسم + خاصية مثل provider / race_number)
+
+        {"fetch[provider=racingpost]": {"count", "total_ms", "mean_ms", "max_ms", "counters"}}
+        """
+        with self._lock:
+            spans = list(self.finished)
+
+        summary: Dict[str, Dict] = {}
+        for span in spans:
+            key = span.name
+            if by is not None:
+                if by not in span.attributes:
+                    continue
+                key = f"{span.name}[{by}={span.attributes[by]}]"
+            entry = summary.setdefault(key, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "counters": {}})
+            duration = span.duration_ms
+            entry["count"] += 1
+            entry["total_ms"] += duration
+            entry["max_ms"] = max(entry["max_ms"], duration)
+            for counter, amount in span.counters.items():
+                entry["counters"][counter] = entry["counters"].get(counter, 0) + amount
+
+        for entry in summary.values():
+            entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 3)
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self.finished.clear()
+
+    def flush(self):
+        for exporter in self.exporters:
+            exporter.flush()
+
+    def _after_fork(self):
+        """العمليات الفرعية (ProcessPoolExecutor) لا تتتبع ولا تكتب في ملف الأب"""
+        self.enabled = False
+        self.exporters = []
+        self.finished = deque(maxlen=self.finished.maxlen)
+        self._lock = threading.Lock()
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+        self.exporters = []
+
+
+# المتتبع العام للعملية (معطل افتراضياً)
+TRACER = Tracer()
+
+if hasattr(os, "register_at_fork"):
+    # تفريغ الملف قبل التفرع حتى لا تكرر العملية الفرعية ما في المخزن المؤقت
+    os.register_at_fork(before=TRACER.flush, after_in_child=TRACER._after_fork)
+
+
+def span(name: str, **attributes):
+    """مرحلة من المتتبع العام"""
+    if not TRACER.enabled:
+        return NOOP_SPAN
+    return Span(TRACER, name, attributes)
+
+
+def current_span():
+    """المرحلة الجارية في هذا الخيط (NOOP_SPAN إن لم توجد) - لإضافة عدادات من العمق"""
+    active = _current.get()
+    return NOOP_SPAN if active is None else active
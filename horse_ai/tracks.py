@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tracks - بيانات المضامير المدعومة
+وحدة خفيفة بدون تبعيات: واجهة الويب تعرض القوائم منها دون استيراد محرك التحليل
+"""
+
+RACETRACKS = {
+    "UAE": [
+        {"id": "meydan", "name": "Meydan Racecourse", "city": "Dubai"},
+        {"id": "jebel_ali", "name": "Jebel Ali Racecourse", "city": "Dubai"},
+        {"id": "al_ain", "name": "Al Ain Racecourse", "city": "Al Ain"},
+        {"id": "abu_dhabi", "name": "Abu Dhabi Equestrian Club", "city": "Abu Dhabi"},
+        {"id": "sharjah", "name": "Sharjah Equestrian", "city": "Sharjah"}
+    ],
+    "UK": [
+        {"id": "wolverhampton", "name": "Wolverhampton Racecourse", "city": "Wolverhampton"},
+        {"id": "lingfield", "name": "Lingfield Park", "city": "Lingfield"},
+        {"id": "kempton", "name": "Kempton Park", "city": "Sunbury"},
+        {"id": "newcastle", "name": "Newcastle Racecourse", "city": "Newcastle"}
+    ]
+}
+
+# المنطقة الزمنية لكل دولة (أوقات الأشواط في البطاقات بالتوقيت المحلي للمضمار)
+TIMEZONES = {
+    "UAE": "Asia/Dubai",
+    "UK": "Europe/London"
+}
+
+
+def track_timezone(track: str):
+    """اسم المنطقة الزمنية لمضمار (None = مضمار غير معروف)"""
+    for country, tracks in RACETRACKS.items():
+        if any(t["id"] == track for t in tracks):
+            return TIMEZONES.get(country)
+    return None
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Weight Trainer - تدريب أوزان العوامل من النتائج الفعلية (Conditional Logit)
+احتمال فوز الحصان i في شوطه = softmax(Σ_f β_f · x_if) على متسابقي الشوط فقط
+- β تُقدر بأعلى احتمال (Maximum Likelihood) للفائزين الفعليين + تنظيم L2 نحو الأوزان الحالية
+- طريقة نيوتن: التدرج والمصفوفة الثانية (Hessian) محسوبة لكل المتسابقين دفعة واحدة (reduceat)
+  عدد المعاملات = عدد العوامل (7) فالخطوة الواحدة حل نظام 7×7 - عشرات آلاف الأشواط في ثوانٍ
+- النتيجة تُنشر كمجموعة أوزان بنسخة: الأوزان = β / Σβ (مجموعها 1 مثل WEIGHTS)
+  ودرجة حرارة Softmax = 1 / Σβ، لأن softmax(X·w / T) = softmax(X·β)
+
+    python weight_trainer.py --l2 1.0          # تدريب من سجل التعلم ونشر نسخة جديدة
+
+التعلم المستمر (OnlineLearner): بعد كل نتيجة خطوة Adagrad واحدة على β لكل شوط بدل إعادة التدريب،
+بحالة بحجم عدد العوامل فقط، ونقطة حفظ ذرية (online.json) يلتقطها PowerRatingEngine بين الأشواط
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_WEIGHTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "weights")
+WEIGHTS_FILE_RE = re.compile(r"^weights\.(\d{6})\.json$")
+ONLINE_FILE = "online.json"
+
+# أقل عدد أشواط صالحة للتدريب
+MIN_RACES = 50
+
+
+# ===============================
+# بيانات التدريب
+# ===============================
+class TrainingSet:
+    """مصفوفة العوامل لكل المتسابقين (صفوف الشوط متتالية) + الفائز في كل شوط"""
+
+    def __init__(self, factor_names: Sequence[str], X: np.ndarray, offsets: np.ndarray, winners: np.ndarray):
+        self.factor_names = list(factor_names)
+        self.X = X                  # (متسابقين × عوامل)
+        self.offsets = offsets      # بداية كل شوط في X (+ النهاية)
+        self.winners = winners      # فهرس صف الفائز في X لكل شوط
+
+    @property
+    def num_races(self) -> int:
+        return len(self.winners)
+
+    @classmethod
+    def from_races(cls, factor_names: Sequence[str], races: Iterable[Tuple[Sequence[Sequence[float]], int]]
+                   ) -> "TrainingSet":
+        """races: (صفوف العوامل لكل متسابق، ترتيب الفائز في الشوط) - الأشواط بمتسابق واحد تُتجاهل"""
+        rows, offsets, winners = [], [0], []
+        for factors, winner in races:
+            if len(factors) < 2 or not 0 <= winner < len(factors):
+                continue
+            winners.append(offsets[-1] + winner)
+            rows.extend(factors)
+            offsets.append(offsets[-1] + len(factors))
+        X = np.asarray(rows, dtype=np.float64).reshape(len(rows), len(factor_names))
+        return cls(factor_names, X, np.asarray(offsets, dtype=np.int64), np.asarray(winners, dtype=np.int64))
+
+
+def _race_softmax(z: np.ndarray, offsets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(log Σ exp لكل شوط، احتمال كل متسابق داخل شوطه) للأشواط المتتالية"""
+    starts, counts = offsets[:-1], np.diff(offsets)
+    z_max = np.maximum.reduceat(z, starts)
+    e = np.exp(z - np.repeat(z_max, counts))
+    total = np.add.reduceat(e, starts)
+    return np.log(total) + z_max, e / np.repeat(total, counts)
+
+
+def log_likelihood(data: TrainingSet, beta: np.ndarray) -> float:
+    """متوسط log احتمال الفائز لكل شوط"""
+    z = data.X @ beta
+    lse, _ = _race_softmax(z, data.offsets)
+    return float((z[data.winners] - lse).mean())
+
+
+def top_pick_accuracy(data: TrainingSet, beta: np.ndarray) -> float:
+    """نسبة الأشواط التي فاز فيها صاحب أعلى نقاط"""
+    z = data.X @ beta
+    return float((z[data.winners] >= np.maximum.reduceat(z, data.offsets[:-1])).mean())
+
+
+# ===============================
+# التدريب
+# ===============================
+def fit_conditional_logit(data: TrainingSet, prior: np.ndarray, l2: float = 1.0, max_iter: int = 50,
+                          tol: float = 1e-8) -> Dict:
+    """β بأعلى احتمال (متوسط لكل شوط) - l2/2·|β - prior|² بطريقة نيوتن مع تقصير الخطوة
+
+    يعيد {"beta", "iterations", "converged", "log_likelihood"}
+    """
+    X, offsets, winners = data.X, data.offsets, data.winners
+    starts = offsets[:-1]
+    num_races = len(winners)
+    winner_sum = X[winners].sum(axis=0)
+    prior = np.asarray(prior, dtype=np.float64)
+
+    def objective(beta: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+        z = X @ beta
+        lse, p = _race_softmax(z, offsets)
+        loss = -(z[winners] - lse).sum() / num_races + 0.5 * l2 * np.sum((beta - prior) ** 2)
+        return loss, z, p
+
+    beta = prior.copy()
+    loss, _, p = objective(beta)
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        weighted = X * p[:, None]
+        race_means = np.add.reduceat(weighted, starts)         # Σ p·x لكل شوط
+        grad = -(winner_sum - weighted.sum(axis=0)) / num_races + l2 * (beta - prior)
+        hessian = (weighted.T @ X - race_means.T @ race_means) / num_races + l2 * np.eye(len(beta))
+        step = np.linalg.solve(hessian, -grad)
+
+        # تقصير الخطوة حتى تنخفض الخسارة (Armijo)
+        scale = 1.0
+        while True:
+            candidate = beta + scale * step
+            new_loss, _, new_p = objective(candidate)
+            if new_loss <= loss + 1e-4 * scale * grad @ step or scale < 1e-6:
+                break
+            scale *= 0.5
+
+        improvement = loss - new_loss
+        beta, loss, p = candidate, new_loss, new_p
+        if improvement < tol and np.max(np.abs(grad)) < np.sqrt(tol):
+            converged = True
+            break
+
+    return {"beta": beta, "iterations": iteration, "converged": converged,
+            "log_likelihood": log_likelihood(data, beta)}
+
+
+def train_weights(data: TrainingSet, weights: Dict[str, float], temperature: float, l2: float = 1.0,
+                  max_iter: int = 50) -> Dict:
+    """تدريب أوزان جديدة بدءاً من الأوزان ودرجة الحرارة الحالية (وهي أيضاً مركز تنظيم L2)
+
+    يعيد {"weights", "softmax_temperature", "races", "log_likelihood", "baseline_log_likelihood",
+          "uniform_log_likelihood", "top_pick_accuracy", "iterations", "converged", "seconds"}
+    """
+    start = time.perf_counter()
+    prior = np.array([weights[name] for name in data.factor_names], dtype=np.float64) / temperature
+    fit = fit_conditional_logit(data, prior, l2, max_iter)
+    beta = fit["beta"]
+    scale = beta.sum()
+    if scale <= 0:
+        raise ValueError("الأوزان المدربة مجموعها غير موجب - بيانات غير كافية أو غير متسقة")
+
+    field_sizes = np.diff(data.offsets)
+    return {
+        "weights": {name: round(float(b / scale), 6) for name, b in zip(data.factor_names, beta)},
+        "softmax_temperature": round(float(1 / scale), 6),
+        "races": data.num_races,
+        "runners": int(len(data.X)),
+        "l2": l2,
+        "log_likelihood": round(fit["log_likelihood"], 6),
+        "baseline_log_likelihood": round(log_likelihood(data, prior), 6),
+        "uniform_log_likelihood": round(float(-np.log(field_sizes).mean()), 6),
+        "top_pick_accuracy": round(top_pick_accuracy(data, beta), 4),
+        "baseline_top_pick_accuracy": round(top_pick_accuracy(data, prior), 4),
+        "iterations": fit["iterations"],
+        "converged": fit["converged"],
+        "seconds": round(time.perf_counter() - start, 4)
+    }
+
+
+# ===============================
+# مجموعات الأوزان (بنسخ)
+# ===============================
+def weight_versions(weights_dir: str = DEFAULT_WEIGHTS_DIR) -> List[int]:
+    """أرقام النسخ المنشورة تصاعدياً"""
+    if not os.path.isdir(weights_dir):
+        return []
+    return sorted(int(m.group(1)) for m in map(WEIGHTS_FILE_RE.match, os.listdir(weights_dir)) if m)
+
+
+def publish_weights(trained: Dict, weights_dir: str = DEFAULT_WEIGHTS_DIR) -> Dict:
+    """حفظ الأوزان المدربة كنسخة جديدة (كتابة ذرية) - يعيد السجل المحفوظ مع version"""
+    os.makedirs(weights_dir, exist_ok=True)
+    versions = weight_versions(weights_dir)
+    record = dict(trained, version=(versions[-1] + 1) if versions else 1,
+                  trained_at=datetime.now().isoformat())
+    path = os.path.join(weights_dir, f"weights.{record['version']:06d}.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return record
+
+
+def load_weights(weights_dir: str = DEFAULT_WEIGHTS_DIR, version: Optional[int] = None) -> Optional[Dict]:
+    """مجموعة أوزان منشورة (آخر نسخة افتراضياً) أو None"""
+    if version is None:
+        versions = weight_versions(weights_dir)
+        if not versions:
+            return None
+        version = versions[-1]
+    path = os.path.join(weights_dir, f"weights.{version:06d}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ===============================
+# التعلم المستمر
+# ===============================
+class OnlineLearner:
+    """تحديث β بعد كل شوط (Adagrad) بدءاً من آخر أوزان منشورة
+
+    الحماية من الانجراف:
+    - معدل التعلم: lr / (1 + updates / decay) فوق تكيف Adagrad لكل عامل
+    - تنظيم L2 نحو الأوزان المنشورة (anchor) وحد أقصى لتغير β النسبي في الخطوة الواحدة
+    - نشر جديد (weights_trainer) يعيد التعلم من الأوزان الجديدة تلقائياً (base_version)
+    """
+
+    def __init__(self, weights_dir: str = DEFAULT_WEIGHTS_DIR, weights: Optional[Dict[str, float]] = None,
+                 temperature: float = 8.0, lr: float = 0.002, decay: float = 20000, l2: float = 0.01,
+                 max_change: float = 0.05):
+        """weights / temperature: نقطة البداية إن لم تُنشر أوزان بعد"""
+        self.weights_dir = weights_dir
+        self.lr = lr
+        self.decay = decay
+        self.l2 = l2
+        self.max_change = max_change
+
+        published = load_weights(weights_dir)
+        if published is not None:
+            weights, temperature = published["weights"], published["softmax_temperature"]
+        self.base_version = published["version"] if published is not None else None
+        self.factor_names = list(weights)
+        self.anchor = np.array([weights[name] for name in self.factor_names], dtype=np.float64) / temperature
+        self.beta = self.anchor.copy()
+        self.grad_sq = np.zeros_like(self.beta)
+        self.updates = 0
+        self.seq = 0                # آخر حدث نتيجة مطبق (لتجنب التكرار عند إعادة تشغيل السجل)
+        self._load()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.weights_dir, ONLINE_FILE)
+
+    def _load(self):
+        """الاستمرار من نقطة الحفظ إن كانت مبنية على نفس الأوزان المنشورة"""
+        state = load_online_weights(self.weights_dir)
+        if state is None or state.get("base_version") != self.base_version \
+                or state.get("factor_names") != self.factor_names:
+            return
+        self.beta = np.array(state["beta"], dtype=np.float64)
+        self.grad_sq = np.array(state["grad_sq"], dtype=np.float64)
+        self.updates = state["updates"]
+        self.seq = state["seq"]
+
+    def learning_rate(self) -> float:
+        return self.lr / (1 + self.updates / self.decay)
+
+    def update(self, factors: Sequence[Sequence[float]], winner: int) -> float:
+        """خطوة واحدة لشوط واحد - يعيد log احتمال الفائز قبل التحديث"""
+        X = np.asarray(factors, dtype=np.float64)
+        z = X @ self.beta
+        e = np.exp(z - z.max())
+        p = e / e.sum()
+        grad = X[winner] - p @ X - self.l2 * (self.beta - self.anchor)
+        self.grad_sq += grad ** 2
+        step = self.learning_rate() * grad / (np.sqrt(self.grad_sq) + 1e-8)
+        limit = self.max_change * np.maximum(np.abs(self.beta), np.abs(self.anchor).mean())
+        self.beta += np.clip(step, -limit, limit)
+        self.updates += 1
+        return float(np.log(p[winner]))
+
+    def published_weights(self) -> Optional[Dict]:
+        """{"weights", "softmax_temperature"} من β الحالية (None إن كان مجموعها غير موجب)"""
+        scale = self.beta.sum()
+        if scale <= 0:
+            return None
+        return {"weights": {name: round(float(b / scale), 6) for name, b in zip(self.factor_names, self.beta)},
+                "softmax_temperature": round(float(1 / scale), 6)}
+
+    def checkpoint(self):
+        """حفظ ذري لحالة المتعلم والأوزان الناتجة (PowerRatingEngine يراقب هذا الملف)"""
+        published = self.published_weights()
+        if published is None:
+            print("⚠️ التعلم المستمر: أوزان غير صالحة - لم تُحفظ")
+            return
+        os.makedirs(self.weights_dir, exist_ok=True)
+        state = dict(published, base_version=self.base_version, factor_names=self.factor_names,
+                     beta=self.beta.tolist(), grad_sq=self.grad_sq.tolist(), updates=self.updates,
+                     seq=self.seq, saved_at=datetime.now().isoformat())
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def load_online_weights(weights_dir: str = DEFAULT_WEIGHTS_DIR) -> Optional[Dict]:
+    """نقطة حفظ التعلم المستمر أو None"""
+    try:
+        with open(os.path.join(weights_dir, ONLINE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# ===============================
+# سطر الأوامر
+# ===============================
+def main():
+    import argparse
+    import sys
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bots"))
+    from learning_engine import LearningEngine
+
+    parser = argparse.ArgumentParser(description="تدريب أوزان العوامل من سجل التعلم")
+    parser.add_argument("--l2", type=float, default=1.0, help="قوة التنظيم نحو الأوزان الحالية")
+    parser.add_argument("--weights-dir", type=str, default=DEFAULT_WEIGHTS_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="تدريب بدون نشر")
+    args = parser.parse_args()
+
+    engine = LearningEngine()
+    trained = engine.train_weights(l2=args.l2, publish=not args.dry_run, weights_dir=args.weights_dir)
+    engine.close()
+    return 0 if trained else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())